@@ -0,0 +1,219 @@
+"""
+BAIKAL RPA AI – get_current_user 캐시 (검증된 토큰 + 사용자 행)
+
+Two in-process TTL/LRU maps sit in front of get_current_user:
+
+  tokens   raw JWT → (user_id, exp). A token seen in the last
+           AUTH_CACHE_TTL_SECONDS skips the signature check (never past exp)
+  users    user_id → the User columns endpoints read (no password hash), so
+           a warm request costs no users query at all
+
+With AUTH_CACHE_BACKEND=redis the user rows are also kept in Redis. A user
+loaded by any uvicorn worker is then served to the others without a query,
+and invalidations reach every worker over a pub/sub channel.
+
+Invalidation: mapper events on User collect the changed / deleted ids, and
+after the session commits they are evicted locally, from Redis and on the
+channel. A local entry lives at most AUTH_CACHE_TTL_SECONDS, which bounds
+staleness if a message is lost. Writes that bypass the ORM must call
+invalidate_user() themselves.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.core.config import settings
+
+USER_FIELDS = ("id", "email", "name", "role", "created_at")
+CHANNEL = "auth:invalidate"
+
+
+class TTLCache:
+    """Thread-safe LRU map whose entries expire; get() returns None when absent."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class AuthCache:
+    def __init__(self, redis_url: Optional[str] = None):
+        self.tokens = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+        self.users = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+        self.requests = 0
+        self.token_hits = 0
+        self.user_hits = 0
+        self.shared_hits = 0
+        self.db_lookups = 0
+        self.invalidations = 0
+        self.errors = 0
+        self._redis = None
+        self._sync_redis = None
+        if redis_url:
+            import redis
+            import redis.asyncio as redis_async
+            self._redis = redis_async.from_url(redis_url, decode_responses=True)
+            self._sync_redis = redis.from_url(redis_url, decode_responses=True)
+            threading.Thread(target=self._listen, name="auth-cache-invalidate", daemon=True).start()
+
+    # ---------- tokens ----------
+    def verified_user_id(self, token: str) -> Optional[str]:
+        """`sub` of a verified token; raises 401 (via decode_token) for a bad one."""
+        from app.core.security import decode_token
+
+        self.requests += 1
+        cached = self.tokens.get(token)
+        if cached is not None and cached[1] > time.time():
+            self.token_hits += 1
+            return cached[0]
+        payload = decode_token(token)
+        user_id, exp = payload.get("sub"), payload.get("exp")
+        if user_id is not None and exp is not None:
+            self.tokens.set(token, (user_id, exp), ttl=exp - time.time())
+        return user_id
+
+    # ---------- users ----------
+    async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = self.users.get(user_id)
+        if row is not None:
+            self.user_hits += 1
+            return row
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(f"auth:user:{user_id}")
+        except Exception:
+            self.errors += 1  # shared tier down: fall through to the database
+            return None
+        if raw is None:
+            return None
+        row = json.loads(raw)
+        row["created_at"] = datetime.fromisoformat(row["created_at"]) if row["created_at"] else None
+        self.users.set(user_id, row)
+        self.shared_hits += 1
+        return row
+
+    async def put_user(self, user) -> None:
+        self.db_lookups += 1
+        row = {f: getattr(user, f) for f in USER_FIELDS}
+        self.users.set(user.id, row)
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(f"auth:user:{user.id}", json.dumps(row, default=str),
+                                  ex=settings.AUTH_CACHE_SHARED_TTL_SECONDS)
+        except Exception:
+            self.errors += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        self.invalidations += 1
+        self.users.pop(user_id)
+        if self._sync_redis is None:
+            return
+        try:
+            self._sync_redis.delete(f"auth:user:{user_id}")
+            self._sync_redis.publish(CHANNEL, user_id)
+        except Exception:
+            self.errors += 1  # other workers catch up within AUTH_CACHE_TTL_SECONDS
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._sync_redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                for message in pubsub.listen():
+                    self.users.pop(message["data"])
+            except Exception:
+                self.errors += 1
+                time.sleep(5)  # reconnect; local TTL covers the gap
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": settings.AUTH_CACHE_BACKEND,
+            "requests": self.requests,
+            "token_hits": self.token_hits,
+            "user_hits": self.user_hits,
+            "shared_hits": self.shared_hits,
+            "db_lookups": self.db_lookups,
+            "db_lookups_per_request": round(self.db_lookups / self.requests, 4) if self.requests else 0.0,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "cached_tokens": len(self.tokens),
+            "cached_users": len(self.users),
+        }
+
+
+_cache: Optional[AuthCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_auth_cache() -> Optional[AuthCache]:
+    global _cache
+    if not settings.AUTH_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            shared = settings.AUTH_CACHE_BACKEND.lower() == "redis"
+            _cache = AuthCache(settings.REDIS_URL if shared else None)
+        return _cache
+
+
+def invalidate_user(user_id: str) -> None:
+    cache = get_auth_cache()
+    if cache is not None:
+        cache.invalidate_user(user_id)
+
+
+# ---------- invalidation on User writes ----------
+def _mark_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("auth_invalidate", set()).add(target.id)
+
+
+def _after_commit(session):
+    for user_id in session.info.pop("auth_invalidate", ()):
+        invalidate_user(user_id)
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop("auth_invalidate", None)
+
+
+def install_invalidation(user_model) -> None:
+    event.listen(user_model, "after_update", _mark_changed)
+    event.listen(user_model, "after_delete", _mark_changed)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_soft_rollback", _after_rollback)
@@ -2,7 +2,7 @@
 BAIKAL RPA AI – Core Configuration
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import json, os
 
 
@@ -10,6 +10,18 @@ class Settings(BaseSettings):
     # Database (SQLite for local dev, PostgreSQL for Docker)
     DATABASE_URL: str = "sqlite+aiosqlite:///./baikal_rpa.db"
 
+    # Connection pools, per process (see app/core/db.py)
+    DB_POOL_SIZE: int = 10                 # API async engine
+    DB_MAX_OVERFLOW: int = 10
+    DB_WORKER_POOL_SIZE: int = 3           # Celery worker child / local runner (run + log flusher)
+    DB_WORKER_MAX_OVERFLOW: int = 2
+    DB_BEAT_POOL_SIZE: int = 2             # celery beat (scheduler + leases)
+    DB_POOL_TIMEOUT: float = 30.0          # seconds to wait for a free connection before failing
+    DB_POOL_RECYCLE: int = 1800            # reconnect connections older than this (seconds)
+    DB_POOL_PRE_PING: bool = True          # test a connection on checkout (drops dead ones after failover)
+    DB_STATEMENT_CACHE_SIZE: int = 100     # asyncpg prepared statements per connection; 0 behind PgBouncer
+    DB_REPLICA_URL: str = ""               # read-only list queries go here when set
+
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
 
@@ -18,6 +30,26 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRE_MINUTES: int = 480
 
+    # Auth cache (get_current_user)
+    AUTH_CACHE_ENABLED: bool = True         # verified tokens + user rows
+    AUTH_CACHE_BACKEND: str = "memory"      # "memory" | "redis" (user rows shared across workers)
+    AUTH_CACHE_TTL_SECONDS: float = 30.0    # local entry lifetime (bounds staleness)
+    AUTH_CACHE_SHARED_TTL_SECONDS: int = 300
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
+    # Passwords / login
+    PASSWORD_BCRYPT_ROUNDS: int = 12        # hashes at another cost are rehashed on login
+    PASSWORD_HASH_POOL: str = "thread"      # "thread" | "process" | "inline" (blocks the event loop)
+    PASSWORD_HASH_WORKERS: int = 2          # bcrypt calls running at once
+    PASSWORD_HASH_MAX_PENDING: int = 64     # queued + running before 503
+    LOGIN_RATE_PER_MINUTE: float = 10.0     # login attempts per email + client IP (0 = unlimited)
+    LOGIN_RATE_BURST: int = 5
+    LOGIN_IP_RATE_PER_MINUTE: float = 60.0  # login attempts per client IP over all emails (0 = unlimited)
+    LOGIN_IP_RATE_BURST: int = 20
+    REGISTER_RATE_PER_MINUTE: float = 5.0   # sign-ups per client IP (0 = unlimited)
+    REGISTER_RATE_BURST: int = 3
+    TRUSTED_PROXIES: str = "127.0.0.1,::1"  # peers whose X-Forwarded-For is believed (IPs / CIDRs, comma separated)
+
     # AI
     AI_PROVIDER: str = "openai"  # "openai" | "ollama"
     OPENAI_API_KEY: str = ""
@@ -25,6 +57,150 @@ class Settings(BaseSettings):
     OLLAMA_BASE_URL: str = "http://host.docker.internal:11434"
     OLLAMA_MODEL: str = "llama3"
 
+    # AI provider pools / limits
+    LLM_HTTP_MAX_CONNECTIONS: int = 20     # keep-alive pool size per provider
+    OLLAMA_MAX_CONCURRENCY: int = 2        # in-flight generations against Ollama
+    OPENAI_MAX_CONCURRENCY: int = 16
+    OLLAMA_RPM: int = 0                    # requests / minute per model (0 = unlimited)
+    OPENAI_RPM: int = 0
+    LLM_MODEL_RPM: str = "{}"              # per-model override, e.g. {"gpt-4o": 500}
+    LLM_MAX_QUEUE: int = 32                # waiting requests before fast 429
+    LLM_QUEUE_TIMEOUT: float = 30.0        # max seconds to wait for a slot
+
+    # AI response cache (document generation)
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_BACKEND: str = "sqlite"       # "sqlite" | "redis"
+    AI_CACHE_SQLITE_PATH: str = "./ai_cache.db"
+    AI_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    AI_CACHE_MAX_ENTRIES: int = 5000
+    AI_CACHE_SEMANTIC: bool = False        # similarity lookup over prompt embeddings
+    AI_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    OPENAI_EMBED_MODEL: str = "text-embedding-3-small"
+    OLLAMA_EMBED_MODEL: str = "nomic-embed-text"
+
+    # AI routing (failover / hedging / model tiers / batching)
+    AI_FAILOVER: bool = True
+    AI_FALLBACK_PROVIDERS: str = "ollama,openai"  # tried after AI_PROVIDER, if configured
+    OLLAMA_ENABLED: bool = False           # Ollama counts as configured for failover (AI_PROVIDER=ollama uses it anyway)
+    AI_MAX_ERROR_RATE: float = 0.5         # recent error rate that marks a provider unhealthy
+    AI_LATENCY_SLO_SECONDS: float = 0.0    # p95 above this marks a provider unhealthy (0 = off)
+    AI_HEALTH_MIN_SAMPLES: int = 10        # samples needed before health is judged
+    AI_HEDGE_ENABLED: bool = False         # start a backup provider when the first is slow
+    AI_HEDGE_MIN_DELAY: float = 2.0
+    OPENAI_MODEL_SMALL: str = ""           # chat model (empty = OPENAI_MODEL)
+    OPENAI_MODEL_LARGE: str = ""           # documents / long prompts (empty = OPENAI_MODEL)
+    OLLAMA_MODEL_SMALL: str = ""
+    OLLAMA_MODEL_LARGE: str = ""
+    AI_LARGE_PROMPT_TOKENS: int = 3000     # prompts above this use the large model
+    AI_BATCH_WINDOW_MS: int = 10           # embedding micro-batch window
+    AI_BATCH_MAX_SIZE: int = 32
+
+    # AI chat history (server-side conversations)
+    AI_HISTORY_TOKEN_BUDGET: int = 2000    # recent turns sent verbatim with each message
+    AI_HISTORY_KEEP_RATIO: float = 0.5     # fold older turns until this share of the budget is left
+    AI_HISTORY_MIN_TURNS: int = 2          # always keep at least this many recent messages
+    AI_HISTORY_SUMMARY_TOKENS: int = 400   # target length of the rolling summary
+
+    # Browser pool (web_scrape)
+    BROWSER_POOL_MAX_CONTEXTS: int = 4     # concurrent contexts per worker process
+    BROWSER_POOL_MAX_PAGES: int = 200      # recycle browser after this many pages
+    BROWSER_POOL_MAX_MEMORY_MB: int = 1024  # recycle when Chromium RSS exceeds this (0 = off)
+    SCRAPE_MAX_CONCURRENCY: int = 8        # upper bound for config.concurrency in multi-URL mode
+    SCRAPE_MAX_URLS: int = 2000
+
+    # Static page fetches (web_scrape engine "http" / "auto")
+    HTTP_SCRAPE_MAX_CONNECTIONS: int = 100  # keep-alive pool per worker process
+    HTTP_SCRAPE_MAX_CONCURRENCY: int = 32   # upper bound for config.concurrency with engine http / auto
+    HTTP_SCRAPE_TIMEOUT: float = 30.0
+    HTTP_SCRAPE_MAX_BYTES: int = 10 * 1024 * 1024  # larger bodies go to the browser (auto) or fail (http)
+    HTTP_SCRAPE_USER_AGENT: str = "Mozilla/5.0 (compatible; BaikalRPA/1.0)"
+    HTTP_SCRAPE_FALLBACK_ENCODING: str = "cp949"  # body with no charset anywhere and not valid UTF-8
+
+    # Local run dispatcher (POST /automations/{id}/run)
+    RUNNER_IO_WORKERS: int = 4             # threads for web_scrape runs
+    RUNNER_CPU_WORKERS: int = 2            # processes for excel_process runs
+    RUNNER_MAX_QUEUE: int = 200            # queued + running runs before 429
+    RUNNER_MAX_QUEUED_PER_USER: int = 20
+    RUNNER_MAX_RUNNING_PER_USER: int = 2
+    RUNNER_POLL_SECONDS: float = 1.0
+    RUNNER_STALE_SECONDS: int = 60         # heartbeat age after which a claimed run is re-queued
+    RUNNER_MAX_ATTEMPTS: int = 3           # pickups before an interrupted run is marked failed
+
+    # Celery workers: one service per resource queue (python -m app.workers.worker <resource>)
+    CELERY_DEFAULT_QUEUE: str = "celery"   # run_scheduled_automation and other light tasks
+    CELERY_BROWSER_POOL: str = "threads"   # rpa.browser: threads share one warm Chromium
+    CELERY_BROWSER_CONCURRENCY: int = 4    # keep <= BROWSER_POOL_MAX_CONTEXTS
+    CELERY_BROWSER_PREFETCH: int = 1
+    CELERY_CPU_POOL: str = "prefork"       # rpa.cpu: pandas runs, one process each
+    CELERY_CPU_CONCURRENCY: int = 2        # about one per core
+    CELERY_CPU_PREFETCH: int = 1
+    CELERY_LLM_POOL: str = "threads"       # rpa.llm: runs waiting on an LLM API
+    CELERY_LLM_CONCURRENCY: int = 16
+    CELERY_LLM_PREFETCH: int = 4
+    CELERY_TASK_TIME_LIMIT: int = 3600     # seconds per execute_automation; browser calls give up just before
+
+    # Run logs (automation_run_logs)
+    RUN_LOG_FLUSH_LINES: int = 200         # write a batch once this many lines are pending
+    RUN_LOG_FLUSH_SECONDS: float = 2.0     # ...or once the oldest pending line is this old
+    RUN_LOG_TAIL_LINES: int = 50           # lines kept in automation_runs.log
+    RUN_LOG_PAGE_LINES: int = 1000         # max lines per GET .../logs response
+    RUN_LOG_POLL_SECONDS: float = 1.0      # follow mode poll interval
+
+    # Celery beat (DatabaseScheduler)
+    SCHEDULER_REFRESH_SECONDS: float = 5.0     # poll automations.updated_at this often
+    SCHEDULER_FULL_SYNC_SECONDS: float = 300.0  # id reconcile to pick up deleted automations
+    SCHEDULER_MODE: str = "single"             # "single" | "sharded" (several beat nodes)
+    SCHEDULER_NODE_ID: str = ""                # default host:pid
+    SCHEDULER_LEASE_BACKEND: str = "db"        # "db" | "redis" | "memory"
+    SCHEDULER_LEASE_TTL: float = 15.0          # seconds before a silent node's share moves
+
+    # Excel processing (excel_process)
+    EXCEL_STREAM_THRESHOLD_MB: int = 20    # files this large use the streaming engine
+    EXCEL_STREAM_CHUNK_ROWS: int = 50000   # rows per chunk / sort spill run
+    EXCEL_STREAM_UNIQUE_CAP: int = 100000  # stop counting distinct values past this
+    EXCEL_CACHE_ENABLED: bool = True       # Arrow IPC cache of parsed uploads (needs pyarrow)
+    EXCEL_CACHE_DIR: str = "./uploads/.columnar"
+    EXCEL_CACHE_MAX_MB: int = 2048         # least recently used files are evicted above this (0 = no cap)
+    EXCEL_CACHE_TTL_DAYS: int = 30         # files unused for this long are evicted (0 = never)
+
+    # Pipelines (automation type "pipeline")
+    PIPELINE_DIR: str = "./uploads/.pipelines"  # step outputs per run, CSV tables, resume state, final outputs
+    PIPELINE_MAX_PARALLEL: int = 4         # upper bound for config.max_parallel
+    PIPELINE_MAX_STEPS: int = 50
+    PIPELINE_RESUME_TTL_HOURS: float = 24.0  # a rerun reuses steps a failed run finished within this
+    PIPELINE_TABLE_TTL_HOURS: float = 24.0   # CSV copies of table artifacts unused this long are removed
+    PIPELINE_AI_INPUT_CHARS: int = 12000   # upstream data put into an ai_document prompt
+
+    # File uploads (excel_process inputs)
+    UPLOAD_DIR: str = "./uploads"
+    UPLOAD_MAX_BYTES: int = 536870912        # 512 MB; larger uploads get 413 before they are stored
+    UPLOAD_CHUNK_BYTES: int = 1048576        # disk write / hash granularity
+    UPLOAD_SESSION_TTL_HOURS: float = 24.0   # unfinished resumable uploads are removed after this
+    UPLOAD_LOCK_BACKEND: str = "db"          # "db" | "redis" | "memory" (single process): one writer per upload
+    UPLOAD_LOCK_TTL: float = 60.0            # seconds; renewed while a chunk is being written
+
+    # Out-of-row storage for large run results / document bodies
+    BLOB_BACKEND: str = "local"             # "local" | "s3" (S3-compatible, needs boto3)
+    BLOB_LOCAL_DIR: str = "./uploads/.blobs"
+    BLOB_COMPRESSION: str = "zstd"          # "zstd" (needs zstandard, else raw) | "none"
+    BLOB_INLINE_MAX_BYTES: int = 65536      # larger payloads leave the row
+    BLOB_DETAIL_MAX_BYTES: int = 2097152    # detail endpoints inline blobs up to this; beyond, use the download endpoint
+    BLOB_PREVIEW_CHARS: int = 200           # documents.output_content keeps this much of an out-of-row body
+    BLOB_S3_BUCKET: str = ""
+    BLOB_S3_PREFIX: str = "blobs/"
+    BLOB_S3_ENDPOINT_URL: str = ""          # e.g. http://minio:9000; empty = AWS
+    BLOB_S3_REGION: str = ""
+
+    # List endpoints (keyset pagination)
+    PAGE_DEFAULT_LIMIT: int = 50           # rows per page when ?limit= is not given
+    PAGE_MAX_LIMIT: int = 500
+
+    # Metrics / tracing (GET /metrics)
+    METRICS_WORKER_PORT: int = 9100        # Celery worker /metrics port (0 = off)
+    METRICS_CELERY_QUEUES: str = "celery,rpa.browser,rpa.cpu,rpa.llm"  # broker lists reported as queue depth (comma separated)
+    OTEL_ENABLED: bool = False             # OpenTelemetry spans on hot paths (needs opentelemetry-api)
+    OTEL_SERVICE_NAME: str = "baikal-rpa"
+
     # App
     APP_TITLE: str = "BAIKAL RPA AI"
     APP_VERSION: str = "0.1.0"
@@ -34,6 +210,10 @@ class Settings(BaseSettings):
     def cors_origin_list(self) -> List[str]:
         return json.loads(self.CORS_ORIGINS)
 
+    @property
+    def model_rpm_map(self) -> Dict[str, int]:
+        return json.loads(self.LLM_MODEL_RPM)
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,15 +1,177 @@
 """
-BAIKAL RPA AI – Database (async SQLAlchemy)
+BAIKAL RPA AI – Database (engine factory + async / sync sessions)
+
+Every engine in the code base comes from make_engine(role, ...), so pool
+limits are set in one place and are per process:
+
+  api      the FastAPI process: the async engine for requests (DB_POOL_SIZE +
+           DB_MAX_OVERFLOW), and a sync one for the local dispatcher / runner
+           threads (DB_WORKER_*)
+  worker   each Celery worker child and local runner process (DB_WORKER_*);
+           a run holds one session plus one for its log flusher
+  beat     celery beat with DatabaseScheduler (DB_BEAT_POOL_SIZE, no overflow)
+
+With N API workers and C Celery children, Postgres needs about
+N * (DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_WORKER_POOL_SIZE + DB_WORKER_MAX_OVERFLOW)
++ C * (DB_WORKER_POOL_SIZE + DB_WORKER_MAX_OVERFLOW) + DB_BEAT_POOL_SIZE connections
+below max_connections. A request that cannot get a connection waits up to
+DB_POOL_TIMEOUT and then fails, instead of opening one more.
+
+List and report endpoints take get_read_db. It uses DB_REPLICA_URL when set
+and the primary otherwise. Replication lag means a row written a moment ago
+may not be in those lists yet. Single-object reads (GET /automations/{id},
+a run, a file, a document and their downloads) stay on get_db: a client
+that just created the object would otherwise get a 404 from a lagging
+replica.
+
+pool_stats() reports checkout waits per engine (GET /health/db).
 """
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.core.config import settings
 
-# SQLite needs connect_args for async; PostgreSQL does not
-_connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True, connect_args=_connect_args)
+SLOW_CHECKOUT_SECONDS = 0.01
+
+
+class PoolStats:
+    """Checkout wait times of one engine's pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self.checkouts = 0
+        self.slow_checkouts = 0   # waited longer than SLOW_CHECKOUT_SECONDS
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if waited > SLOW_CHECKOUT_SECONDS:
+                self.slow_checkouts += 1
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self.pool
+        out = {
+            "checkouts": self.checkouts,
+            "slow_checkouts": self.slow_checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+        if isinstance(pool, QueuePool):
+            out.update(size=pool.size(), checked_out=pool.checkedout(), overflow=max(0, pool.overflow()),
+                       idle=pool.checkedin())
+        return out
+
+
+_pool_stats: Dict[str, PoolStats] = {}
+
+
+def _timed(pool_class, stats: PoolStats):
+    """Subclass of `pool_class` that times every checkout into `stats`."""
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                entry = super()._do_get()
+            except Exception:
+                stats.record(time.perf_counter() - started, timed_out=True)
+                raise
+            stats.record(time.perf_counter() - started)
+            return entry
+
+        def recreate(self):
+            new = super().recreate()
+            stats.pool = new
+            return new
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def sync_url(url: str) -> str:
+    """The blocking-driver form of an async DATABASE_URL."""
+    return url.replace("sqlite+aiosqlite", "sqlite").replace("postgresql+asyncpg", "postgresql+psycopg2")
+
+
+def _pool_limits(role: str, is_async: bool) -> Tuple[int, int]:
+    if role == "beat":
+        return settings.DB_BEAT_POOL_SIZE, 0
+    if role == "api" and is_async:
+        return settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    return settings.DB_WORKER_POOL_SIZE, settings.DB_WORKER_MAX_OVERFLOW
+
+
+def make_engine(role: str, url: Optional[str] = None, is_async: bool = True, name: Optional[str] = None):
+    """Engine for `role` ("api" | "worker" | "beat") with that role's pool limits."""
+    url = url or settings.DATABASE_URL
+    if not is_async:
+        url = sync_url(url)
+    name = name or f"{role}:{'async' if is_async else 'sync'}"
+    parsed = make_url(url)
+
+    kwargs: Dict[str, Any] = {"future": True}
+    connect_args: Dict[str, Any] = {}
+    if parsed.get_backend_name() == "sqlite":
+        connect_args["check_same_thread"] = False
+    if parsed.get_driver_name() == "asyncpg":
+        # 0 when going through PgBouncer in transaction mode
+        connect_args["statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+        connect_args["prepared_statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+    kwargs["connect_args"] = connect_args
+
+    stats = _pool_stats.setdefault(name, PoolStats(name))
+    pool_class = parsed.get_dialect(_is_async=is_async).get_pool_class(parsed)
+    kwargs["poolclass"] = _timed(pool_class, stats)
+    if issubclass(pool_class, QueuePool):
+        size, overflow = _pool_limits(role, is_async)
+        kwargs.update(pool_size=size, max_overflow=overflow, pool_timeout=settings.DB_POOL_TIMEOUT,
+                      pool_recycle=settings.DB_POOL_RECYCLE, pool_pre_ping=settings.DB_POOL_PRE_PING)
+
+    engine = create_async_engine(url, **kwargs) if is_async else create_engine(url, **kwargs)
+    stats.pool = engine.pool
+    return engine
+
+
+_sync_sessions: Dict[str, sessionmaker] = {}
+_sync_lock = threading.Lock()
+
+
+def sync_sessionmaker(role: str) -> sessionmaker:
+    """Process-wide sync sessionmaker for `role`; the engine is built on first use."""
+    with _sync_lock:
+        if role not in _sync_sessions:
+            _sync_sessions[role] = sessionmaker(bind=make_engine(role, is_async=False))
+        return _sync_sessions[role]
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: stats.snapshot() for name, stats in _pool_stats.items() if stats.pool is not None}
+
+
+engine = make_engine("api")
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+if settings.DB_REPLICA_URL:
+    read_engine = make_engine("api", settings.DB_REPLICA_URL, name="api:replica")
+    read_session = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+else:
+    read_engine, read_session = engine, async_session
+
 
 class Base(DeclarativeBase):
     pass
@@ -23,3 +185,9 @@ async def get_db() -> AsyncSession:  # type: ignore
         except Exception:
             await session.rollback()
             raise
+
+
+async def get_read_db() -> AsyncSession:  # type: ignore
+    """Session for read-only endpoints: the replica when DB_REPLICA_URL is set."""
+    async with read_session() as session:
+        yield session
@@ -0,0 +1,247 @@
+"""
+BAIKAL RPA AI – Prometheus 지표 + 선택적 OpenTelemetry 스팬
+
+GET /metrics serves everything below in the Prometheus text format:
+
+  baikal_http_request_duration_seconds{method,route,status}  per route template
+  baikal_http_request_db_queries{route}        queries issued by one request
+  baikal_http_request_db_seconds{route}        time spent in them
+  baikal_db_query_duration_seconds{statement}  every query, API and workers
+  baikal_llm_request_duration_seconds{provider,model,outcome}
+  baikal_llm_tokens_total{provider,model,kind}  kind = prompt | completion
+  baikal_browser_phase_duration_seconds{phase}  launch | goto | wait_for_selector | extract
+                                                 | http_get | http_extract (engine http)
+  baikal_browser_pool_acquire_total{outcome}    hit (warm browser) | miss (launched one)
+  baikal_browser_pool_recycles_total            browsers retired (page / memory limit, timeout)
+  baikal_browser_pool_pages_total               pages opened on pooled browsers
+  baikal_browser_pool_active_contexts           contexts in use now (summed over live processes)
+  baikal_excel_op_duration_seconds{op,engine}   per excel_process stage
+  baikal_automation_run_duration_seconds{type,status,runner}
+  baikal_automation_queue_depth{queue}          local run_queue + Celery broker lists
+
+Celery workers, and the local runner's process pool, live in other
+processes. Set PROMETHEUS_MULTIPROC_DIR (an empty directory per host) so
+their samples are merged; docker-entrypoint.sh empties it when a container
+starts, so files left by a previous run are not merged in. Celery workers additionally serve their own
+/metrics on METRICS_WORKER_PORT.
+
+With OTEL_ENABLED the same hot paths also open OpenTelemetry spans. They go
+to whatever TracerProvider is installed; if OTEL_EXPORTER_OTLP_ENDPOINT is
+set and the SDK plus OTLP exporter packages are present, one is installed
+here.
+"""
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Optional
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from app.core.config import settings
+
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0, 3600.0)
+
+HTTP_DURATION = Histogram("baikal_http_request_duration_seconds", "HTTP request latency (until the last body byte)",
+                          ["method", "route", "status"], buckets=FAST_BUCKETS + (10.0, 30.0, 60.0))
+REQUEST_DB_QUERIES = Histogram("baikal_http_request_db_queries", "Database queries issued by one request",
+                               ["route"], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+REQUEST_DB_SECONDS = Histogram("baikal_http_request_db_seconds", "Time one request spent in database queries",
+                               ["route"], buckets=FAST_BUCKETS)
+DB_QUERY = Histogram("baikal_db_query_duration_seconds", "Database query latency", ["statement"],
+                     buckets=FAST_BUCKETS)
+LLM_DURATION = Histogram("baikal_llm_request_duration_seconds", "LLM call latency (after queueing)",
+                         ["provider", "model", "outcome"], buckets=SLOW_BUCKETS)
+LLM_TOKENS = Counter("baikal_llm_tokens", "LLM tokens reported by the provider", ["provider", "model", "kind"])
+BROWSER_PHASE = Histogram("baikal_browser_phase_duration_seconds", "Playwright phase latency", ["phase"],
+                          buckets=SLOW_BUCKETS)
+BROWSER_POOL_ACQUIRE = Counter("baikal_browser_pool_acquire", "Browser pool runs by whether the browser was warm",
+                               ["outcome"])
+BROWSER_POOL_RECYCLES = Counter("baikal_browser_pool_recycles", "Pooled browsers retired")
+BROWSER_POOL_PAGES = Counter("baikal_browser_pool_pages", "Pages opened on pooled browsers")
+BROWSER_POOL_ACTIVE = Gauge("baikal_browser_pool_active_contexts", "Browser contexts in use",
+                            multiprocess_mode="livesum")
+EXCEL_OP = Histogram("baikal_excel_op_duration_seconds", "excel_process stage latency", ["op", "engine"],
+                     buckets=SLOW_BUCKETS)
+RUN_DURATION = Histogram("baikal_automation_run_duration_seconds", "Automation run duration",
+                         ["type", "status", "runner"], buckets=SLOW_BUCKETS)
+
+# (queries, seconds) of the current HTTP request; a list so DB hooks can add to it in place
+_request_db: ContextVar[Optional[list]] = ContextVar("request_db", default=None)
+_tracer = None
+
+
+# ---------- tracing ----------
+def _get_tracer():
+    global _tracer
+    if _tracer is None:
+        from opentelemetry import trace
+        if os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT"):
+            try:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor
+                provider = TracerProvider(resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}))
+                provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+                trace.set_tracer_provider(provider)
+            except ImportError:
+                pass  # API only: spans go to whatever provider the process installed
+        _tracer = trace.get_tracer("baikal-rpa")
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """OpenTelemetry span when OTEL_ENABLED (and the package is installed); otherwise a no-op."""
+    if not settings.OTEL_ENABLED:
+        return nullcontext()
+    try:
+        tracer = _get_tracer()
+    except ImportError:
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes={k: str(v) for k, v in attributes.items()})
+
+
+@contextmanager
+def timed(histogram: Histogram, span_name: str, **labels):
+    """Observe the block's duration in `histogram` and wrap it in a span."""
+    started = time.perf_counter()
+    with span(span_name, **labels):
+        try:
+            yield
+        finally:
+            histogram.labels(**labels).observe(time.perf_counter() - started)
+
+
+# ---------- recorders used by the integrations / runners ----------
+def record_llm_tokens(provider: str, model: str, prompt: Optional[int], completion: Optional[int]):
+    if prompt:
+        LLM_TOKENS.labels(provider, model, "prompt").inc(prompt)
+    if completion:
+        LLM_TOKENS.labels(provider, model, "completion").inc(completion)
+
+
+def observe_run(auto_type: str, status: str, runner: str, started_at, finished_at):
+    if started_at is not None and finished_at is not None:
+        # Both UTC; SQLite hands them back naive
+        elapsed = finished_at.replace(tzinfo=None) - started_at.replace(tzinfo=None)
+        RUN_DURATION.labels(auto_type, status, runner).observe(elapsed.total_seconds())
+
+
+# ---------- database ----------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("query_started")
+    if not stack:
+        return
+    elapsed = time.perf_counter() - stack.pop()
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    DB_QUERY.labels(verb if verb in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER").observe(elapsed)
+    current = _request_db.get()
+    if current is not None:
+        current[0] += 1
+        current[1] += elapsed
+
+
+def install_db_hooks():
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------- HTTP ----------
+class MetricsMiddleware:
+    """ASGI middleware: latency and DB usage per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        db = [0, 0.0]
+        token = _request_db.set(db)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_db.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_DURATION.labels(scope["method"], path, str(status["code"])).observe(time.perf_counter() - started)
+            REQUEST_DB_QUERIES.labels(path).observe(db[0])
+            REQUEST_DB_SECONDS.labels(path).observe(db[1])
+
+
+# ---------- queue depth (computed at scrape time) ----------
+class QueueDepthCollector:
+    def collect(self):
+        gauge = GaugeMetricFamily("baikal_automation_queue_depth", "Runs waiting to start", labels=["queue"])
+        try:
+            from app.workers.dispatcher import get_dispatcher
+            gauge.add_metric(["local"], get_dispatcher().stats()["queued"])
+        except Exception:
+            pass  # database unreachable: leave the sample out
+        queues = [q.strip() for q in settings.METRICS_CELERY_QUEUES.split(",") if q.strip()]
+        if queues:
+            try:
+                import redis
+                client = redis.from_url(settings.REDIS_URL, socket_timeout=1)
+                for queue in queues:
+                    gauge.add_metric([queue], client.llen(queue))
+            except Exception:
+                pass  # broker unreachable
+        yield gauge
+
+
+def registry() -> CollectorRegistry:
+    """Registry to serve: the multiprocess view when PROMETHEUS_MULTIPROC_DIR is set."""
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    from prometheus_client import multiprocess
+    merged = CollectorRegistry()
+    multiprocess.MultiProcessCollector(merged)
+    return merged
+
+
+_queue_collector_registered = False
+
+
+def render(with_queue_depth: bool = True) -> bytes:
+    global _queue_collector_registered
+    target = registry()
+    if target is REGISTRY:
+        if with_queue_depth and not _queue_collector_registered:
+            REGISTRY.register(QueueDepthCollector())
+            _queue_collector_registered = True
+        return generate_latest(REGISTRY)
+    if with_queue_depth:
+        target.register(QueueDepthCollector())
+    return generate_latest(target)
+
+
+def start_worker_server(port: int):
+    """/metrics for a Celery worker (samples of all its child processes)."""
+    from prometheus_client import start_http_server
+    start_http_server(port, registry=registry())
+
+
+def mark_process_dead(pid: int):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,86 @@
+"""
+BAIKAL RPA AI – Keyset (cursor) pagination + field projection for list endpoints
+
+Lists are ordered by (sort column DESC, id DESC). The cursor is the last
+row's (sort value, id), and the next page starts right after it, so every
+page is one index range scan on the composite indexes in db/init.sql. There
+is no OFFSET and no COUNT(*). Rows that have no sort value yet (e.g. runs
+that have not started) come first, as PostgreSQL orders NULLs in DESC.
+
+The opaque cursor for the next page is sent in the X-Next-Cursor response
+header (absent on the last page), so list bodies stay plain JSON arrays.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, or_, select
+from app.core.config import settings
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Optional[datetime], row_id: str) -> str:
+    raw = json.dumps([sort_value.isoformat() if sort_value else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return (datetime.fromisoformat(sort_value) if sort_value else None), str(row_id)
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
+
+def page_limit(limit: int) -> int:
+    return max(1, min(limit or settings.PAGE_DEFAULT_LIMIT, settings.PAGE_MAX_LIMIT))
+
+
+def parse_fields(fields: Optional[str], model, allowed: Sequence[str], always: Sequence[str]) -> Optional[List[Any]]:
+    """`fields=a,b` → the model columns to select (plus `always`), or None for the summary model."""
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [n for n in names if n not in allowed]
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+    names = list(always) + [n for n in names if n not in always]
+    return [getattr(model, n) for n in names]
+
+
+async def keyset_page(db, columns: Sequence[Any], where: Sequence[Any], sort_col, id_col,
+                      cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """SELECT `columns` for one page; returns (rows as dicts, next cursor or None).
+
+    `columns` must include sort_col and id_col so the cursor can be built.
+    """
+    stmt = select(*columns).where(*where)
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        if sort_value is None:
+            stmt = stmt.where(or_(and_(sort_col.is_(None), id_col < row_id), sort_col.is_not(None)))
+        else:
+            stmt = stmt.where(or_(sort_col < sort_value, and_(sort_col == sort_value, id_col < row_id)))
+    stmt = stmt.order_by(sort_col.desc().nulls_first(), id_col.desc()).limit(limit + 1)
+
+    rows = [dict(r) for r in (await db.execute(stmt)).mappings().all()]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1][sort_col.key], rows[-1][id_col.key])
+
+
+def set_cursor(response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[CURSOR_HEADER] = next_cursor
+
+
+def projected_response(rows: List[Dict[str, Any]], next_cursor: Optional[str]) -> JSONResponse:
+    """Response for a `fields=` projection, which bypasses the summary response_model."""
+    headers = {CURSOR_HEADER: next_cursor} if next_cursor else {}
+    return JSONResponse(jsonable_encoder(rows), headers=headers)
@@ -0,0 +1,212 @@
+"""
+BAIKAL RPA AI – Password service (bcrypt off the event loop + login throttling)
+
+One bcrypt call at cost 12 takes ~250 ms of CPU. Run inline in an async
+handler, it stalls every other request on the worker. Hashing and
+verification here go through a bounded pool instead:
+
+  PASSWORD_HASH_POOL     "thread" (default; bcrypt releases the GIL) |
+                         "process" | "inline" (blocks the loop; benchmarks only)
+  PASSWORD_HASH_WORKERS  pool size: at most this many hashes use CPU at once
+  PASSWORD_HASH_MAX_PENDING  queued + running hashes before new ones get 503,
+                         so a login storm cannot build an unbounded backlog
+
+Attempts are throttled before any hashing (token buckets, 429 with
+Retry-After when empty):
+
+  login     LOGIN_RATE_PER_MINUTE per email + client IP, so users behind
+            one address do not share a budget; LOGIN_IP_RATE_PER_MINUTE
+            per client IP over all emails caps password spraying
+  register  REGISTER_RATE_PER_MINUTE per client IP, a bucket of its own
+
+The client IP is the peer address, unless the peer is in TRUSTED_PROXIES
+(Vite dev proxy, nginx, the Docker network): then X-Forwarded-For is read
+from the right, skipping trusted hops, and the first other address is the
+client. Headers from untrusted peers are ignored, so they cannot be spoofed.
+
+Hashes are made at PASSWORD_BCRYPT_ROUNDS. A successful login whose stored
+hash used another cost (or scheme) returns a fresh hash, and the caller
+saves it, so changing the cost migrates users as they log in.
+"""
+import asyncio
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, Request
+from passlib.context import CryptContext
+from app.core.config import settings
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    # Pinning min = max makes any other cost "needs update" → rehash on login
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    # Verified against when the email is unknown, so both paths cost one bcrypt call
+    return pwd_context.hash("baikal-dummy-password")
+
+
+# Module-level so the process pool can pickle them
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+    if hashed is None:
+        pwd_context.verify(password, _dummy_hash())
+        return False, None
+    return pwd_context.verify_and_update(password, hashed)
+
+
+class PasswordService:
+    def __init__(self, mode: str, workers: int, max_pending: int):
+        self.mode = mode
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+        if mode == "process":
+            import multiprocessing
+            self._executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        elif mode != "inline":
+            self._executor = ThreadPoolExecutor(workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(503, "Too many logins in progress, retry shortly", headers={"Retry-After": "1"})
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """(matches, new hash to store or None). `hashed=None` (unknown user) never matches."""
+        return await self._run(_verify_and_update, password, hashed)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "pending": self.pending, "rejected": self.rejected}
+
+
+class LoginThrottle:
+    """Per-key token bucket: `rate` attempts per minute, up to `burst` at once."""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 100_000,
+                 detail: str = "Too many login attempts"):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.detail = detail
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key → (tokens, updated)
+        self._lock = threading.Lock()
+
+    def check(self, key: str):
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1.0
+            self._buckets[key] = (tokens - 1.0 if allowed else tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        if not allowed:
+            retry_after = math.ceil((1.0 - tokens) / self.rate)
+            raise HTTPException(429, self.detail, headers={"Retry-After": str(retry_after)})
+
+
+@lru_cache(maxsize=1)
+def _trusted_proxies() -> tuple:
+    return tuple(ipaddress.ip_network(p.strip(), strict=False)
+                 for p in settings.TRUSTED_PROXIES.split(",") if p.strip())
+
+
+def _trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in net for net in _trusted_proxies())
+
+
+def client_ip(request: Request) -> str:
+    """The caller's address, looking through X-Forwarded-For set by trusted proxies only."""
+    peer = request.client.host if request.client else "-"
+    if not _trusted(peer):
+        return peer
+    hops = [h.strip() for h in ",".join(request.headers.getlist("x-forwarded-for")).split(",") if h.strip()]
+    for hop in reversed(hops):
+        if not _trusted(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+_service: Optional[PasswordService] = None
+_throttles: Dict[str, LoginThrottle] = {}
+_lock = threading.Lock()
+
+
+def get_password_service() -> PasswordService:
+    global _service
+    with _lock:
+        if _service is None:
+            _service = PasswordService(settings.PASSWORD_HASH_POOL.lower(), settings.PASSWORD_HASH_WORKERS,
+                                       settings.PASSWORD_HASH_MAX_PENDING)
+        return _service
+
+
+def get_throttle(name: str) -> LoginThrottle:
+    """Bucket set by name: "login" (email + IP), "login_ip" (IP) or "register" (IP)."""
+    with _lock:
+        if name not in _throttles:
+            if name == "login":
+                throttle = LoginThrottle(settings.LOGIN_RATE_PER_MINUTE, settings.LOGIN_RATE_BURST)
+            elif name == "login_ip":
+                throttle = LoginThrottle(settings.LOGIN_IP_RATE_PER_MINUTE, settings.LOGIN_IP_RATE_BURST)
+            elif name == "register":
+                throttle = LoginThrottle(settings.REGISTER_RATE_PER_MINUTE, settings.REGISTER_RATE_BURST,
+                                         detail="Too many sign-ups")
+            else:
+                raise ValueError(f"unknown throttle {name!r}")
+            _throttles[name] = throttle
+        return _throttles[name]
+
+
+def check_login_rate(request: Request, email: str):
+    ip = client_ip(request)
+    get_throttle("login").check(f"{ip}|{email.strip().lower()}")
+    get_throttle("login_ip").check(ip)
+
+
+def check_register_rate(request: Request):
+    get_throttle("register").check(client_ip(request))
+
+
+def shutdown_password_service():
+    global _service
+    with _lock:
+        if _service is not None:
+            _service.shutdown()
+            _service = None
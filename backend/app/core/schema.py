@@ -0,0 +1,87 @@
+"""
+Schema Upgrade – 기존 DB에 새 컬럼/인덱스 추가 (시작 시 1회, 멱등)
+
+Base.metadata.create_all only creates missing tables, so a database created
+from an older init.sql or model set lacks the columns added to existing
+tables since (automations.updated_at, automation_runs.result_ref, ...).
+The first ORM query selecting one of them would then fail.
+
+upgrade_schema runs right after create_all at API startup. For every table
+that already exists it:
+
+  - adds each missing column (always as NULL-able; a column with unique=True
+    gets a separate unique index, which SQLite's ADD COLUMN cannot carry)
+  - backfills updated_at from created_at
+  - creates indexes that are missing, by name or by columns
+    (CREATE INDEX ... IF NOT EXISTS)
+  - on PostgreSQL, installs the automations.updated_at trigger from init.sql
+
+Every step checks the live schema first, so running it again is a no-op.
+Type changes and dropped columns are not handled; those still need a
+hand-written migration.
+"""
+from typing import List
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex
+from app.core.db import Base
+
+TOUCH_TRIGGERS = ("automations",)  # tables whose updated_at is kept by a trigger on PostgreSQL
+
+
+def upgrade_schema(conn: Connection) -> List[str]:
+    """Bring existing tables up to the models; returns the statements it ran."""
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    preparer = conn.dialect.identifier_preparer
+    done: List[str] = []
+
+    def run(sql: str):
+        conn.execute(text(sql))
+        done.append(sql)
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue  # just created by create_all, complete already
+        have = {c["name"] for c in inspector.get_columns(table.name)}
+        table_name = preparer.format_table(table)
+        for column in table.columns:
+            if column.name in have:
+                continue
+            col_type = column.type.compile(dialect=conn.dialect)
+            run(f"ALTER TABLE {table_name} ADD COLUMN {preparer.format_column(column)} {col_type}")
+            if column.unique:
+                run(f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{table.name}_{column.name} "
+                    f"ON {table_name} ({preparer.format_column(column)})")
+            if column.name == "updated_at" and "created_at" in have:
+                run(f"UPDATE {table_name} SET updated_at = created_at WHERE updated_at IS NULL")
+
+        # init.sql names some indexes differently; the same columns count as present
+        have_indexes = inspector.get_indexes(table.name)
+        names = {ix["name"] for ix in have_indexes}
+        covered = {tuple(ix["column_names"]) for ix in have_indexes}
+        for index in table.indexes:
+            columns = tuple(getattr(e, "element", e).name for e in index.expressions)
+            if index.name not in names and columns not in covered:
+                run(str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect)))
+
+    if conn.dialect.name == "postgresql":
+        _install_touch_triggers(conn, existing, run)
+    return done
+
+
+def _install_touch_triggers(conn: Connection, existing: set, run):
+    run("""CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql""")
+    for table in TOUCH_TRIGGERS:
+        trigger = f"trg_{table}_updated"
+        found = conn.execute(
+            text("SELECT 1 FROM pg_trigger WHERE tgname = :name AND NOT tgisinternal"), {"name": trigger}
+        ).first()
+        if found is None:
+            run(f"CREATE TRIGGER {trigger} BEFORE UPDATE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION touch_updated_at()")
@@ -4,18 +4,18 @@ BAIKAL RPA AI – Security helpers (JWT + password)
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.config import settings
 from app.core.db import get_db
+from app.core.passwords import pwd_context
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+# Blocking (~250 ms). Request handlers use app.core.passwords.get_password_service()
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -39,13 +39,21 @@ def decode_token(token: str) -> dict:
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
-    payload = decode_token(token)
-    user_id: str = payload.get("sub")
+    from app.core.auth_cache import get_auth_cache
+    from app.modules.auth.models import User
+
+    cache = get_auth_cache()
+    user_id = cache.verified_user_id(token) if cache else decode_token(token).get("sub")
     if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid token")
-    from app.modules.auth.models import User
+    if cache:
+        row = await cache.get_user(user_id)
+        if row is not None:
+            return User(**row)  # detached; endpoints only read it
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
+    if cache:
+        await cache.put_user(user)
     return user
@@ -0,0 +1,14 @@
+"""
+BAIKAL RPA AI – Server-Sent Events helpers
+"""
+import json
+from typing import Any, Optional
+
+# Keep proxies / load balancers from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {payload}\n\n"
@@ -1,8 +1,10 @@
 """
 AI Adapter – .env 의 AI_PROVIDER 값에 따라 OpenAI / Ollama 자동 전환
+
+Provider choice, failover and model selection live in llm_routing.
 """
-from typing import List
-from app.core.config import settings
+from typing import AsyncIterator, List
+from app.integrations.ai_cache import get_ai_cache
 
 SYSTEM_PROMPT = (
     "당신은 BAIKAL RPA AI 업무 도우미입니다. "
@@ -17,32 +19,101 @@ DOC_SYSTEM_PROMPTS = {
 }
 
 
-async def _call(messages: list[dict]) -> str:
-    provider = settings.AI_PROVIDER.lower()
-    if provider == "ollama":
-        from app.integrations.ollama_client import ollama_chat
-        return await ollama_chat(messages)
-    else:
-        from app.integrations.openai_client import openai_chat
-        return await openai_chat(messages)
+def check_capacity():
+    """Raise ProviderSaturated up front, before a streaming response has started.
+
+    Only when every provider in the failover order is saturated.
+    """
+    from app.integrations.llm_routing import check_capacity as _check
+    _check()
+
+
+async def _call(messages: list[dict], task: str = "chat", cache_namespace: str | None = None) -> str:
+    cache = get_ai_cache() if cache_namespace else None
+    if cache is not None:
+        hit, ctx = await cache.lookup(cache_namespace, messages)
+        if hit is not None:
+            return hit
+
+    from app.integrations.llm_routing import route_chat
+    reply = await route_chat(messages, task)
+
+    if cache is not None:
+        await cache.store(ctx, reply)
+    return reply
+
+
+async def _stream(messages: list[dict], task: str = "chat", cache_namespace: str | None = None) -> AsyncIterator[str]:
+    cache = get_ai_cache() if cache_namespace else None
+    if cache is not None:
+        hit, ctx = await cache.lookup(cache_namespace, messages)
+        if hit is not None:
+            yield hit
+            return
+
+    from app.integrations.llm_routing import route_stream
+    parts = []
+    async for delta in route_stream(messages, task):
+        parts.append(delta)
+        yield delta
+
+    # Only completed generations are cached
+    if cache is not None:
+        await cache.store(ctx, "".join(parts))
+
+
+async def embed(text: str) -> list[float]:
+    from app.integrations.llm_routing import route_embed
+    return await route_embed(text)
 
 
-async def ai_chat(message: str, history: list | None = None) -> str:
+def _chat_messages(message: str, history: list | None, summary: str = "") -> list[dict]:
     messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if summary:
+        messages.append({"role": "system", "content": f"지금까지의 대화 요약:\n{summary}"})
     if history:
         for h in history:
             messages.append({"role": h.role, "content": h.content})
     messages.append({"role": "user", "content": message})
-    return await _call(messages)
+    return messages
 
 
-async def ai_generate_document(doc_type: str, title: str, content_prompt: str) -> str:
+def _document_messages(doc_type: str, title: str, content_prompt: str) -> list[dict]:
     system = DOC_SYSTEM_PROMPTS.get(doc_type, SYSTEM_PROMPT)
-    messages = [
+    return [
         {"role": "system", "content": system},
         {
             "role": "user",
             "content": f"제목: {title}\n\n다음 내용을 바탕으로 {doc_type} 문서를 작성해주세요:\n{content_prompt}",
         },
     ]
-    return await _call(messages)
+
+
+async def ai_chat(message: str, history: list | None = None, summary: str = "") -> str:
+    return await _call(_chat_messages(message, history, summary), task="chat")
+
+
+def ai_chat_stream(message: str, history: list | None = None, summary: str = "") -> AsyncIterator[str]:
+    return _stream(_chat_messages(message, history, summary), task="chat")
+
+
+async def ai_summarize_history(previous_summary: str, turns: list, max_tokens: int) -> str:
+    """Fold older chat turns into the rolling conversation summary."""
+    transcript = "\n".join(f"{t.role}: {t.content}" for t in turns)
+    prompt = (
+        f"기존 요약:\n{previous_summary or '(없음)'}\n\n추가 대화:\n{transcript}\n\n"
+        f"기존 요약과 추가 대화를 합쳐 약 {max_tokens} 토큰 이내의 한국어 요약으로 갱신하세요. "
+        "사용자의 요청, 결정된 사항, 이후 답변에 필요한 사실만 남기세요."
+    )
+    return await _call(
+        [{"role": "system", "content": "당신은 대화 내용을 간결하게 요약하는 AI입니다."}, {"role": "user", "content": prompt}],
+        task="chat",
+    )
+
+
+async def ai_generate_document(doc_type: str, title: str, content_prompt: str) -> str:
+    return await _call(_document_messages(doc_type, title, content_prompt), task="document", cache_namespace=f"doc:{doc_type}")
+
+
+def ai_generate_document_stream(doc_type: str, title: str, content_prompt: str) -> AsyncIterator[str]:
+    return _stream(_document_messages(doc_type, title, content_prompt), task="document", cache_namespace=f"doc:{doc_type}")
@@ -0,0 +1,240 @@
+"""
+AI Cache – LLM 응답 캐시 (정확 일치 + 선택적 유사도 검색)
+
+Sits in front of ai_adapter._call for requests that opt in with a namespace
+(document generation uses "doc:<doc_type>").
+
+  - exact match : sha256 of the messages with whitespace normalised
+  - similarity  : optional; cosine similarity of the prompt embedding against
+                  entries in the same namespace (AI_CACHE_SEMANTIC,
+                  AI_CACHE_SIMILARITY_THRESHOLD)
+
+Entries expire after AI_CACHE_TTL_SECONDS and the least recently used ones
+are evicted past AI_CACHE_MAX_ENTRIES. Backend is SQLite (default, a local
+file) or Redis (AI_CACHE_BACKEND=redis) when several API workers should share it.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+_WS = re.compile(r"\s+")
+
+
+def cache_key(messages: List[Dict[str, str]]) -> str:
+    norm = [{"role": m["role"], "content": _WS.sub(" ", m["content"]).strip()} for m in messages]
+    return hashlib.sha256(json.dumps(norm, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+class SQLiteCacheBackend:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS ai_cache (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                response TEXT NOT NULL,
+                embedding TEXT,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_cache_lru ON ai_cache(last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_cache_ns ON ai_cache(namespace)")
+        self._conn.commit()
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM ai_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] + settings.AI_CACHE_TTL_SECONDS < now:
+                self._conn.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE ai_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def _nearest(self, namespace: str, embedding: List[float]) -> Optional[Tuple[str, float]]:
+        cutoff = time.time() - settings.AI_CACHE_TTL_SECONDS
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, embedding FROM ai_cache WHERE namespace = ? AND embedding IS NOT NULL AND created_at >= ?",
+                (namespace, cutoff),
+            ).fetchall()
+        best = None
+        for key, emb in rows:
+            score = cosine(embedding, json.loads(emb))
+            if best is None or score > best[1]:
+                best = (key, score)
+        return best
+
+    def _set(self, key: str, namespace: str, response: str, embedding: Optional[List[float]]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ai_cache (key, namespace, response, embedding, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, response, json.dumps(embedding) if embedding else None, now, now),
+            )
+            # Expired rows first, then least recently used beyond the cap
+            self._conn.execute("DELETE FROM ai_cache WHERE created_at < ?", (now - settings.AI_CACHE_TTL_SECONDS,))
+            self._conn.execute(
+                "DELETE FROM ai_cache WHERE key IN ("
+                " SELECT key FROM ai_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (settings.AI_CACHE_MAX_ENTRIES,),
+            )
+            self._conn.commit()
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def nearest(self, namespace: str, embedding: List[float]) -> Optional[Tuple[str, float]]:
+        return await asyncio.to_thread(self._nearest, namespace, embedding)
+
+    async def set(self, key: str, namespace: str, response: str, embedding: Optional[List[float]]):
+        await asyncio.to_thread(self._set, key, namespace, response, embedding)
+
+
+class RedisCacheBackend:
+    PREFIX = "aicache"
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._redis.get(f"{self.PREFIX}:v:{key}")
+        if value is not None:
+            await self._redis.zadd(f"{self.PREFIX}:lru", {key: time.time()})
+        return value
+
+    async def nearest(self, namespace: str, embedding: List[float]) -> Optional[Tuple[str, float]]:
+        entries = await self._redis.hgetall(f"{self.PREFIX}:emb:{namespace}")
+        best = None
+        for key, emb in entries.items():
+            score = cosine(embedding, json.loads(emb))
+            if best is None or score > best[1]:
+                best = (key, score)
+        return best
+
+    async def set(self, key: str, namespace: str, response: str, embedding: Optional[List[float]]):
+        pipe = self._redis.pipeline()
+        pipe.set(f"{self.PREFIX}:v:{key}", response, ex=settings.AI_CACHE_TTL_SECONDS)
+        pipe.set(f"{self.PREFIX}:ns:{key}", namespace, ex=settings.AI_CACHE_TTL_SECONDS)
+        pipe.zadd(f"{self.PREFIX}:lru", {key: time.time()})
+        if embedding:
+            pipe.hset(f"{self.PREFIX}:emb:{namespace}", key, json.dumps(embedding))
+        await pipe.execute()
+        await self._evict()
+
+    async def _evict(self):
+        lru = f"{self.PREFIX}:lru"
+        # Drop LRU entries past the cap, plus members whose value already expired
+        overflow = await self._redis.zcard(lru) - settings.AI_CACHE_MAX_ENTRIES
+        victims = [k for k, _ in await self._redis.zpopmin(lru, overflow)] if overflow > 0 else []
+        oldest = await self._redis.zrange(lru, 0, 49)
+        if oldest:
+            alive = await self._redis.mget([f"{self.PREFIX}:v:{k}" for k in oldest])
+            expired = [k for k, v in zip(oldest, alive) if v is None]
+            if expired:
+                await self._redis.zrem(lru, *expired)
+                victims.extend(expired)
+        for key in victims:
+            namespace = await self._redis.get(f"{self.PREFIX}:ns:{key}")
+            if namespace:
+                await self._redis.hdel(f"{self.PREFIX}:emb:{namespace}", key)
+            await self._redis.delete(f"{self.PREFIX}:v:{key}", f"{self.PREFIX}:ns:{key}")
+
+
+class AICache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def lookup(self, namespace: str, messages: List[Dict[str, str]]) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Return (cached response or None, lookup context to pass to store())."""
+        ctx: Dict[str, Any] = {"key": cache_key(messages), "namespace": namespace, "embedding": None}
+        try:
+            hit = await self.backend.get(ctx["key"])
+            if hit is not None:
+                self.exact_hits += 1
+                return hit, ctx
+            if settings.AI_CACHE_SEMANTIC:
+                from app.integrations.ai_adapter import embed
+                ctx["embedding"] = await embed(_prompt_text(messages))
+                nearest = await self.backend.nearest(namespace, ctx["embedding"])
+                if nearest and nearest[1] >= settings.AI_CACHE_SIMILARITY_THRESHOLD:
+                    hit = await self.backend.get(nearest[0])
+                    if hit is not None:
+                        self.semantic_hits += 1
+                        return hit, ctx
+        except Exception:
+            # A broken cache must never fail the request
+            self.errors += 1
+        self.misses += 1
+        return None, ctx
+
+    async def store(self, ctx: Dict[str, Any], response: str):
+        if not response:
+            return
+        try:
+            await self.backend.set(ctx["key"], ctx["namespace"], response, ctx["embedding"])
+        except Exception:
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.semantic_hits
+        total = hits + self.misses
+        return {
+            "backend": settings.AI_CACHE_BACKEND,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+def _prompt_text(messages: List[Dict[str, str]]) -> str:
+    return "\n".join(m["content"] for m in messages if m["role"] != "system")
+
+
+_cache: Optional[AICache] = None
+_cache_lock = threading.Lock()
+
+
+def get_ai_cache() -> Optional[AICache]:
+    global _cache
+    if not settings.AI_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            if settings.AI_CACHE_BACKEND.lower() == "redis":
+                backend = RedisCacheBackend(settings.REDIS_URL)
+            else:
+                backend = SQLiteCacheBackend(settings.AI_CACHE_SQLITE_PATH)
+            _cache = AICache(backend)
+        return _cache
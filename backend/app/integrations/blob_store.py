@@ -0,0 +1,252 @@
+"""
+Blob Store – 큰 실행 결과 / 문서 본문을 테이블 밖(콘텐츠 주소 저장소)에 보관
+
+Run results (automation_runs.result_payload) and document bodies
+(documents.output_content) larger than BLOB_INLINE_MAX_BYTES go here. The
+row keeps only a reference and the byte size, so scans, ownership checks
+and backups of the hot tables stay small as scrape volume grows.
+
+  ref      sha256 of the uncompressed bytes, plus ".zst" when stored
+           compressed. Identical payloads are stored once.
+  local    files under BLOB_LOCAL_DIR/ab/cd/<ref> (default backend; it also
+           stands in for S3 in development)
+  s3       any S3-compatible service (AWS, MinIO, ...) with BLOB_BACKEND=s3;
+           needs boto3, credentials come from the usual AWS_* variables
+
+Compression is zstd (BLOB_COMPRESSION=zstd, needs the zstandard package) and
+falls back to storing raw bytes when the package is missing. Raw blobs serve
+byte ranges with a seek (or an S3 ranged GET); compressed ones are
+decompressed as a stream up to the range.
+
+Blobs are never deleted together with rows. A ref can be shared by several
+rows, and dangling blobs are cheap compared with a row pointing at nothing.
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from typing import Any, Iterator, Optional, Tuple
+from app.core.config import settings
+
+CHUNK = 64 * 1024
+ZSTD_SUFFIX = ".zst"
+
+
+def _zstd():
+    if settings.BLOB_COMPRESSION.lower() != "zstd":
+        return None
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def _encode(data: bytes) -> Tuple[str, bytes]:
+    """(ref, stored bytes) for `data`."""
+    digest = hashlib.sha256(data).hexdigest()
+    zstd = _zstd()
+    if zstd is None:
+        return digest, data
+    return digest + ZSTD_SUFFIX, zstd.ZstdCompressor(level=3).compress(data)
+
+
+def _slice_stream(chunks: Iterator[bytes], start: int, end: int) -> Iterator[bytes]:
+    """Bytes [start, end] (inclusive) of a chunk stream."""
+    pos = 0
+    for chunk in chunks:
+        chunk_end = pos + len(chunk)
+        if chunk_end > start:
+            yield chunk[max(0, start - pos):end + 1 - pos]
+        pos = chunk_end
+        if pos > end:
+            return
+
+
+def _decompressed(raw: Iterator[bytes]) -> Iterator[bytes]:
+    decompressor = _require_zstd().ZstdDecompressor().decompressobj()
+    for chunk in raw:
+        out = decompressor.decompress(chunk)
+        if out:
+            yield out
+
+
+def _require_zstd():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise RuntimeError("zstandard is required to read compressed blobs (pip install zstandard)")
+
+
+class LocalBlobStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, ref: str) -> str:
+        return os.path.join(self.root, ref[:2], ref[2:4], ref)
+
+    def put(self, data: bytes) -> str:
+        ref, stored = _encode(data)
+        path = self._path(ref)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(stored)
+            os.replace(tmp_path, path)
+        return ref
+
+    def _raw(self, ref: str, start: int = 0) -> Iterator[bytes]:
+        with open(self._path(ref), "rb") as f:
+            f.seek(start)
+            for chunk in iter(lambda: f.read(CHUNK), b""):
+                yield chunk
+
+    def iter_range(self, ref: str, start: int, end: int) -> Iterator[bytes]:
+        if ref.endswith(ZSTD_SUFFIX):
+            return _slice_stream(_decompressed(self._raw(ref)), start, end)
+        return _slice_stream(self._raw(ref, start), 0, end - start)
+
+
+class S3BlobStore:
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str = "", region: str = ""):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix
+        self._s3 = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None)
+
+    def _key(self, ref: str) -> str:
+        return f"{self.prefix}{ref[:2]}/{ref}"
+
+    def put(self, data: bytes) -> str:
+        ref, stored = _encode(data)
+        from botocore.exceptions import ClientError
+        try:
+            self._s3.head_object(Bucket=self.bucket, Key=self._key(ref))
+        except ClientError as e:
+            # Only "not there" means upload; auth / throttling errors must surface
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                raise
+            self._s3.put_object(Bucket=self.bucket, Key=self._key(ref), Body=stored)
+        return ref
+
+    def iter_range(self, ref: str, start: int, end: int) -> Iterator[bytes]:
+        if ref.endswith(ZSTD_SUFFIX):
+            body = self._s3.get_object(Bucket=self.bucket, Key=self._key(ref))["Body"]
+            return _slice_stream(_decompressed(body.iter_chunks(CHUNK)), start, end)
+        body = self._s3.get_object(Bucket=self.bucket, Key=self._key(ref), Range=f"bytes={start}-{end}")["Body"]
+        return body.iter_chunks(CHUNK)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            if settings.BLOB_BACKEND.lower() == "s3":
+                _store = S3BlobStore(settings.BLOB_S3_BUCKET, settings.BLOB_S3_PREFIX,
+                                     settings.BLOB_S3_ENDPOINT_URL, settings.BLOB_S3_REGION)
+            else:
+                _store = LocalBlobStore(settings.BLOB_LOCAL_DIR)
+        return _store
+
+
+def read_blob(ref: str, size: int) -> bytes:
+    return b"".join(get_blob_store().iter_range(ref, 0, size - 1)) if size else b""
+
+
+# ---------- row helpers (sync; call through asyncio.to_thread from async code) ----------
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def assign_run_result(run, result: Optional[dict]):
+    """Set run.result_payload, moving it out of row when it is large."""
+    data = _json_bytes(result) if result is not None else b""
+    if len(data) > settings.BLOB_INLINE_MAX_BYTES:
+        run.result_payload, run.result_ref, run.result_size = None, get_blob_store().put(data), len(data)
+    else:
+        run.result_payload, run.result_ref, run.result_size = result, None, None
+
+
+def run_result_bytes(run) -> bytes:
+    if run.result_ref:
+        return read_blob(run.result_ref, run.result_size)
+    return _json_bytes(run.result_payload) if run.result_payload is not None else b""
+
+
+def load_run_result(run) -> Optional[dict]:
+    """The full result, or None when it is out of row and over BLOB_DETAIL_MAX_BYTES."""
+    if not run.result_ref:
+        return run.result_payload
+    if run.result_size > settings.BLOB_DETAIL_MAX_BYTES:
+        return None
+    return json.loads(read_blob(run.result_ref, run.result_size))
+
+
+def assign_document_output(doc, text: str):
+    """Set doc.output_content; a large body moves out of row and the column keeps a preview."""
+    data = text.encode("utf-8")
+    if len(data) > settings.BLOB_INLINE_MAX_BYTES:
+        doc.output_content = text[:settings.BLOB_PREVIEW_CHARS]
+        doc.output_ref, doc.output_size = get_blob_store().put(data), len(data)
+    else:
+        doc.output_content, doc.output_ref, doc.output_size = text, None, None
+
+
+def document_output_bytes(doc) -> bytes:
+    if doc.output_ref:
+        return read_blob(doc.output_ref, doc.output_size)
+    return doc.output_content.encode("utf-8")
+
+
+# ---------- HTTP ----------
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single `bytes=` range; None means send the whole body."""
+    from fastapi import HTTPException
+
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            start, end = max(0, size - int(last)), size - 1  # suffix range: last N bytes
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(416, "Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def ranged_response(request, *, size: int, media_type: str, ref: Optional[str] = None,
+                    body: Optional[bytes] = None, filename: Optional[str] = None):
+    """200 / 206 / 304 for an out-of-row blob (`ref`) or inline bytes (`body`)."""
+    from urllib.parse import quote
+    from fastapi.responses import Response, StreamingResponse
+
+    etag = '"%s"' % (ref.split(".")[0] if ref else hashlib.sha256(body).hexdigest())
+    headers = {"Accept-Ranges": "bytes", "ETag": etag}
+    if filename:
+        headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(filename)}"
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    start, end, status = 0, size - 1, 200
+    byte_range = parse_range(request.headers["range"], size) if size and "range" in request.headers else None
+    if byte_range:
+        start, end = byte_range
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    if body is not None:
+        return Response(body[start:end + 1], status_code=status, media_type=media_type, headers=headers)
+    return StreamingResponse(get_blob_store().iter_range(ref, start, end), status_code=status,
+                             media_type=media_type, headers=headers)
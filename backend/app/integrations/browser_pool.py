@@ -0,0 +1,282 @@
+"""
+Browser Pool – 워커 간 공유되는 상주 Chromium 풀
+
+A single background thread owns the Playwright driver and an asyncio loop.
+Callers on any thread (Celery task, local runner thread) submit a coroutine
+that receives a fresh, isolated BrowserContext; the browser itself stays warm
+between runs and is recycled after N pages or when Chromium RSS grows too big.
+
+A run that does not finish within CELERY_TASK_TIME_LIMIT (minus a margin to
+clean up) is cancelled and its browser is retired, since a hung page usually
+means a wedged renderer; the caller gets a TimeoutError.
+
+Warm hits / launches, recycles, pages and active contexts are exported as
+baikal_browser_pool_* on /metrics (see app/core/metrics.py); stats() gives
+the same numbers for this process.
+
+usage:
+    pool = get_browser_pool()
+    data = pool.run(lambda context: scrape(context), log_lines)
+"""
+import asyncio
+import concurrent.futures
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.core.metrics import (
+    BROWSER_PHASE, BROWSER_POOL_ACQUIRE, BROWSER_POOL_ACTIVE, BROWSER_POOL_PAGES, BROWSER_POOL_RECYCLES, timed,
+)
+
+CLEANUP_MARGIN = 30.0   # seconds left to close the context before the task's hard limit
+
+
+class _BrowserSlot:
+    """One launched Chromium instance and its usage counters."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages = 0
+        self.active = 0
+        self.retired = False
+
+
+class BrowserPool:
+    def __init__(self, max_contexts: int, max_pages: int, max_memory_mb: int):
+        self.max_contexts = max(1, max_contexts)
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self._start_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._playwright = None
+        self._slot: Optional[_BrowserSlot] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self._hits = 0
+        self._misses = 0
+        self._recycles = 0
+        self._pages_served = 0
+        self._active = 0
+
+    # ---------- lifecycle ----------
+    def _ensure_started(self):
+        with self._start_lock:
+            # A pool inherited through fork() (Celery prefork) has no loop thread
+            if self._pid != os.getpid():
+                self._reset()
+            if self._thread is not None and self._thread.is_alive():
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _serve():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._loop = loop
+            self._thread = threading.Thread(target=_serve, name="browser-pool", daemon=True)
+            self._thread.start()
+            ready.wait()
+            asyncio.run_coroutine_threadsafe(self._init_primitives(), loop).result()
+
+    async def _init_primitives(self):
+        self._semaphore = asyncio.Semaphore(self.max_contexts)
+        self._launch_lock = asyncio.Lock()
+
+    def close(self):
+        with self._start_lock:
+            if self._pid != os.getpid() or self._loop is None or self._thread is None:
+                return
+            if self._thread.is_alive():
+                try:
+                    asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=30)
+                finally:
+                    self._loop.call_soon_threadsafe(self._loop.stop)
+                    self._thread.join(timeout=10)
+            self._loop.close()
+            self._reset()
+
+    async def _shutdown(self):
+        if self._slot is not None:
+            await self._close_browser(self._slot)
+            self._slot = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    # ---------- public API ----------
+    def run(self, fn: Callable[[Any], Awaitable[Any]], log_lines: Optional[List[str]] = None,
+            timeout: Optional[float] = None) -> Any:
+        """Run ``fn(context)`` on a pooled browser and block until it finishes or times out."""
+        if timeout is None:
+            timeout = max(1.0, settings.CELERY_TASK_TIME_LIMIT - CLEANUP_MARGIN)
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._run(fn, log_lines, timeout), self._loop)
+        try:
+            # _run enforces the timeout itself; this only guards against a wedged loop
+            return future.result(timeout=timeout + CLEANUP_MARGIN)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Browser run did not finish within {timeout:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / total, 4) if total else 0.0,
+            "recycles": self._recycles,
+            "active_contexts": self._active,
+            "max_contexts": self.max_contexts,
+            "pages_served": self._pages_served,
+        }
+
+    # ---------- internals (run on the pool loop) ----------
+    async def _run(self, fn, log_lines, timeout: float):
+        async with self._semaphore:
+            slot, hit = await self._acquire()
+            if log_lines is not None:
+                log_lines.append(f"[브라우저 풀] {'재사용' if hit else '새 브라우저 기동'} (hit={self._hits}, miss={self._misses})")
+            slot.active += 1
+            self._active += 1
+            BROWSER_POOL_ACTIVE.inc()
+            context = None
+            try:
+                context = await slot.browser.new_context()
+                context.on("page", lambda _page: self._count_page(slot))
+                return await asyncio.wait_for(fn(context), timeout)
+            except asyncio.TimeoutError:
+                if not slot.retired:
+                    slot.retired = True
+                    self._recycles += 1
+                    BROWSER_POOL_RECYCLES.inc()
+                if log_lines is not None:
+                    log_lines.append(f"[브라우저 풀] {timeout:.0f}초 초과 → 컨텍스트 종료, 브라우저 재시작 예약")
+                raise TimeoutError(f"Browser run did not finish within {timeout:.0f}s")
+            finally:
+                if context is not None:
+                    try:
+                        await asyncio.wait_for(context.close(), 10)
+                    except Exception:
+                        pass
+                slot.active -= 1
+                self._active -= 1
+                BROWSER_POOL_ACTIVE.dec()
+                await self._release(slot, log_lines)
+
+    async def _acquire(self):
+        async with self._launch_lock:
+            slot = self._slot
+            if slot is not None and not slot.retired and slot.browser.is_connected():
+                self._hits += 1
+                BROWSER_POOL_ACQUIRE.labels(outcome="hit").inc()
+                return slot, True
+            if slot is not None and not slot.retired:
+                # Browser crashed or was disconnected underneath us
+                slot.retired = True
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+            with timed(BROWSER_PHASE, "browser.launch", phase="launch"):
+                browser = await self._playwright.chromium.launch(headless=True)
+            self._slot = _BrowserSlot(browser)
+            self._misses += 1
+            BROWSER_POOL_ACQUIRE.labels(outcome="miss").inc()
+            return self._slot, False
+
+    def _count_page(self, slot: _BrowserSlot):
+        slot.pages += 1
+        self._pages_served += 1
+        BROWSER_POOL_PAGES.inc()
+
+    async def _release(self, slot: _BrowserSlot, log_lines):
+        if not slot.retired:
+            reason = None
+            if self.max_pages and slot.pages >= self.max_pages:
+                reason = f"{slot.pages} pages"
+            elif self.max_memory_mb:
+                rss = _chromium_rss_mb()
+                if rss is not None and rss > self.max_memory_mb:
+                    reason = f"{rss:.0f} MB"
+            if reason:
+                slot.retired = True
+                self._recycles += 1
+                BROWSER_POOL_RECYCLES.inc()
+                if log_lines is not None:
+                    log_lines.append(f"[브라우저 풀] 브라우저 재시작 예약 ({reason})")
+        if slot.retired and slot.active == 0:
+            if self._slot is slot:
+                self._slot = None
+            await self._close_browser(slot)
+
+    @staticmethod
+    async def _close_browser(slot: _BrowserSlot):
+        try:
+            await slot.browser.close()
+        except Exception:
+            pass
+
+
+def _chromium_rss_mb() -> Optional[float]:
+    """Sum RSS of Chromium processes descended from this process (Linux /proc only)."""
+    if not os.path.isdir("/proc"):
+        return None
+    parents: Dict[int, int] = {}
+    names: Dict[int, str] = {}
+    rss_kb: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status") as f:
+                status = f.read()
+        except OSError:
+            continue
+        pid = int(entry)
+        for line in status.splitlines():
+            if line.startswith("Name:"):
+                names[pid] = line.split(":", 1)[1].strip()
+            elif line.startswith("PPid:"):
+                parents[pid] = int(line.split(":", 1)[1])
+            elif line.startswith("VmRSS:"):
+                rss_kb[pid] = int(line.split()[1])
+
+    me = os.getpid()
+    total_kb = 0
+    for pid, name in names.items():
+        if "chrom" not in name.lower() and "headless_shell" not in name:
+            continue
+        ancestor = parents.get(pid)
+        while ancestor and ancestor != me:
+            ancestor = parents.get(ancestor)
+        if ancestor == me:
+            total_kb += rss_kb.get(pid, 0)
+    return total_kb / 1024
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(
+                max_contexts=settings.BROWSER_POOL_MAX_CONTEXTS,
+                max_pages=settings.BROWSER_POOL_MAX_PAGES,
+                max_memory_mb=settings.BROWSER_POOL_MAX_MEMORY_MB,
+            )
+        return _pool
+
+
+def shutdown_browser_pool():
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
@@ -0,0 +1,126 @@
+"""
+Columnar Cache – 업로드 파일의 Arrow IPC(Feather) 캐시
+
+The first read of a workbook pays for the xlsx parse and stores the frame as an
+uncompressed Arrow IPC file keyed by the sha256 of the source file. Reruns and
+scheduled reruns of the same upload memory-map that file instead.
+pyarrow is optional: without it (or for frames Arrow cannot hold) the file is
+simply parsed every time.
+
+A hit touches the file's mtime, so mtime is the last use. After each store the
+directory is trimmed: files unused for EXCEL_CACHE_TTL_DAYS go, then the least
+recently used ones until it fits in EXCEL_CACHE_MAX_MB. Readers that already
+memory-mapped an evicted file keep their mapping (unlink only drops the name).
+"""
+import hashlib
+import os
+import time
+import uuid
+from typing import List, Optional
+import pandas as pd
+from app.core.config import settings
+from app.integrations.uploads import read_sidecar
+
+
+def file_digest(file_path: str) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_digest(file_path: str) -> str:
+    """sha256 of the file, from the upload's metadata sidecar when it is still valid."""
+    meta = read_sidecar(file_path)
+    return meta["sha256"] if meta and meta.get("sha256") else file_digest(file_path)
+
+
+def read_source(file_path: str) -> pd.DataFrame:
+    if file_path.lower().endswith(".csv"):
+        return pd.read_csv(file_path)
+    return pd.read_excel(file_path)
+
+
+def load_frame(file_path: str, log_lines: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read ``file_path`` into a DataFrame, going through the columnar cache when possible."""
+    if not settings.EXCEL_CACHE_ENABLED:
+        return read_source(file_path)
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        return read_source(file_path)
+
+    cache_path = os.path.join(settings.EXCEL_CACHE_DIR, f"{source_digest(file_path)}.arrow")
+    if os.path.exists(cache_path):
+        df = feather.read_feather(cache_path, memory_map=True)
+        try:
+            os.utime(cache_path)  # LRU: mtime = last use
+        except OSError:
+            pass  # evicted concurrently; the mapping is still valid
+        if log_lines is not None:
+            log_lines.append(f"[캐시] 컬럼형 캐시 사용: {os.path.basename(cache_path)}")
+        return df
+
+    df = read_source(file_path)
+    _store(feather, df, cache_path, log_lines)
+    return df
+
+
+def _store(feather, df: pd.DataFrame, cache_path: str, log_lines: Optional[List[str]]):
+    if not all(isinstance(c, str) for c in df.columns):
+        return  # Arrow IPC needs string column names; keep the original frame untouched
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        # Uncompressed so later reads can memory-map it
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, cache_path)
+        if log_lines is not None:
+            log_lines.append(f"[캐시] 컬럼형 캐시 저장: {os.path.basename(cache_path)}")
+        evicted = evict(keep=cache_path)
+        if evicted and log_lines is not None:
+            log_lines.append(f"[캐시] 오래된 캐시 {evicted}개 삭제")
+    except Exception as e:  # mixed-type object columns etc.
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if log_lines is not None:
+            log_lines.append(f"[캐시] 저장 생략: {e.__class__.__name__}")
+
+
+def evict(keep: Optional[str] = None) -> int:
+    """Apply EXCEL_CACHE_TTL_DAYS and EXCEL_CACHE_MAX_MB; returns the number of files removed."""
+    now = time.time()
+    entries = []
+    try:
+        names = os.listdir(settings.EXCEL_CACHE_DIR)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        path = os.path.join(settings.EXCEL_CACHE_DIR, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if name.endswith(".tmp"):
+            if now - st.st_mtime > 3600:
+                entries.append((0.0, 0, path))  # left behind by a crashed writer
+            continue
+        if name.endswith(".arrow"):
+            entries.append((st.st_mtime, st.st_size, path))
+
+    ttl = settings.EXCEL_CACHE_TTL_DAYS * 86400
+    budget = settings.EXCEL_CACHE_MAX_MB * 1024 * 1024
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in sorted(entries):
+        expired = mtime == 0.0 or (ttl and now - mtime > ttl)
+        if path == keep or not (expired or (budget and total > budget)):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
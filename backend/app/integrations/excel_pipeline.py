@@ -0,0 +1,247 @@
+"""
+Excel Pipeline – operations 목록을 하나의 실행 계획으로 컴파일
+
+Each entry of config.operations is either a legacy name ("dropna") or a dict:
+
+  {"op": "dropna", "columns": ["a", "b"]}                 # columns optional
+  {"op": "dedup", "columns": ["a"]}                       # columns optional
+  {"op": "filter", "column": "price", "operator": ">=", "value": 1000}
+        operators: == != > >= < <= in not_in contains isnull notnull
+  {"op": "select", "columns": ["a", "b"]}
+  {"op": "sort", "by": "a", "ascending": true}            # by defaults to first column
+  {"op": "groupby", "by": ["team"], "agg": {"sales": ["sum", "mean"]}}
+                                                          # agg omitted → row count
+  {"op": "join", "file_path": "/app/uploads/other.xlsx", "on": "id", "how": "inner"}
+                                                          # or left_on / right_on
+  {"op": "summary"}
+
+Consecutive row filters (dropna, dedup, filter) are fused into one boolean mask
+and applied together with any following select in a single ``df.loc`` take, so
+a chain of filters costs one copy instead of one per step. Back-to-back sorts
+and selects collapse into the last one.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.core.metrics import EXCEL_OP, timed
+
+ROW_FILTERS = {"dropna", "dedup", "filter"}
+KNOWN_OPERATIONS = ROW_FILTERS | {"select", "sort", "groupby", "join", "summary"}
+
+_COMPARISONS: Dict[str, Callable[[pd.Series, Any], pd.Series]] = {
+    "==": lambda s, v: s == v,
+    "!=": lambda s, v: s != v,
+    ">": lambda s, v: s > v,
+    ">=": lambda s, v: s >= v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    "in": lambda s, v: s.isin(v if isinstance(v, list) else [v]),
+    "not_in": lambda s, v: ~s.isin(v if isinstance(v, list) else [v]),
+    "contains": lambda s, v: s.astype(str).str.contains(str(v), regex=False, na=False),
+    "isnull": lambda s, v: s.isna(),
+    "notnull": lambda s, v: s.notna(),
+}
+
+
+def normalize_operations(operations: List[Any]) -> List[Dict[str, Any]]:
+    specs = []
+    for op in operations:
+        spec = {"op": op} if isinstance(op, str) else dict(op)
+        name = spec.get("op")
+        if name not in KNOWN_OPERATIONS:
+            raise ValueError(f"Unknown excel operation: {name}")
+        if name == "filter" and spec.get("operator", "==") not in _COMPARISONS:
+            raise ValueError(f"Unknown filter operator: {spec.get('operator')}")
+        if name == "join" and not spec.get("file_path"):
+            raise ValueError("join operation requires file_path")
+        if name == "groupby" and not spec.get("by"):
+            raise ValueError("groupby operation requires by")
+        specs.append(spec)
+    return specs
+
+
+class _Stage:
+    label = ""
+    metric_op = ""  # bounded "op" label of baikal_excel_op_duration_seconds
+
+    def run(self, df: pd.DataFrame, owned: bool, ctx: "_Context") -> Tuple[pd.DataFrame, bool]:
+        raise NotImplementedError
+
+
+class _Context:
+    def __init__(self, log_lines: List[str], load_frame: Callable[[str], pd.DataFrame]):
+        self.log_lines = log_lines
+        self.load_frame = load_frame
+        self.summary: Dict[str, Any] = {}
+
+
+class _TakeStage(_Stage):
+    """Fused row filters plus an optional projection, applied in one take."""
+
+    metric_op = "take"  # the fused op list is in label / the run log, not in metric labels
+
+    def __init__(self):
+        self.filters: List[Dict[str, Any]] = []
+        self.columns: Optional[List[str]] = None
+
+    @property
+    def label(self):
+        parts = [f["op"] for f in self.filters]
+        if self.columns is not None:
+            parts.append("select")
+        return "+".join(parts)
+
+    def run(self, df, owned, ctx):
+        mask = pd.Series(True, index=df.index)
+        remaining = len(df)
+        for spec in self.filters:
+            mask = self._apply(spec, df, mask)
+            kept = int(mask.sum())
+            ctx.log_lines.append(f"[{spec['op']}] {remaining - kept}행 제거 → {kept}행")
+            remaining = kept
+
+        if self.columns is not None:
+            missing = [c for c in self.columns if c not in df.columns]
+            if missing:
+                raise ValueError(f"select: unknown columns {missing}")
+            ctx.log_lines.append(f"[select] {len(self.columns)}개 컬럼 선택")
+
+        if not self.filters:
+            return df[self.columns].copy(), True
+        if remaining == len(df) and self.columns is None:
+            return df, owned  # nothing filtered out: skip the copy
+        cols = self.columns if self.columns is not None else slice(None)
+        return df.loc[mask.to_numpy(), cols].copy(), True
+
+    @staticmethod
+    def _apply(spec, df, mask):
+        op = spec["op"]
+        if op == "dropna":
+            subset = spec.get("columns") or list(df.columns)
+            return mask & df[subset].notna().all(axis=1)
+        if op == "dedup":
+            subset = spec.get("columns") or list(df.columns)
+            # Duplicates are judged only among rows that survived earlier filters
+            alive = mask.to_numpy()
+            dup = np.zeros(len(df), dtype=bool)
+            dup[alive] = df.loc[alive, subset].duplicated().to_numpy()
+            return mask & ~dup
+        column = spec.get("column")
+        if column not in df.columns:
+            raise ValueError(f"filter: unknown column {column!r}")
+        compare = _COMPARISONS[spec.get("operator", "==")]
+        return mask & compare(df[column], spec.get("value")).fillna(False).astype(bool)
+
+
+class _SortStage(_Stage):
+    label = metric_op = "sort"
+
+    def __init__(self, spec):
+        self.spec = spec
+
+    def run(self, df, owned, ctx):
+        by = self.spec.get("by") or df.columns[0]
+        ascending = self.spec.get("ascending", True)
+        if owned:
+            df.sort_values(by=by, ascending=ascending, inplace=True)
+        else:
+            df = df.sort_values(by=by, ascending=ascending)
+        ctx.log_lines.append(f"[sort] '{by}' 기준 정렬 완료")
+        return df, True
+
+
+class _GroupByStage(_Stage):
+    label = metric_op = "groupby"
+
+    def __init__(self, spec):
+        self.spec = spec
+
+    def run(self, df, owned, ctx):
+        by = self.spec["by"]
+        agg = self.spec.get("agg")
+        grouped = df.groupby(by, as_index=False, sort=True, dropna=False)
+        if not agg:
+            out = grouped.size().rename(columns={"size": "count"})
+        else:
+            out = grouped.agg(agg)
+            if isinstance(out.columns, pd.MultiIndex):
+                out.columns = ["_".join(str(p) for p in col if p) for col in out.columns]
+        ctx.log_lines.append(f"[groupby] {by} → {len(out)}개 그룹")
+        return out, True
+
+
+class _JoinStage(_Stage):
+    label = metric_op = "join"
+
+    def __init__(self, spec):
+        self.spec = spec
+
+    def run(self, df, owned, ctx):
+        right = ctx.load_frame(self.spec["file_path"])
+        keys = {k: self.spec[k] for k in ("on", "left_on", "right_on") if self.spec.get(k)}
+        out = df.merge(right, how=self.spec.get("how", "inner"), suffixes=("", "_right"), **keys)
+        ctx.log_lines.append(f"[join] {self.spec['file_path']} ({self.spec.get('how', 'inner')}) → {len(out)}행")
+        return out, True
+
+
+class _SummaryStage(_Stage):
+    label = metric_op = "summary"
+
+    def run(self, df, owned, ctx):
+        desc = df.describe(include="all").to_dict()
+        ctx.summary = {col: {k: str(v) for k, v in stats.items()} for col, stats in desc.items()}
+        ctx.log_lines.append(f"[summary] 통계 요약 생성 완료")
+        return df, owned
+
+
+class ExcelPlan:
+    def __init__(self, stages: List[_Stage]):
+        self.stages = stages
+
+    def describe(self) -> str:
+        return " → ".join(s.label for s in self.stages) or "(없음)"
+
+    def execute(
+        self, df: pd.DataFrame, log_lines: List[str], load_frame: Callable[[str], pd.DataFrame]
+    ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        ctx = _Context(log_lines, load_frame)
+        owned = False
+        for stage in self.stages:
+            with timed(EXCEL_OP, "excel.op", op=stage.metric_op, engine="memory"):
+                df, owned = stage.run(df, owned, ctx)
+        return df, ctx.summary
+
+
+def compile_plan(operations: List[Any]) -> ExcelPlan:
+    stages: List[_Stage] = []
+    for spec in normalize_operations(operations):
+        op = spec["op"]
+        last = stages[-1] if stages else None
+        if op in ROW_FILTERS:
+            # Filters may not move past a projection that could drop their columns
+            if isinstance(last, _TakeStage) and last.columns is None:
+                last.filters.append(spec)
+            else:
+                take = _TakeStage()
+                take.filters.append(spec)
+                stages.append(take)
+        elif op == "select":
+            columns = list(spec.get("columns") or [])
+            if isinstance(last, _TakeStage) and (last.columns is None or set(columns) <= set(last.columns)):
+                last.columns = columns
+            else:
+                take = _TakeStage()
+                take.columns = columns
+                stages.append(take)
+        elif op == "sort":
+            if isinstance(last, _SortStage):
+                stages[-1] = _SortStage(spec)  # a later sort fully reorders the earlier one
+            else:
+                stages.append(_SortStage(spec))
+        elif op == "groupby":
+            stages.append(_GroupByStage(spec))
+        elif op == "join":
+            stages.append(_JoinStage(spec))
+        elif op == "summary":
+            stages.append(_SummaryStage())
+    return ExcelPlan(stages)
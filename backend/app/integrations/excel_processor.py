@@ -13,10 +13,19 @@ operations:
   - summary     : 기초 통계 요약
   - dedup       : 중복 제거
   - sort        : 첫 번째 컬럼 기준 정렬
+  - filter / select / groupby / join : dict 형태로 지정 (excel_pipeline.py 참고)
+
+"streaming": true | false 로 스트리밍 모드(excel_stream.py)를 강제할 수 있습니다.
+생략하면 CSV 파일이거나 EXCEL_STREAM_THRESHOLD_MB 이상인 파일에 자동 적용됩니다.
 """
 import pandas as pd
 from typing import List, Dict, Any
 import os
+from app.core.config import settings
+from app.core.metrics import EXCEL_OP, timed
+from app.integrations.columnar_cache import load_frame
+from app.integrations.excel_pipeline import compile_plan, normalize_operations
+from app.integrations.uploads import describe_sheets
 
 
 def run_excel_process(config: dict, log_lines: List[str]) -> dict:
@@ -27,41 +36,32 @@ def run_excel_process(config: dict, log_lines: List[str]) -> dict:
     if not file_path or not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    log_lines.append(f"[시작] 파일: {file_path}")
-
-    # Read excel
-    df = pd.read_excel(file_path)
-    log_lines.append(f"[읽기] {len(df)}행 x {len(df.columns)}열")
-
-    summary_data = {}
+    if _use_streaming(config, file_path):
+        from app.integrations.excel_stream import run_excel_stream
+        return run_excel_stream(config, log_lines)
 
-    for op in operations:
-        if op == "dropna":
-            before = len(df)
-            df = df.dropna()
-            log_lines.append(f"[dropna] {before - len(df)}행 제거 → {len(df)}행")
+    log_lines.append(f"[시작] 파일: {file_path}")
+    sheets = describe_sheets(file_path)
+    if sheets:
+        log_lines.append(f"[메타] 시트: {sheets}")
 
-        elif op == "dedup":
-            before = len(df)
-            df = df.drop_duplicates()
-            log_lines.append(f"[dedup] {before - len(df)}행 제거 → {len(df)}행")
+    # Compile first so a bad operation fails before the slow read
+    plan = compile_plan(operations)
+    log_lines.append(f"[계획] {plan.describe()}")
 
-        elif op == "sort":
-            first_col = df.columns[0]
-            df = df.sort_values(by=first_col)
-            log_lines.append(f"[sort] '{first_col}' 기준 정렬 완료")
+    with timed(EXCEL_OP, "excel.op", op="read", engine="memory"):
+        df = load_frame(file_path, log_lines)
+    log_lines.append(f"[읽기] {len(df)}행 x {len(df.columns)}열")
 
-        elif op == "summary":
-            desc = df.describe(include="all").to_dict()
-            summary_data = {col: {k: str(v) for k, v in stats.items()} for col, stats in desc.items()}
-            log_lines.append(f"[summary] 통계 요약 생성 완료")
+    df, summary_data = plan.execute(df, log_lines, load_frame)
 
     # Save result
     if not output_path:
         base, ext = os.path.splitext(file_path)
         output_path = f"{base}_result{ext}"
 
-    df.to_excel(output_path, index=False)
+    with timed(EXCEL_OP, "excel.op", op="write", engine="memory"):
+        df.to_excel(output_path, index=False)
     log_lines.append(f"[저장] 결과 파일: {output_path}")
 
     return {
@@ -70,3 +70,15 @@ def run_excel_process(config: dict, log_lines: List[str]) -> dict:
         "output_path": output_path,
         "summary": summary_data,
     }
+
+
+def _use_streaming(config: dict, file_path: str) -> bool:
+    streaming = config.get("streaming")
+    if streaming is not None:
+        return bool(streaming)
+    from app.integrations.excel_stream import STREAM_OPERATIONS
+    if any(spec["op"] not in STREAM_OPERATIONS or len(spec) > 1 for spec in normalize_operations(config.get("operations", ["summary"]))):
+        return False  # pipeline-only operations need the in-memory engine
+    if file_path.lower().endswith(".csv"):
+        return True
+    return os.path.getsize(file_path) >= settings.EXCEL_STREAM_THRESHOLD_MB * 1024 * 1024
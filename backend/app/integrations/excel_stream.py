@@ -0,0 +1,351 @@
+"""
+Excel Stream – 대용량 엑셀/CSV 스트리밍 처리
+
+Row-at-a-time counterpart of excel_processor.run_excel_process. Rows are read
+with openpyxl read_only (or the csv module), pushed through the operations as
+a chain of generators and written through a write-only workbook, so memory
+stays flat as the input grows.
+
+operations (same names as the pandas path):
+  - dropna      : 빈 셀이 있는 행 제거
+  - dedup       : 행 digest(hash set) 기준 중복 제거
+  - sort        : 첫 번째 컬럼 기준 외부 병합 정렬 (청크 단위로 디스크에 spill)
+  - summary     : count / mean / std / min / max 등 증분 통계
+"""
+import csv
+import hashlib
+import heapq
+import math
+import numbers
+import os
+import pickle
+import tempfile
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import EXCEL_OP, timed
+from app.integrations.uploads import describe_sheets
+
+Row = Tuple[Any, ...]
+
+STREAM_OPERATIONS = {"dropna", "dedup", "sort", "summary"}
+
+
+def run_excel_stream(config: dict, log_lines: List[str]) -> dict:
+    file_path = config.get("file_path", "")
+    operations = config.get("operations", ["summary"])
+    output_path = config.get("output_path", "")
+    chunk_rows = max(1, int(config.get("chunk_rows", settings.EXCEL_STREAM_CHUNK_ROWS)))  # 0 would divide by zero
+
+    # {"op": "dedup"} without parameters is the same as the legacy string form
+    operations = [op["op"] if isinstance(op, dict) and list(op) == ["op"] else op for op in operations]
+    unsupported = [op for op in operations if not isinstance(op, str) or op not in STREAM_OPERATIONS]
+    if unsupported:
+        raise ValueError(f"Operations not supported in streaming mode: {unsupported}")
+
+    log_lines.append(f"[시작] 파일: {file_path} (스트리밍, {chunk_rows}행 단위)")
+    sheets = describe_sheets(file_path)
+    if sheets:
+        log_lines.append(f"[메타] 시트: {sheets}")
+
+    if not output_path:
+        base, ext = os.path.splitext(file_path)
+        output_path = f"{base}_result{'.xlsx' if ext.lower() == '.csv' else ext}"
+
+    with tempfile.TemporaryDirectory(prefix="excel_sort_") as spill_dir:
+        columns, rows = _open_rows(file_path)
+        rows = _progress(rows, chunk_rows, log_lines)
+
+        summaries: List[_SummaryStage] = []
+        for op in operations:
+            if op == "dropna":
+                rows = _dropna(rows, log_lines)
+            elif op == "dedup":
+                rows = _dedup(rows, log_lines)
+            elif op == "sort":
+                rows = _external_sort(rows, chunk_rows, spill_dir, log_lines)
+                if columns:
+                    log_lines.append(f"[sort] '{columns[0]}' 기준 외부 병합 정렬")
+            elif op == "summary":
+                stage = _SummaryStage(columns)
+                summaries.append(stage)
+                rows = stage.wrap(rows)
+
+        # The operations run fused inside this one pass, so it is timed as a whole
+        with timed(EXCEL_OP, "excel.op", op="stream_pass", engine="stream"):
+            written = _write_rows(output_path, columns, rows)
+
+    log_lines.append(f"[저장] 결과 파일: {output_path} ({written}행)")
+
+    summary_data: Dict[str, Any] = {}
+    if summaries:
+        summary_data = summaries[-1].result()
+        log_lines.append("[summary] 통계 요약 생성 완료")
+
+    return {
+        "rows": written,
+        "columns": columns,
+        "output_path": output_path,
+        "summary": summary_data,
+        "mode": "stream",
+    }
+
+
+# ---------- readers / writers ----------
+def _open_rows(file_path: str) -> Tuple[List[str], Iterator[Row]]:
+    if file_path.lower().endswith(".csv"):
+        return _open_csv(file_path)
+    return _open_xlsx(file_path)
+
+
+def _open_xlsx(file_path: str) -> Tuple[List[str], Iterator[Row]]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    ws = wb.active
+    it = ws.iter_rows(values_only=True)
+    header = next(it, None) or ()
+    columns = _column_names(header)
+    width = len(columns)
+
+    def rows() -> Iterator[Row]:
+        try:
+            for row in it:
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                if all(v is None for v in row):
+                    continue  # pandas skips fully blank sheet rows as well
+                yield row
+        finally:
+            wb.close()
+
+    return columns, rows()
+
+
+def _open_csv(file_path: str) -> Tuple[List[str], Iterator[Row]]:
+    f = open(file_path, newline="", encoding="utf-8-sig")
+    reader = csv.reader(f)
+    header = next(reader, None) or []
+    columns = _column_names(header)
+    width = len(columns)
+
+    def rows() -> Iterator[Row]:
+        try:
+            for raw in reader:
+                raw = raw[:width] + [""] * (width - len(raw))
+                yield tuple(_coerce(v) for v in raw)
+        finally:
+            f.close()
+
+    return columns, rows()
+
+
+def _column_names(header) -> List[str]:
+    return [str(h) if h is not None and h != "" else f"Unnamed: {i}" for i, h in enumerate(header)]
+
+
+def _coerce(value: str) -> Any:
+    """Mimic pandas' type inference for CSV cells: '' → None, numerics → int/float."""
+    if value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _write_rows(output_path: str, columns: List[str], rows: Iterable[Row]) -> int:
+    written = 0
+    if output_path.lower().endswith(".csv"):
+        with open(output_path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(["" if v is None else v for v in row])
+                written += 1
+        return written
+
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(columns)
+    for row in rows:
+        ws.append(list(row))
+        written += 1
+    wb.save(output_path)
+    return written
+
+
+# ---------- operations ----------
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _progress(rows: Iterable[Row], chunk_rows: int, log_lines: List[str]) -> Iterator[Row]:
+    count = 0
+    for row in rows:
+        count += 1
+        if count % chunk_rows == 0:
+            log_lines.append(f"[읽기] {count}행 처리")
+        yield row
+    log_lines.append(f"[읽기] 총 {count}행")
+
+
+def _dropna(rows: Iterable[Row], log_lines: List[str]) -> Iterator[Row]:
+    kept = dropped = 0
+    for row in rows:
+        if any(_is_missing(v) for v in row):
+            dropped += 1
+            continue
+        kept += 1
+        yield row
+    log_lines.append(f"[dropna] {dropped}행 제거 → {kept}행")
+
+
+def _row_digest(row: Row) -> bytes:
+    # 1 and 1.0 compare equal in pandas, so normalise integral floats first
+    norm = tuple(int(v) if isinstance(v, float) and v.is_integer() else v for v in row)
+    return hashlib.blake2b(repr(norm).encode("utf-8"), digest_size=16).digest()
+
+
+def _dedup(rows: Iterable[Row], log_lines: List[str]) -> Iterator[Row]:
+    seen = set()
+    kept = dropped = 0
+    for row in rows:
+        digest = _row_digest(row)
+        if digest in seen:
+            dropped += 1
+            continue
+        seen.add(digest)
+        kept += 1
+        yield row
+    log_lines.append(f"[dedup] {dropped}행 제거 → {kept}행")
+
+
+def _type_rank(value: Any) -> Tuple[int, str]:
+    """Values of one rank compare with each other; mixed columns sort rank by rank."""
+    if isinstance(value, numbers.Real):
+        return (0, "")  # int, float, bool, numpy scalars
+    if isinstance(value, datetime):
+        return (1, "")
+    if isinstance(value, date):
+        return (2, "")  # date < datetime raises, so plain dates get their own rank
+    if isinstance(value, str):
+        return (3, "")
+    return (4, type(value).__name__)
+
+
+def _sort_key(row: Row):
+    value = row[0] if row else None
+    if _is_missing(value):
+        return (1, (0, ""), 0)  # NaN last, like sort_values
+    return (0, _type_rank(value), value)
+
+
+def _external_sort(rows: Iterable[Row], chunk_rows: int, spill_dir: str, log_lines: List[str]) -> Iterator[Row]:
+    runs: List[str] = []
+    buffer: List[Row] = []
+
+    def spill():
+        buffer.sort(key=_sort_key)
+        path = os.path.join(spill_dir, f"run_{len(runs):05d}.pkl")
+        with open(path, "wb") as f:
+            for row in buffer:
+                pickle.dump(row, f, protocol=pickle.HIGHEST_PROTOCOL)
+        runs.append(path)
+        buffer.clear()
+
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= chunk_rows:
+            spill()
+
+    if not runs:
+        # Fits in one chunk: plain in-memory sort
+        buffer.sort(key=_sort_key)
+        yield from buffer
+        return
+
+    if buffer:
+        spill()
+    log_lines.append(f"[sort] {len(runs)}개 청크를 디스크에 기록 후 병합")
+    yield from heapq.merge(*(_read_run(p) for p in runs), key=_sort_key)
+
+
+def _read_run(path: str) -> Iterator[Row]:
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+class _ColumnStats:
+    __slots__ = ("count", "numeric", "mean", "m2", "min", "max", "uniques", "uniques_capped")
+
+    def __init__(self):
+        self.count = 0
+        self.numeric = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[Any] = None
+        self.max: Optional[Any] = None
+        self.uniques = set()
+        self.uniques_capped = False
+
+    def add(self, value: Any, unique_cap: int):
+        if _is_missing(value):
+            return
+        self.count += 1
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            # Welford's online mean / variance
+            self.numeric += 1
+            delta = value - self.mean
+            self.mean += delta / self.numeric
+            self.m2 += delta * (value - self.mean)
+        elif not self.uniques_capped:
+            self.uniques.add(value)
+            if len(self.uniques) > unique_cap:
+                self.uniques_capped = True
+                self.uniques = set()
+        try:
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+        except TypeError:
+            pass  # mixed-type column: keep the bounds seen so far
+
+    def result(self, unique_cap: int) -> Dict[str, str]:
+        out = {"count": str(self.count)}
+        if self.numeric and self.numeric == self.count:
+            out["mean"] = str(self.mean)
+            out["std"] = str(math.sqrt(self.m2 / (self.numeric - 1))) if self.numeric > 1 else "nan"
+        elif self.count:
+            out["unique"] = f">{unique_cap}" if self.uniques_capped else str(len(self.uniques))
+        out["min"] = str(self.min)
+        out["max"] = str(self.max)
+        return out
+
+
+class _SummaryStage:
+    """Pass-through stage that accumulates describe()-like statistics."""
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self.stats = [_ColumnStats() for _ in columns]
+        self.unique_cap = settings.EXCEL_STREAM_UNIQUE_CAP
+
+    def wrap(self, rows: Iterable[Row]) -> Iterator[Row]:
+        for row in rows:
+            for stat, value in zip(self.stats, row):
+                stat.add(value, self.unique_cap)
+            yield row
+
+    def result(self) -> Dict[str, Dict[str, str]]:
+        return {col: stat.result(self.unique_cap) for col, stat in zip(self.columns, self.stats)}
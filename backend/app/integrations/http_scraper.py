@@ -0,0 +1,308 @@
+"""
+HTTP Scraper – 브라우저 없이 정적 페이지 수집 (web_scrape engine "http" / "auto")
+
+Static HTML tables need neither JavaScript nor Chromium. With
+config.engine = "http", pages are fetched over one keep-alive httpx pool per
+process and parsed with selectolax (Lexbor, a C HTML5 parser):
+
+  text    innerText of each selector match (block elements → line breaks,
+          table cells → tabs, whitespace collapsed, script / style skipped)
+  html    innerHTML of each match
+  table   "<selector> thead th" headers and "<selector> tbody tr" rows, the
+          same queries as playwright_runner._extract_table; the parser adds
+          the implicit <tbody> exactly like the browser does
+  fields  one dict per match from config.fields, like the browser's
+          _FIELDS_JS (first match inside, innerText / innerHTML / attribute)
+
+engine = "auto" tries HTTP first. It switches to the browser when the
+response is not usable as is: the wait_for selector is missing (content is
+rendered by JavaScript), an error status, a non-HTML body, or a body over
+HTTP_SCRAPE_MAX_BYTES. engine = "http" reports these as failures instead.
+Playwright-only selectors (text=, :has-text(), xpath=, >>) cannot be parsed
+here either: "auto" uses the browser for them, and "http" rejects the config.
+
+The body is decoded like a browser does: the Content-Type charset, else a
+BOM, else <meta charset> / http-equiv in the first 4 KB of the page, else
+UTF-8 when it is valid and HTTP_SCRAPE_FALLBACK_ENCODING (cp949) when not.
+EUC-KR labels decode as cp949, its superset.
+
+Like the browser pool, one background thread owns the event loop and the
+client, and callers on any thread submit a coroutine that receives the client.
+A run that does not finish within CELERY_TASK_TIME_LIMIT (minus the pool's
+cleanup margin) is cancelled and the caller gets a TimeoutError.
+"""
+import asyncio
+import codecs
+import concurrent.futures
+import os
+import re
+import threading
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+from app.core.config import settings
+from app.core.metrics import BROWSER_PHASE, timed
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "head", "title", "_comment", "-comment"}
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "fieldset", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+    "nav", "ol", "p", "pre", "section", "table", "tbody", "thead", "tfoot", "tr", "ul", "caption",
+}
+_SPACES = re.compile(r"[ \t\r\n\f]+")
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_:.-]+)""", re.IGNORECASE)
+META_SNIFF_BYTES = 4096
+# WHATWG maps these labels to a superset; Python's strict codecs would garble real pages
+ENCODING_ALIASES = {"euc-kr": "cp949", "euc_kr": "cp949", "ks_c_5601-1987": "cp949", "x-windows-949": "cp949",
+                    "iso-8859-1": "cp1252", "latin1": "cp1252", "us-ascii": "cp1252", "ascii": "cp1252"}
+
+
+class NeedsBrowser(Exception):
+    """The static response cannot be used as is; engine "auto" retries in the browser."""
+
+
+def _parser():
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError:
+        raise NeedsBrowser("selectolax is not installed (pip install selectolax)")
+    return LexborHTMLParser
+
+
+def unsupported_selector(selectors: Iterable[str]) -> Optional[str]:
+    """The first of `selectors` that is not plain CSS (Playwright-only syntax), or None."""
+    tree = _parser()("<p></p>")
+    for selector in selectors:
+        if not selector:
+            continue
+        try:
+            tree.css_first(selector)
+        except Exception:  # SelectolaxError: "Can't parse CSS selector"
+            return selector
+    return None
+
+
+# ---------- decoding ----------
+def _codec(label: Optional[str]) -> Optional[str]:
+    if not label:
+        return None
+    label = label.strip().lower()
+    label = ENCODING_ALIASES.get(label, label)
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        return None
+
+
+def decode_body(body: bytes, header_charset: Optional[str]) -> str:
+    encoding = _codec(header_charset)
+    if encoding is None:
+        for bom, name in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"),
+                          (codecs.BOM_UTF16_BE, "utf-16")):
+            if body.startswith(bom):
+                encoding = name
+                break
+    if encoding is None:
+        match = _META_CHARSET.search(body[:META_SNIFF_BYTES])
+        encoding = _codec(match.group(1).decode("ascii", "ignore")) if match else None
+    if encoding is None:
+        try:
+            return body.decode("utf-8")
+        except UnicodeDecodeError:
+            encoding = _codec(settings.HTTP_SCRAPE_FALLBACK_ENCODING) or "utf-8"
+    return body.decode(encoding, errors="replace")
+
+
+# ---------- extraction ----------
+def inner_text(node) -> str:
+    """Approximation of HTMLElement.innerText for a parsed (unrendered) node."""
+    parts: List[str] = []
+
+    def walk(n):
+        child = n.child
+        while child is not None:
+            tag = child.tag
+            if tag == "-text":
+                parts.append(_SPACES.sub(" ", child.text_content or ""))
+            elif tag == "br":
+                parts.append("\n")
+            elif tag not in SKIP_TAGS:
+                block = tag in BLOCK_TAGS
+                if block:
+                    parts.append("\n")
+                walk(child)
+                if tag in ("td", "th") and child.next is not None:
+                    parts.append("\t")
+                elif block:
+                    parts.append("\n")
+            child = child.next
+
+    walk(node)
+    lines = (line.strip(" ") for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line).strip()
+
+
+def inner_html(node) -> str:
+    out = []
+    child = node.child
+    while child is not None:
+        out.append(child.html or "")
+        child = child.next
+    return "".join(out)
+
+
+def _field(node, selector: str, attr: str):
+    target = node.css_first(selector) if selector else node
+    if target is None:
+        return None
+    if attr == "text":
+        return inner_text(target)
+    if attr == "html":
+        return inner_html(target)
+    return target.attributes.get(attr)
+
+
+def extract(html: str, selector: str, wait_for: str, extract_mode: str,
+            fields: Optional[list] = None) -> List[Any]:
+    bad = unsupported_selector([wait_for, selector] + [f[1] for f in fields or ()])
+    if bad is not None:
+        raise NeedsBrowser(f"'{bad}' is a Playwright selector, not CSS")
+    tree = _parser()(html)
+    if wait_for and tree.css_first(wait_for) is None:
+        raise NeedsBrowser(f"'{wait_for}' not in the static HTML")
+    if extract_mode == "html":
+        return [inner_html(n) for n in tree.css(selector)]
+    if extract_mode == "fields":
+        return [{name: _field(n, sel, attr) for name, sel, attr in fields} for n in tree.css(selector)]
+    if extract_mode == "table":
+        headers = [inner_text(th).strip() for th in tree.css(f"{selector} thead th")]
+        rows = [[inner_text(td).strip() for td in tr.css("td")] for tr in tree.css(f"{selector} tbody tr")]
+        if not headers:
+            return [{"row": r} for r in rows]
+        return [dict(zip(headers, row)) for row in rows]
+    return [inner_text(n) for n in tree.css(selector)]
+
+
+async def scrape_http(client, url: str, selector: str, wait_for: str, extract_mode: str,
+                      log_lines: Optional[List[str]] = None, fetch=None,
+                      fields: Optional[list] = None) -> Optional[List[Any]]:
+    """Extracted items, or None when `fetch` carried validators and the server answered 304."""
+    headers = dict(fetch.headers) if fetch is not None else {}
+    with timed(BROWSER_PHASE, "http.get", phase="http_get"):
+        async with client.stream("GET", url, headers=headers) as response:
+            if fetch is not None:
+                fetch.record(response.status_code, {k.lower(): v for k, v in response.headers.items()})
+            if response.status_code == 304 and fetch is not None and fetch.headers:
+                return None
+            if response.status_code >= 400:
+                raise NeedsBrowser(f"HTTP {response.status_code}")
+            content_type = response.headers.get("content-type", "")
+            if content_type and "html" not in content_type and "xml" not in content_type:
+                raise NeedsBrowser(f"content-type {content_type}")
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > settings.HTTP_SCRAPE_MAX_BYTES:
+                    raise NeedsBrowser(f"body over {settings.HTTP_SCRAPE_MAX_BYTES} bytes")
+            text = decode_body(bytes(body), response.charset_encoding)
+    if log_lines is not None:
+        log_lines.append(f"[HTTP] {response.status_code} {len(body)}바이트")
+    # Lexbor parses a typical page in about a millisecond; not worth a thread hop
+    with timed(BROWSER_PHASE, "http.extract", phase="http_extract"):
+        return extract(text, selector, wait_for, extract_mode, fields)
+
+
+# ---------- pooled client ----------
+class HttpFetcher:
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self._start_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client = None
+
+    def _ensure_started(self):
+        with self._start_lock:
+            # Inherited through fork() (Celery prefork): the loop thread did not come along
+            if self._pid != os.getpid():
+                self._reset()
+            if self._thread is not None and self._thread.is_alive():
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _serve():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._loop = loop
+            self._thread = threading.Thread(target=_serve, name="http-scraper", daemon=True)
+            self._thread.start()
+            ready.wait()
+            asyncio.run_coroutine_threadsafe(self._open(), loop).result()
+
+    async def _open(self):
+        import httpx
+        self._client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=httpx.Timeout(settings.HTTP_SCRAPE_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+            headers={"User-Agent": settings.HTTP_SCRAPE_USER_AGENT,
+                     "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8"},
+        )
+
+    def run(self, fn: Callable[[Any], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Run ``fn(client)`` on the fetcher loop and block until it finishes or times out."""
+        from app.integrations.browser_pool import CLEANUP_MARGIN
+
+        if timeout is None:
+            timeout = max(1.0, settings.CELERY_TASK_TIME_LIMIT - CLEANUP_MARGIN)
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._run(fn, timeout), self._loop)
+        try:
+            # _run enforces the timeout itself; this only guards against a wedged loop
+            return future.result(timeout=timeout + CLEANUP_MARGIN)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"HTTP scrape did not finish within {timeout:.0f}s")
+
+    async def _run(self, fn: Callable[[Any], Awaitable[Any]], timeout: float) -> Any:
+        try:
+            return await asyncio.wait_for(fn(self._client), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"HTTP scrape did not finish within {timeout:.0f}s")
+
+    def close(self):
+        with self._start_lock:
+            if self._pid != os.getpid() or self._loop is None or self._thread is None:
+                return
+            if self._thread.is_alive():
+                try:
+                    asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout=10)
+                finally:
+                    self._loop.call_soon_threadsafe(self._loop.stop)
+                    self._thread.join(timeout=10)
+            self._loop.close()
+            self._reset()
+
+
+_fetcher: Optional[HttpFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_http_fetcher() -> HttpFetcher:
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = HttpFetcher(settings.HTTP_SCRAPE_MAX_CONNECTIONS)
+        return _fetcher
+
+
+def shutdown_http_fetcher():
+    with _fetcher_lock:
+        if _fetcher is not None:
+            _fetcher.close()
@@ -0,0 +1,282 @@
+"""
+LLM Providers – 공유 커넥션 풀 + 프로바이더별 동시성/속도 제한
+
+Started from the FastAPI lifespan (app/main.py). Holds one keep-alive httpx
+pool for Ollama and one AsyncOpenAI client, plus a limiter per provider:
+
+  - a semaphore caps in-flight generations (OLLAMA_MAX_CONCURRENCY, ...)
+  - a bounded wait queue rejects immediately with ProviderSaturated (→ 429)
+  - an optional token bucket per model enforces requests/minute
+    (OLLAMA_RPM / OPENAI_RPM, overridden per model by LLM_MODEL_RPM)
+
+Queue wait and provider latency are recorded per provider (see stats()).
+
+Connections cannot cross event loops. Code outside the API process that runs
+its own loop (a worker step calling asyncio.run) goes through
+run_with_providers(), which opens a provider set for that loop and closes it
+before the loop ends.
+"""
+import asyncio
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+import httpx
+from app.core.config import settings
+from app.core.metrics import LLM_DURATION, span
+
+
+class ProviderSaturated(Exception):
+    """Raised when a provider's wait queue is full; mapped to HTTP 429."""
+
+    def __init__(self, provider: str, retry_after: float = 1.0):
+        super().__init__(f"AI provider '{provider}' is busy, retry later")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class LatencyWindow:
+    """Rolling window of recent samples (seconds) plus lifetime totals."""
+
+    def __init__(self, size: int = 500):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50": round(self.percentile(0.50), 4),
+            "p95": round(self.percentile(0.95), 4),
+        }
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute / 60.0 * 5)  # allow ~5s of burst
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (nothing is taken)."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Reserve one token; the caller then waits wait_time() for it."""
+        self.tokens -= 1
+
+
+class ProviderLimiter:
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, rpm: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.default_rpm = rpm
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.errors = 0
+        self.queue_wait = LatencyWindow()
+        self.latency = LatencyWindow()
+        self.outcomes: Deque[bool] = deque(maxlen=200)
+
+    def saturated(self) -> bool:
+        return self.in_flight >= self.max_concurrency and self.waiting >= self.max_queue
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def _bucket(self, model: str) -> Optional[TokenBucket]:
+        rpm = settings.model_rpm_map.get(model, self.default_rpm)
+        if not rpm:
+            return None
+        if model not in self._buckets:
+            self._buckets[model] = TokenBucket(rpm)
+        return self._buckets[model]
+
+    @asynccontextmanager
+    async def slot(self, model: str):
+        if self.saturated():
+            self.rejected += 1
+            raise ProviderSaturated(self.name, retry_after=max(1.0, self.latency.percentile(0.5)))
+
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=settings.LLM_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ProviderSaturated(self.name, retry_after=settings.LLM_QUEUE_TIMEOUT)
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            bucket = self._bucket(model)
+            if bucket is not None:
+                delay = bucket.wait_time()
+                if delay > settings.LLM_QUEUE_TIMEOUT:
+                    # Rejected callers take nothing, so they do not push later ones back
+                    self.rejected += 1
+                    raise ProviderSaturated(self.name, retry_after=delay)
+                bucket.take()
+                if delay:
+                    await asyncio.sleep(delay)
+            self.queue_wait.observe(time.monotonic() - queued_at)
+
+            started = time.monotonic()
+            outcome = "cancelled"  # hedged loser / client went away
+            try:
+                with span("llm.call", provider=self.name, model=model):
+                    yield
+            except Exception:
+                self.errors += 1
+                self.outcomes.append(False)
+                outcome = "error"
+                raise
+            else:
+                self.outcomes.append(True)
+                outcome = "ok"
+            finally:
+                elapsed = time.monotonic() - started
+                self.latency.observe(elapsed)
+                LLM_DURATION.labels(self.name, model, outcome).observe(elapsed)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate(), 4),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+class LLMProviders:
+    def __init__(self):
+        limits = httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=60.0,
+        )
+        self.ollama_http = httpx.AsyncClient(
+            base_url=settings.OLLAMA_BASE_URL,
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            limits=limits,
+        )
+        self._openai_http = httpx.AsyncClient(timeout=httpx.Timeout(120.0, connect=10.0), limits=limits)
+        self._openai = None
+        self.limiters = {
+            "ollama": ProviderLimiter(
+                "ollama", settings.OLLAMA_MAX_CONCURRENCY, settings.LLM_MAX_QUEUE, settings.OLLAMA_RPM
+            ),
+            "openai": ProviderLimiter(
+                "openai", settings.OPENAI_MAX_CONCURRENCY, settings.LLM_MAX_QUEUE, settings.OPENAI_RPM
+            ),
+        }
+
+    @property
+    def openai(self):
+        if self._openai is None:
+            from openai import AsyncOpenAI
+            self._openai = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=self._openai_http)
+        return self._openai
+
+    def slot(self, provider: str, model: str):
+        return self.limiters[provider].slot(model)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+    async def aclose(self):
+        await self.ollama_http.aclose()
+        await self._openai_http.aclose()
+
+
+_providers: Optional[LLMProviders] = None
+_providers_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def start_providers() -> LLMProviders:
+    global _providers, _providers_loop
+    if _providers is None:
+        _providers = LLMProviders()
+        _providers_loop = asyncio.get_running_loop()
+    return _providers
+
+
+async def stop_providers():
+    global _providers, _providers_loop
+    if _providers is not None:
+        await _providers.aclose()
+    _providers = None
+    _providers_loop = None
+
+
+# Provider sets of other loops (run_with_providers), dropped with their loop
+_loop_providers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LLMProviders]" = weakref.WeakKeyDictionary()
+
+
+def get_providers() -> LLMProviders:
+    """Return the providers of the running loop.
+
+    The API loop uses the set from start_providers(); any other loop gets its
+    own set, which run_with_providers() closes when the loop is done.
+    """
+    global _providers, _providers_loop
+    loop = asyncio.get_running_loop()
+    if _providers is not None and _providers_loop is loop:
+        return _providers
+    if _providers is None:
+        # No lifespan (scripts, tests): this loop becomes the shared one
+        _providers, _providers_loop = LLMProviders(), loop
+        return _providers
+    providers = _loop_providers.get(loop)
+    if providers is None:
+        providers = _loop_providers[loop] = LLMProviders()
+    return providers
+
+
+def run_with_providers(fn: Callable[[], Awaitable[Any]]) -> Any:
+    """asyncio.run(fn()) from sync code, closing the loop's provider clients before it ends."""
+    async def main():
+        global _providers, _providers_loop
+        loop = asyncio.get_running_loop()
+        try:
+            return await fn()
+        finally:
+            providers = _loop_providers.pop(loop, None)
+            if _providers_loop is loop:
+                providers, _providers, _providers_loop = _providers, None, None
+            if providers is not None:
+                await providers.aclose()
+
+    return asyncio.run(main())
@@ -0,0 +1,301 @@
+"""
+LLM Routing – 프로바이더 장애 조치 / 헤징 / 모델 선택 / 요청 묶음 처리
+
+  - provider order : AI_PROVIDER first, then AI_FALLBACK_PROVIDERS that are
+                     configured (OpenAI: an API key, Ollama: OLLAMA_ENABLED).
+                     A provider whose recent error rate exceeds
+                     AI_MAX_ERROR_RATE, whose p95 latency exceeds
+                     AI_LATENCY_SLO_SECONDS, or whose queue is full moves to
+                     the back of the list. Failures fail over to the next one;
+                     when every provider fails, the primary's error is raised
+  - hedging        : with AI_HEDGE_ENABLED, a second provider is started when
+                     the first has not answered within its own p95 latency
+                     (at least AI_HEDGE_MIN_DELAY seconds); first answer wins
+  - model choice   : chat → *_MODEL_SMALL, documents or prompts above
+                     AI_LARGE_PROMPT_TOKENS → *_MODEL_LARGE (each falls back
+                     to OPENAI_MODEL / OLLAMA_MODEL)
+  - batching       : identical concurrent chat requests share one upstream
+                     call; embedding requests arriving within
+                     AI_BATCH_WINDOW_MS go out as one batched call
+
+Health comes from the per-provider windows kept by llm_providers.
+"""
+import asyncio
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.integrations.ai_cache import cache_key
+from app.integrations.llm_providers import ProviderSaturated, get_providers
+from app.integrations.tokens import count_message_tokens
+
+PROVIDERS = ("ollama", "openai")
+
+_counters = {"failovers": 0, "hedges": 0, "hedge_wins": 0, "coalesced": 0, "embed_batches": 0, "embed_items": 0}
+# Per event loop: run_with_providers drives asyncio.run in worker threads, and
+# a future from another loop can neither be awaited nor resolved here
+_inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = weakref.WeakKeyDictionary()
+
+
+# ---------- provider selection ----------
+def _configured(name: str) -> bool:
+    if name == "openai":
+        return bool(settings.OPENAI_API_KEY)
+    # OLLAMA_BASE_URL always has a default, so it says nothing about a running server
+    return settings.OLLAMA_ENABLED and bool(settings.OLLAMA_BASE_URL)
+
+
+def primary_provider() -> str:
+    return "ollama" if settings.AI_PROVIDER.lower() == "ollama" else "openai"
+
+
+def candidate_providers() -> List[str]:
+    order = [primary_provider()]
+    if settings.AI_FAILOVER:
+        for name in settings.AI_FALLBACK_PROVIDERS.split(","):
+            name = name.strip().lower()
+            if name in PROVIDERS and name not in order and _configured(name):
+                order.append(name)
+    return order
+
+
+def is_healthy(name: str) -> bool:
+    limiter = get_providers().limiters[name]
+    if limiter.saturated():
+        return False
+    if len(limiter.outcomes) >= settings.AI_HEALTH_MIN_SAMPLES and limiter.error_rate() > settings.AI_MAX_ERROR_RATE:
+        return False
+    if (
+        settings.AI_LATENCY_SLO_SECONDS
+        and len(limiter.latency.samples) >= settings.AI_HEALTH_MIN_SAMPLES
+        and limiter.latency.percentile(0.95) > settings.AI_LATENCY_SLO_SECONDS
+    ):
+        return False
+    return True
+
+
+def ranked_providers() -> List[str]:
+    candidates = candidate_providers()
+    healthy = [p for p in candidates if is_healthy(p)]
+    return healthy + [p for p in candidates if p not in healthy]
+
+
+def all_saturated() -> bool:
+    limiters = get_providers().limiters
+    return all(limiters[p].saturated() for p in candidate_providers())
+
+
+def choose_model(provider: str, task: str, messages: List[Dict[str, str]]) -> str:
+    if provider == "ollama":
+        default, small, large = settings.OLLAMA_MODEL, settings.OLLAMA_MODEL_SMALL, settings.OLLAMA_MODEL_LARGE
+    else:
+        default, small, large = settings.OPENAI_MODEL, settings.OPENAI_MODEL_SMALL, settings.OPENAI_MODEL_LARGE
+    if task == "document" or count_message_tokens(messages, default) > settings.AI_LARGE_PROMPT_TOKENS:
+        return large or default
+    return small or default
+
+
+def _chat_fn(provider: str):
+    if provider == "ollama":
+        from app.integrations.ollama_client import ollama_chat
+        return ollama_chat
+    from app.integrations.openai_client import openai_chat
+    return openai_chat
+
+
+def _stream_fn(provider: str):
+    if provider == "ollama":
+        from app.integrations.ollama_client import ollama_chat_stream
+        return ollama_chat_stream
+    from app.integrations.openai_client import openai_chat_stream
+    return openai_chat_stream
+
+
+# ---------- chat ----------
+async def route_chat(messages: List[Dict[str, str]], task: str = "chat") -> str:
+    key = f"{task}:{cache_key(messages)}"
+    loop = asyncio.get_running_loop()
+    inflight = _inflight.setdefault(loop, {})
+    shared = inflight.get(key)
+    if shared is not None:
+        _counters["coalesced"] += 1
+        try:
+            return await asyncio.shield(shared)
+        except asyncio.CancelledError:
+            if not shared.cancelled():
+                raise  # this caller was cancelled
+            # the leading caller was cancelled: make the call ourselves
+
+    future = loop.create_future()
+    inflight[key] = future
+    try:
+        reply = await _call_with_failover(messages, task)
+        future.set_result(reply)
+        return reply
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    finally:
+        if inflight.get(key) is future:
+            del inflight[key]
+        if not future.done():
+            future.cancel()  # cancelled: waiting callers retry on their own
+
+
+async def _call_one(provider: str, messages: List[Dict[str, str]], task: str) -> str:
+    return await _chat_fn(provider)(messages, choose_model(provider, task, messages))
+
+
+async def _call_with_failover(messages: List[Dict[str, str]], task: str) -> str:
+    order = ranked_providers()
+    if settings.AI_HEDGE_ENABLED and len(order) > 1:
+        return await _call_hedged(order, messages, task)
+
+    errors: Dict[str, Exception] = {}
+    for i, provider in enumerate(order):
+        try:
+            return await _call_one(provider, messages, task)
+        except Exception as e:
+            errors[provider] = e
+            if i < len(order) - 1:
+                _counters["failovers"] += 1
+    raise _primary_error(errors)
+
+
+def _primary_error(errors: Dict[str, Exception]) -> Exception:
+    """A fallback that is down too would only hide why the primary failed."""
+    return errors.get(primary_provider()) or next(iter(errors.values()))
+
+
+async def _call_hedged(order: List[str], messages: List[Dict[str, str]], task: str) -> str:
+    primary, secondary = order[0], order[1]
+    limiter = get_providers().limiters[primary]
+    delay = max(settings.AI_HEDGE_MIN_DELAY, limiter.latency.percentile(0.95))
+
+    first = asyncio.create_task(_call_one(primary, messages, task))
+    second = None
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if first in done and first.exception() is None:
+            return first.result()
+
+        first_failed = first in done
+        pending = set() if first_failed else {first}
+        if first_failed:
+            _counters["failovers"] += 1
+        else:
+            _counters["hedges"] += 1
+        second = asyncio.create_task(_call_one(secondary, messages, task))
+        pending.add(second)
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task_ in done:
+                if task_.exception() is None:
+                    if task_ is second and not first_failed:
+                        _counters["hedge_wins"] += 1
+                    return task_.result()
+        raise _primary_error({primary: first.exception(), secondary: second.exception()})
+    finally:
+        # Losers, and both calls when our caller is cancelled
+        for task_ in (first, second):
+            if task_ is not None and not task_.done():
+                task_.cancel()
+
+
+async def route_stream(messages: List[Dict[str, str]], task: str = "chat") -> AsyncIterator[str]:
+    """Stream from the best provider; fail over only before the first token."""
+    order = ranked_providers()
+    errors: Dict[str, Exception] = {}
+    for i, provider in enumerate(order):
+        started = False
+        try:
+            async for delta in _stream_fn(provider)(messages, choose_model(provider, task, messages)):
+                started = True
+                yield delta
+            return
+        except Exception as e:
+            if started:
+                raise
+            errors[provider] = e
+            if i < len(order) - 1:
+                _counters["failovers"] += 1
+    raise _primary_error(errors)
+
+
+def check_capacity():
+    """Raise ProviderSaturated when no candidate provider can take more work."""
+    if all_saturated():
+        for provider in candidate_providers():
+            get_providers().limiters[provider].rejected += 1
+        raise ProviderSaturated(primary_provider())
+
+
+# ---------- embeddings (micro-batched) ----------
+class EmbeddingBatcher:
+    def __init__(self):
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= settings.AI_BATCH_MAX_SIZE:
+            self._schedule_flush(0)
+        elif self._timer is None:
+            self._schedule_flush(settings.AI_BATCH_WINDOW_MS / 1000)
+        return await future
+
+    def _schedule_flush(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(delay, lambda: loop.create_task(self._flush()))
+
+    async def _flush(self):
+        self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        _counters["embed_batches"] += 1
+        _counters["embed_items"] += len(batch)
+        try:
+            # Embeddings stay on the primary provider: vectors from different
+            # models are not comparable in the semantic cache
+            if primary_provider() == "ollama":
+                from app.integrations.ollama_client import ollama_embed as embed_batch
+            else:
+                from app.integrations.openai_client import openai_embed as embed_batch
+            vectors = await embed_batch([text for text, _ in batch])
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+            if len(vectors) != len(batch):
+                missing = RuntimeError(f"embedding provider returned {len(vectors)} vectors for {len(batch)} inputs")
+                for _, future in batch[len(vectors):]:
+                    if not future.done():
+                        future.set_exception(missing)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, EmbeddingBatcher]" = weakref.WeakKeyDictionary()
+
+
+async def route_embed(text: str) -> List[float]:
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = EmbeddingBatcher()
+    return await batcher.embed(text)
+
+
+def routing_stats() -> Dict[str, Any]:
+    return {
+        "order": ranked_providers(),
+        "healthy": {p: is_healthy(p) for p in candidate_providers()},
+        **_counters,
+    }
@@ -1,20 +1,64 @@
 """
 Ollama Client – local LLM via Ollama REST API
 """
+import json
 import httpx
 from app.core.config import settings
-from typing import List, Dict
+from app.core.metrics import record_llm_tokens
+from app.integrations.llm_providers import get_providers
+from typing import AsyncIterator, List, Dict
 
 
 async def ollama_chat(messages: List[Dict[str, str]], model: str | None = None) -> str:
-    url = f"{settings.OLLAMA_BASE_URL}/api/chat"
+    providers = get_providers()
+    model = model or settings.OLLAMA_MODEL
     payload = {
-        "model": model or settings.OLLAMA_MODEL,
+        "model": model,
         "messages": messages,
         "stream": False,
     }
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        resp = await client.post(url, json=payload)
+    async with providers.slot("ollama", model):
+        resp = await providers.ollama_http.post("/api/chat", json=payload)
         resp.raise_for_status()
         data = resp.json()
-        return data.get("message", {}).get("content", "")
+    record_llm_tokens("ollama", model, data.get("prompt_eval_count"), data.get("eval_count"))
+    return data.get("message", {}).get("content", "")
+
+
+async def ollama_chat_stream(messages: List[Dict[str, str]], model: str | None = None) -> AsyncIterator[str]:
+    """Yield content deltas as Ollama produces them (NDJSON stream)."""
+    providers = get_providers()
+    model = model or settings.OLLAMA_MODEL
+    payload = {
+        "model": model,
+        "messages": messages,
+        "stream": True,
+    }
+    async with providers.slot("ollama", model):
+        timeout = httpx.Timeout(120.0, connect=10.0, read=None)
+        async with providers.ollama_http.stream("POST", "/api/chat", json=payload, timeout=timeout) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(data["error"])
+                delta = data.get("message", {}).get("content", "")
+                if delta:
+                    yield delta
+                if data.get("done"):
+                    record_llm_tokens("ollama", model, data.get("prompt_eval_count"), data.get("eval_count"))
+                    break
+
+
+async def ollama_embed(texts: List[str], model: str | None = None) -> List[List[float]]:
+    """Embed a batch of texts in one call (Ollama /api/embed)."""
+    providers = get_providers()
+    model = model or settings.OLLAMA_EMBED_MODEL
+    async with providers.slot("ollama", model):
+        resp = await providers.ollama_http.post("/api/embed", json={"model": model, "input": texts})
+        resp.raise_for_status()
+        data = resp.json()
+    record_llm_tokens("ollama", model, data.get("prompt_eval_count"), None)
+    return data.get("embeddings", [])
@@ -3,24 +3,53 @@ OpenAI Client – chat completion wrapper
 """
 from openai import AsyncOpenAI
 from app.core.config import settings
-from typing import List, Dict
-
-_client = None
+from app.core.metrics import record_llm_tokens
+from app.integrations.llm_providers import get_providers
+from typing import AsyncIterator, List, Dict
 
 
 def _get_client() -> AsyncOpenAI:
-    global _client
-    if _client is None:
-        _client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    return _client
+    # Shares the provider layer's keep-alive connection pool
+    return get_providers().openai
 
 
 async def openai_chat(messages: List[Dict[str, str]], model: str | None = None) -> str:
-    client = _get_client()
-    resp = await client.chat.completions.create(
-        model=model or settings.OPENAI_MODEL,
-        messages=messages,
-        temperature=0.7,
-        max_tokens=2048,
-    )
+    model = model or settings.OPENAI_MODEL
+    async with get_providers().slot("openai", model):
+        resp = await _get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=2048,
+        )
+    if resp.usage:
+        record_llm_tokens("openai", model, resp.usage.prompt_tokens, resp.usage.completion_tokens)
     return resp.choices[0].message.content or ""
+
+
+async def openai_chat_stream(messages: List[Dict[str, str]], model: str | None = None) -> AsyncIterator[str]:
+    model = model or settings.OPENAI_MODEL
+    async with get_providers().slot("openai", model):
+        stream = await _get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=2048,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            if chunk.usage:  # final chunk, no choices
+                record_llm_tokens("openai", model, chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+async def openai_embed(texts: List[str], model: str | None = None) -> List[List[float]]:
+    """Embed a batch of texts in one call."""
+    model = model or settings.OPENAI_EMBED_MODEL
+    async with get_providers().slot("openai", model):
+        resp = await _get_client().embeddings.create(model=model, input=texts)
+    if resp.usage:
+        record_llm_tokens("openai", model, resp.usage.prompt_tokens, None)
+    return [item.embedding for item in sorted(resp.data, key=lambda d: d.index)]
@@ -0,0 +1,482 @@
+"""
+Pipeline Runner – 여러 단계를 DAG로 연결한 자동화 (병렬 분기 + 산출물 참조 전달 + 재실행 시 이어서)
+
+config example:
+{
+    "steps": [
+        {"id": "a", "type": "web_scrape", "config": {"url": "https://a.example", "selector": "table", "extract": "table"}},
+        {"id": "b", "type": "web_scrape", "config": {"url": "https://b.example", "selector": "table", "extract": "table"}},
+        {"id": "merged", "type": "merge", "inputs": ["a", "b"]},
+        {"id": "clean", "type": "excel_process", "inputs": ["merged"],
+         "config": {"operations": ["dropna", "dedup", {"op": "join", "input": "codes", "on": "id"}]}},
+        {"id": "report", "type": "ai_document", "inputs": ["clean"],
+         "config": {"doc_type": "report", "title": "주간 수집 보고서", "content_prompt": "핵심 변동 사항을 요약"}}
+    ],
+    "max_parallel": 4             # steps running at once (≤ PIPELINE_MAX_PARALLEL)
+}
+
+step types:
+  - any registered automation type (web_scrape, excel_process, plugins)
+  - merge        : upstream rows concatenated, with a "_source" column
+  - ai_document  : ai_generate_document over the upstream data; saved as a Document
+
+A step starts once all its "inputs" are done; independent branches run in
+parallel in a thread pool. web_scrape steps share the process's BrowserPool.
+
+Steps hand each other artifact handles, not data:
+
+  {"kind": "blob", "ref": ..., "size": ...}   JSON result in the blob store
+  {"kind": "file", "path": ..., "size": ...}  a workbook / CSV on the uploads volume
+
+An excel_process step takes its first input as file_path. A table artifact is
+written as CSV once, named by its blob ref. Join operations can name another
+step with {"op": "join", "input": "<step id>"}. A handle is loaded at most
+once per run, and the run result holds only handles and row counts.
+
+Every finished step is recorded under PIPELINE_DIR/state/<automation id>/<run
+id>.json, so concurrent runs of one automation never share a record. The key
+is the step's type, config and input artifacts. A rerun after a failure
+reuses the steps recorded by the automation's failed runs (for
+PIPELINE_RESUME_TTL_HOURS) and starts at the failed one; a requeued run
+picks up its own record. A run that succeeds drops its record and those it
+resumed from, so the next run scrapes fresh data.
+
+Files on disk:
+
+  runs/<run id>/      step outputs; removed when the run succeeds (sink
+                      outputs move to outputs/<run id>/ first), kept while a
+                      failed run is resumable, swept after the resume TTL
+  tables/<ref>.csv    CSV copies of table artifacts, shared by runs; removed
+                      once unused for PIPELINE_TABLE_TTL_HOURS
+  state/              resume records, swept after the resume TTL
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core.metrics import span
+from app.integrations.blob_store import get_blob_store, read_blob
+
+PIPELINE_STEP_TYPES = ("merge", "ai_document")
+
+
+# ---------- config ----------
+def parse_pipeline(config: dict) -> List[dict]:
+    """Steps in a valid execution order; ValueError on a bad config."""
+    from app.workers.registry import find_handler
+
+    steps = config.get("steps")
+    if not isinstance(steps, list) or not steps:
+        raise ValueError("config.steps must be a non-empty list")
+    if len(steps) > settings.PIPELINE_MAX_STEPS:
+        raise ValueError(f"Too many steps ({len(steps)} > {settings.PIPELINE_MAX_STEPS})")
+
+    by_id: Dict[str, dict] = {}
+    for step in steps:
+        if not isinstance(step, dict) or not step.get("id") or not step.get("type"):
+            raise ValueError("every step needs an id and a type")
+        step_id, step_type = str(step["id"]), step["type"]
+        if step_id in by_id:
+            raise ValueError(f"duplicate step id: {step_id}")
+        if step_type == "pipeline" or (step_type not in PIPELINE_STEP_TYPES and find_handler(step_type) is None):
+            raise ValueError(f"step {step_id}: unsupported type {step_type!r}")
+        inputs = [str(i) for i in step.get("inputs", [])]
+        inputs += [i for i in _join_inputs(step) if i not in inputs]
+        by_id[step_id] = {"id": step_id, "type": step_type, "config": step.get("config") or {}, "inputs": inputs}
+
+    for step in by_id.values():
+        for dep in step["inputs"]:
+            if dep not in by_id:
+                raise ValueError(f"step {step['id']}: unknown input {dep!r}")
+        if step["type"] == "merge" and not step["inputs"]:
+            raise ValueError(f"step {step['id']}: merge needs inputs")
+
+    # Kahn's algorithm; what is left over is on a cycle
+    remaining = {sid: set(s["inputs"]) for sid, s in by_id.items()}
+    order: List[dict] = []
+    while remaining:
+        ready = [sid for sid, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"steps form a cycle: {', '.join(sorted(remaining))}")
+        for sid in ready:
+            order.append(by_id[sid])
+            del remaining[sid]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+
+def _join_inputs(step: dict) -> List[str]:
+    operations = (step.get("config") or {}).get("operations") or []
+    return [str(op["input"]) for op in operations if isinstance(op, dict) and op.get("input")]
+
+
+# ---------- artifacts ----------
+def _blob_artifact(value: Any, **extra) -> dict:
+    data = json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+    return {"kind": "blob", "ref": get_blob_store().put(data), "size": len(data), **extra}
+
+
+def _file_artifact(path: str, **extra) -> dict:
+    return {"kind": "file", "path": path, "size": os.path.getsize(path), **extra}
+
+
+def _artifact_identity(artifact: dict) -> str:
+    if artifact["kind"] == "blob":
+        return artifact["ref"]
+    st = os.stat(artifact["path"])
+    return f"{artifact['path']}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def _artifact_exists(artifact: dict) -> bool:
+    if artifact["kind"] == "file":
+        return os.path.exists(artifact["path"])
+    return True  # blobs are never deleted
+
+
+def _rows(value: Any) -> List[Any]:
+    """Table rows of a loaded result (a scrape result, a merge, or a plain list)."""
+    if isinstance(value, dict):
+        # An incremental web_scrape step passes on its new rows
+        value = value.get("data", value.get("added", []))
+    return value if isinstance(value, list) else [value]
+
+
+class _Artifacts:
+    """Loaded artifact values of one run, so each handle is read at most once."""
+
+    def __init__(self, run_dir: str):
+        self.run_dir = run_dir
+        self._values: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def load(self, artifact: dict) -> Any:
+        key = _artifact_identity(artifact)
+        with self._lock:
+            if key not in self._values:
+                if artifact["kind"] == "blob":
+                    self._values[key] = json.loads(read_blob(artifact["ref"], artifact["size"]))
+                else:
+                    self._values[key] = artifact  # files are opened by path
+            return self._values[key]
+
+    def rows(self, artifact: dict) -> List[Any]:
+        if artifact["kind"] == "file":
+            from app.integrations.columnar_cache import load_frame
+            return load_frame(artifact["path"]).to_dict("records")
+        return _rows(self.load(artifact))
+
+    def as_file(self, artifact: dict) -> str:
+        """A path for `artifact`: files as they are, tables written once as CSV."""
+        if artifact["kind"] == "file":
+            return artifact["path"]
+        import pandas as pd
+        path = os.path.join(settings.PIPELINE_DIR, "tables", f"{artifact['ref']}.csv")
+        try:
+            os.utime(path)  # in use: keeps it from the tables/ sweep
+        except FileNotFoundError:
+            rows = self.rows(artifact)
+            df = pd.DataFrame(rows if rows and isinstance(rows[0], dict) else {"value": rows})
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+            df.to_csv(tmp, index=False, encoding="utf-8-sig")
+            os.replace(tmp, path)
+        return path
+
+    def as_text(self, artifact: dict, limit: int) -> str:
+        if artifact["kind"] == "file":
+            from app.integrations.columnar_cache import load_frame
+            head = load_frame(artifact["path"]).head(200).to_csv(index=False)
+            summary = artifact.get("summary")
+            text = (f"요약 통계: {json.dumps(summary, ensure_ascii=False, default=str)}\n" if summary else "") + head
+        else:
+            value = self.load(artifact)
+            if isinstance(value, dict) and "text" in value:
+                text = value["text"]
+            else:
+                text = "\n".join(json.dumps(r, ensure_ascii=False, default=str) for r in self.rows(artifact)[:500])
+        return text[:limit]
+
+
+# ---------- resume state ----------
+class _ResumeState:
+    """Finished steps of this run and of the automation's failed runs: step key → artifact."""
+
+    def __init__(self, automation_id: str, run_id: str):
+        self.dir = os.path.join(settings.PIPELINE_DIR, "state", automation_id)
+        self.path = os.path.join(self.dir, f"{run_id}.json")
+        self._lock = threading.Lock()
+        self.steps: Dict[str, dict] = {}     # written by this run (or its earlier attempt, when requeued)
+        self.previous: Dict[str, dict] = {}  # left by failed runs, read only
+        self.sources: List[str] = []         # their record files
+        cutoff = time.time() - settings.PIPELINE_RESUME_TTL_HOURS * 3600
+        try:
+            names = [n for n in os.listdir(self.dir) if n.endswith(".json")]
+        except FileNotFoundError:
+            names = []
+        for name in sorted(names, key=lambda n: self._mtime(os.path.join(self.dir, n))):  # newest wins
+            path = os.path.join(self.dir, name)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            steps = {k: v for k, v in record.get("steps", {}).items() if v.get("finished", 0) >= cutoff}
+            if path == self.path:
+                self.steps = steps
+            elif record.get("status") == "failed":  # a running one may still be writing its artifacts
+                self.previous.update(steps)
+                self.sources.append(path)
+
+    @staticmethod
+    def _mtime(path: str) -> float:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0.0
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.steps.get(key) or self.previous.get(key)
+        if entry is None or not _artifact_exists(entry["artifact"]):
+            return None
+        return entry["artifact"]
+
+    def put(self, key: str, artifact: dict):
+        with self._lock:
+            self.steps[key] = {"artifact": artifact, "finished": time.time()}
+            self._write("running")
+
+    def fail(self):
+        with self._lock:
+            self._write("failed")
+
+    def _write(self, status: str):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"status": status, "steps": self.steps}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        """Drop this run's record and the failed ones it resumed from; their runs/ dirs go with the sweep."""
+        for path in [self.path] + self.sources:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _sweep_pipeline_dir():
+    """Remove abandoned run dirs and resume records, and CSV tables nobody used lately."""
+    now = time.time()
+    resume_cutoff = now - settings.PIPELINE_RESUME_TTL_HOURS * 3600
+    table_cutoff = now - settings.PIPELINE_TABLE_TTL_HOURS * 3600
+    for sub, cutoff in (("runs", resume_cutoff), ("state", resume_cutoff), ("tables", table_cutoff)):
+        root = os.path.join(settings.PIPELINE_DIR, sub)
+        try:
+            entries = list(os.scandir(root))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if sub == "state":
+                        for name in os.listdir(entry.path):
+                            path = os.path.join(entry.path, name)
+                            if os.path.getmtime(path) < cutoff:
+                                os.remove(path)
+                    elif entry.stat().st_mtime < cutoff:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                elif entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass  # removed by a concurrent sweep
+
+
+def _keep_outputs(run_id: str, outputs: Dict[str, dict]) -> Dict[str, dict]:
+    """Move sink files out of the run dir, which is about to be removed."""
+    kept = {}
+    for step_id, artifact in outputs.items():
+        if artifact["kind"] == "file" and os.path.exists(artifact["path"]):
+            target_dir = os.path.join(settings.PIPELINE_DIR, "outputs", run_id)
+            os.makedirs(target_dir, exist_ok=True)
+            target = os.path.join(target_dir, os.path.basename(artifact["path"]))
+            shutil.move(artifact["path"], target)
+            artifact = {**artifact, "path": target}
+        kept[step_id] = artifact
+    return kept
+
+
+def _step_key(step: dict, inputs: List[dict]) -> str:
+    payload = {"type": step["type"], "config": step["config"], "inputs": [_artifact_identity(a) for a in inputs]}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class _StepLog(list):
+    """Log lines of one step, prefixed and forwarded to the run's sink."""
+
+    def __init__(self, sink, step_id: str):
+        super().__init__()
+        self._sink = sink
+        self._prefix = f"[{step_id}] "
+
+    def append(self, line) -> None:
+        self._sink.append(self._prefix + str(line))
+
+    def extend(self, lines) -> None:
+        for line in lines:
+            self.append(line)
+
+
+# ---------- step execution ----------
+def _run_step(step: dict, inputs: List[dict], artifacts: _Artifacts, log: _StepLog, ctx) -> dict:
+    step_type, config = step["type"], dict(step["config"])
+
+    if step_type == "merge":
+        merged = []
+        for dep, artifact in zip(step["inputs"], inputs):
+            for row in artifacts.rows(artifact):
+                merged.append({"_source": dep, **row} if isinstance(row, dict) else {"_source": dep, "value": row})
+        log.append(f"[병합] 입력 {len(inputs)}개 → {len(merged)}행")
+        return _blob_artifact({"count": len(merged), "data": merged}, rows=len(merged))
+
+    if step_type == "ai_document":
+        return _ai_document(step, config, inputs, artifacts, log, ctx)
+
+    from app.workers.registry import get_handler
+    by_id = dict(zip(step["inputs"], inputs))
+    if step_type == "excel_process":
+        primary = [a for dep, a in by_id.items() if dep not in _join_inputs(step)]
+        if primary:
+            config["file_path"] = artifacts.as_file(primary[0])
+        config["operations"] = [
+            {**{k: v for k, v in op.items() if k != "input"}, "file_path": artifacts.as_file(by_id[str(op["input"])])}
+            if isinstance(op, dict) and op.get("input") else op
+            for op in config.get("operations", ["summary"])
+        ]
+        if not config.get("output_path"):
+            config["output_path"] = os.path.join(artifacts.run_dir, f"{step['id']}.xlsx")
+    elif inputs:
+        config["inputs"] = inputs  # plugin types get the handles
+
+    result = get_handler(step_type).invoke(config, log, ctx) or {}
+    if step_type == "excel_process" and result.get("output_path"):
+        return _file_artifact(result["output_path"], rows=result.get("rows"), summary=result.get("summary"))
+    return _blob_artifact(result, rows=result.get("count"))
+
+
+def _ai_document(step: dict, config: dict, inputs: List[dict], artifacts: _Artifacts, log: _StepLog, ctx) -> dict:
+    from app.core.db import sync_sessionmaker
+    from app.integrations.ai_adapter import ai_generate_document
+    from app.integrations.llm_providers import run_with_providers
+    from app.integrations.blob_store import assign_document_output
+    from app.models import Automation, Document
+
+    doc_type = config.get("doc_type", "report")
+    title = config.get("title") or step["id"]
+    budget = settings.PIPELINE_AI_INPUT_CHARS // max(1, len(inputs))
+    sections = [f"[{dep}]\n{artifacts.as_text(a, budget)}" for dep, a in zip(step["inputs"], inputs)]
+    prompt = "\n\n".join([config.get("content_prompt", "")] + sections).strip()
+    log.append(f"[AI] {doc_type} 문서 생성 (입력 {len(prompt)}자)")
+
+    text = run_with_providers(lambda: ai_generate_document(doc_type, title, prompt))
+
+    session = sync_sessionmaker("worker")()
+    try:
+        auto = session.get(Automation, ctx.automation_id)
+        doc = Document(user_id=auto.user_id, doc_type=doc_type, title=title,
+                       input_payload={"content_prompt": config.get("content_prompt", ""),
+                                      "pipeline_run_id": ctx.run_id, "step": step["id"]})
+        assign_document_output(doc, text)
+        session.add(doc)
+        session.commit()
+        document_id = str(doc.id)
+    finally:
+        session.close()
+    log.append(f"[AI] 문서 저장: {document_id} ({len(text)}자)")
+    return _blob_artifact({"text": text, "document_id": document_id}, document_id=document_id)
+
+
+def run_pipeline(config: dict, log_lines: List[str], ctx) -> dict:
+    order = parse_pipeline(config)
+    max_parallel = max(1, min(int(config.get("max_parallel", 4)), settings.PIPELINE_MAX_PARALLEL))
+    run_dir = os.path.join(settings.PIPELINE_DIR, "runs", ctx.run_id)
+    _sweep_pipeline_dir()
+    os.makedirs(run_dir, exist_ok=True)
+
+    state = _ResumeState(ctx.automation_id, ctx.run_id)
+    artifacts = _Artifacts(run_dir)
+    done: Dict[str, dict] = {}       # step id → artifact
+    report: Dict[str, dict] = {}     # step id → status for the run result
+    pending = {s["id"]: s for s in order}
+    running = {}
+    failed: Optional[str] = None
+    log_lines.append(f"[시작] 파이프라인 {len(order)}단계 (동시 {max_parallel}단계)")
+
+    def execute(step: dict, inputs: List[dict], key: str) -> dict:
+        started = time.perf_counter()
+        with span("pipeline.step", step=step["id"], type=step["type"]):
+            artifact = _run_step(step, inputs, artifacts, _StepLog(log_lines, step["id"]), ctx)
+        state.put(key, artifact)
+        report[step["id"]] = {"status": "done", "seconds": round(time.perf_counter() - started, 3)}
+        return artifact
+
+    with ThreadPoolExecutor(max_parallel, thread_name_prefix="pipeline") as pool:
+        while pending or running:
+            if failed is None:
+                for step_id, step in list(pending.items()):
+                    if len(running) >= max_parallel:
+                        break
+                    if not all(dep in done for dep in step["inputs"]):
+                        continue
+                    del pending[step_id]
+                    inputs = [done[dep] for dep in step["inputs"]]
+                    key = _step_key(step, inputs)
+                    cached = state.get(key)
+                    if cached is not None:
+                        done[step_id] = cached
+                        report[step_id] = {"status": "resumed"}
+                        log_lines.append(f"[{step_id}] [재사용] 이전 실행 결과")
+                        continue
+                    log_lines.append(f"[{step_id}] [시작] {step['type']}")
+                    running[pool.submit(execute, step, inputs, key)] = step_id
+                if not running and pending and any(
+                        all(dep in done for dep in s["inputs"]) for s in pending.values()):
+                    continue  # resumed steps unblocked more work
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                step_id = running.pop(future)
+                try:
+                    done[step_id] = future.result()
+                    log_lines.append(f"[{step_id}] [완료] {report[step_id]['seconds']}초")
+                except Exception as e:
+                    report[step_id] = {"status": "failed", "error": str(e).splitlines()[0] if str(e) else repr(e)}
+                    log_lines.append(f"[{step_id}] [실패] {report[step_id]['error']}")
+                    failed = failed or step_id
+
+    for step_id in pending:
+        report[step_id] = {"status": "skipped"}
+    if failed is not None:
+        state.fail()  # run_dir stays while these steps can be resumed
+        resumable = sum(1 for r in report.values() if r["status"] in ("done", "resumed"))
+        raise RuntimeError(f"Pipeline step '{failed}' failed: {report[failed]['error']} "
+                           f"(다시 실행하면 완료된 {resumable}단계는 재사용)")
+
+    state.clear()
+    sinks = [s["id"] for s in order if not any(s["id"] in o["inputs"] for o in order)]
+    done.update(_keep_outputs(ctx.run_id, {sid: done[sid] for sid in sinks}))
+    shutil.rmtree(run_dir, ignore_errors=True)
+    resumed = sum(1 for r in report.values() if r["status"] == "resumed")
+    log_lines.append(f"[결과] {len(order)}단계 완료 (재사용 {resumed})")
+    return {
+        "steps": {sid: {**report[sid], "artifact": done[sid]} for sid in (s["id"] for s in order)},
+        "outputs": {sid: done[sid] for sid in sinks},
+    }
@@ -6,59 +6,538 @@ config example:
     "url": "https://example.com",
     "selector": "table",          # CSS selector to extract
     "wait_for": "table",          # optional: wait for this selector
-    "extract": "text"             # "text" | "html" | "table"
+    "extract": "text"             # "text" | "html" | "table" | "fields"
 }
+
+field mapping (extract "fields", the default when "fields" is given):
+{
+    "selector": ".product",       # one output row per match
+    "fields": {
+        "name": "h2",                             # innerText of the first match inside
+        "link": "a@href",                         # attribute of it
+        "id": "@data-id",                         # attribute of the matched element itself
+        "desc": {"selector": ".desc", "attr": "html"}  # attr: "text" | "html" | any attribute
+    }
+}
+    Missing elements / attributes give null. Every mode is extracted with one
+    eval_on_selector_all call per page instead of one round trip per element.
+
+page loading (browser engine):
+{
+    "wait_until": "domcontentloaded",  # "load" (default) | "domcontentloaded" | "networkidle" | "commit"
+    "block_resources": ["image", "media", "font"],  # Playwright resource types to abort
+    "block_third_party": true,    # abort requests to other sites than the page's
+    "block_domains": ["googletagmanager.com"]     # and these hosts (subdomains included)
+}
+
+multi-URL mode (instead of "url"):
+{
+    "urls": ["https://example.com/a", "https://example.com/b"],
+    # or
+    "url_template": "https://example.com/list?page={page}",
+    "page_range": [1, 50],        # inclusive; optional third item = step
+
+    "concurrency": 4,             # pages open at once (≤ SCRAPE_MAX_CONCURRENCY)
+    "rate_limit_per_host": 2.0,   # requests / second per host (0 = unlimited)
+    "retries": 2,                 # extra attempts per URL
+    "retry_backoff": 1.0          # seconds, doubled on every retry
+}
+
+engine (optional):
+    "browser"   headless Chromium (default)
+    "http"      pooled HTTP client + HTML parser, no JavaScript (http_scraper.py)
+    "auto"      HTTP first, Chromium when the wait_for selector is not in the static HTML
+
+incremental mode (scheduled monitoring):
+{
+    "incremental": true,          # conditional fetch + content hash per URL
+    "key": "id"                   # optional: column(s) identifying a row → "changed" rows
+}
+    The result then holds only added / removed / changed rows against the
+    previous successful run (see scrape_state.py).
+
+Pages are opened in an isolated context on the shared, warm browser pool
+(see browser_pool.py) instead of launching Chromium per run.
 """
-from playwright.sync_api import sync_playwright
-from typing import List, Dict, Any
-import json
+import asyncio
+import ipaddress
+import random
+from functools import lru_cache
+from typing import List, Dict, Any, NamedTuple, Optional
+from urllib.parse import urlsplit
+from app.core.config import settings
+from app.core.metrics import BROWSER_PHASE, timed
+from app.integrations.browser_pool import get_browser_pool
+from app.integrations.http_scraper import NeedsBrowser, get_http_fetcher, scrape_http, unsupported_selector
 
+ENGINES = ("browser", "http", "auto")
+WAIT_UNTIL = ("load", "domcontentloaded", "networkidle", "commit")
+BLOCKABLE = ("stylesheet", "image", "media", "font", "script", "texttrack", "xhr", "fetch",
+             "eventsource", "websocket", "manifest", "other")
+# Public suffixes of two labels, for _site when tldextract is not installed
+SECOND_LEVEL_SUFFIXES = frozenset({
+    "co.kr", "go.kr", "or.kr", "ac.kr", "ne.kr", "re.kr", "pe.kr", "mil.kr", "hs.kr", "ms.kr", "es.kr", "sc.kr",
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "ltd.uk", "plc.uk", "me.uk", "net.uk",
+    "co.jp", "ne.jp", "or.jp", "ac.jp", "go.jp",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "com.cn", "net.cn", "org.cn", "gov.cn", "com.tw", "com.hk", "com.sg", "co.nz", "co.in", "com.br", "co.za",
+})
 
-def run_web_scrape(config: dict, log_lines: List[str]) -> dict:
-    url = config.get("url", "")
+
+class PageOptions(NamedTuple):
+    wait_until: str = "load"
+    fields: Optional[list] = None            # [[name, selector, attr], ...] for extract "fields"
+    block_resources: frozenset = frozenset()
+    block_third_party: bool = False
+    block_domains: tuple = ()
+
+    @property
+    def blocking(self) -> bool:
+        return bool(self.block_resources or self.block_third_party or self.block_domains)
+
+
+def run_web_scrape(config: dict, log_lines: List[str], ctx=None) -> dict:
     selector = config.get("selector", "body")
     wait_for = config.get("wait_for", selector)
-    extract_mode = config.get("extract", "text")
+    extract_mode = config.get("extract", "fields" if config.get("fields") else "text")
+    options = _page_options(config, extract_mode)
+    _check_http_selectors(config, selector, wait_for, options)
+    states = _incremental_states(config, ctx)
 
+    if config.get("urls") or config.get("url_template"):
+        return _run_multi(config, selector, wait_for, extract_mode, log_lines, states, options)
+
+    url = config.get("url", "")
     if not url:
         raise ValueError("config.url is required")
 
+    engine = _engine(config)
     log_lines.append(f"[시작] URL: {url}")
-    log_lines.append(f"[설정] selector={selector}, extract={extract_mode}")
+    log_lines.append(f"[설정] selector={selector}, extract={extract_mode}, engine={engine}")
+    fetch = None
+    if states is not None:
+        states.load([url])
+        fetch = states.fetch(url)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(url, timeout=30000)
-        log_lines.append("[브라우저] 페이지 로딩 완료")
+    use_browser = engine == "browser"
+    if not use_browser:
+        try:
+            data = get_http_fetcher().run(
+                lambda client: scrape_http(client, url, selector, wait_for, extract_mode, log_lines, fetch,
+                                           options.fields))
+        except NeedsBrowser as e:
+            if engine == "http":
+                raise RuntimeError(f"engine=http cannot scrape this page: {e}")
+            log_lines.append(f"[엔진] 브라우저로 전환: {e}")
+            use_browser = True
 
-        if wait_for:
-            page.wait_for_selector(wait_for, timeout=15000)
-            log_lines.append(f"[대기] '{wait_for}' 요소 로딩 완료")
-
-        if extract_mode == "html":
-            elements = page.query_selector_all(selector)
-            data = [el.inner_html() for el in elements]
-        elif extract_mode == "table":
-            # Extract table data as list of dicts
-            data = _extract_table(page, selector)
-        else:
-            elements = page.query_selector_all(selector)
-            data = [el.inner_text() for el in elements]
+    async def scrape(context):
+        return await _scrape_url(context, url, selector, wait_for, extract_mode, log_lines, fetch, options)
 
+    if use_browser:
+        data = get_browser_pool().run(scrape, log_lines)
+    if states is None:
         log_lines.append(f"[결과] {len(data)}건 수집 완료")
-        browser.close()
+        return {"count": len(data), "data": data}
+
+    change = states.diff(url, data, fetch)
+    states.save()
+    _log_change(log_lines, change)
+    return {"incremental": True, **change}
+
+
+def _engine(config: dict) -> str:
+    engine = config.get("engine", "browser")
+    if engine not in ENGINES:
+        raise ValueError(f"config.engine must be one of {', '.join(ENGINES)}")
+    return engine
+
+
+def _check_http_selectors(config: dict, selector: str, wait_for: str, options: "PageOptions"):
+    """engine=http has no browser to fall back to: Playwright-only selectors are a config error."""
+    if _engine(config) != "http":
+        return
+    try:
+        bad = unsupported_selector([wait_for, selector] + [f[1] for f in options.fields or ()])
+    except NeedsBrowser:
+        return  # selectolax missing: the run reports it
+    if bad is not None:
+        raise ValueError(f"'{bad}' is Playwright selector syntax, which engine=http cannot run; "
+                         f"use a CSS selector or engine=auto / browser")
+
+
+def validate_web_scrape(config: dict):
+    """Registry validate hook: config errors become a 422 when the automation is saved."""
+    selector = config.get("selector", "body")
+    extract_mode = config.get("extract", "fields" if config.get("fields") else "text")
+    options = _page_options(config, extract_mode)
+    _check_http_selectors(config, selector, config.get("wait_for", selector), options)
+
+
+def _string_list(config: dict, name: str) -> List[str]:
+    value = config.get(name) or []
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"config.{name} must be a list of strings")
+    return value
+
+
+def _page_options(config: dict, extract_mode: str) -> PageOptions:
+    wait_until = config.get("wait_until", "load")
+    if wait_until not in WAIT_UNTIL:
+        raise ValueError(f"config.wait_until must be one of {', '.join(WAIT_UNTIL)}")
+    blocked = frozenset(_string_list(config, "block_resources"))
+    unknown = blocked - set(BLOCKABLE)
+    if unknown:
+        raise ValueError(f"config.block_resources: unknown resource types {', '.join(sorted(unknown))}")
+    block_third_party = config.get("block_third_party", False)
+    if not isinstance(block_third_party, bool):  # "false" would otherwise turn blocking on
+        raise ValueError("config.block_third_party must be true or false")
+    fields = None
+    if extract_mode == "fields":
+        fields = _parse_fields(config.get("fields"))
+    return PageOptions(
+        wait_until=wait_until,
+        fields=fields,
+        block_resources=blocked,
+        block_third_party=block_third_party,
+        block_domains=tuple(d.lower().lstrip(".") for d in _string_list(config, "block_domains")),
+    )
+
+
+def _parse_fields(fields) -> list:
+    """config.fields → [[name, selector, attr], ...]; selector "" is the matched element itself."""
+    if not isinstance(fields, dict) or not fields:
+        raise ValueError("config.fields must map output names to selectors for extract=fields")
+    out = []
+    for name, spec in fields.items():
+        if isinstance(spec, str):
+            selector, _, attr = spec.partition("@")
+            out.append([name, selector.strip(), attr.strip() or "text"])
+        elif isinstance(spec, dict):
+            out.append([name, str(spec.get("selector", "")).strip(), spec.get("attr") or "text"])
+        else:
+            raise ValueError(f"config.fields.{name}: expected a selector string or {{selector, attr}}")
+    return out
+
+
+def _incremental_states(config: dict, ctx):
+    if not config.get("incremental"):
+        return None
+    if ctx is None:
+        raise ValueError("incremental mode needs a saved automation")
+    from app.core.db import sync_sessionmaker
+    from app.integrations.scrape_state import ScrapeStates
+    return ScrapeStates(ctx.automation_id, config, sync_sessionmaker("worker"))
+
+
+def _log_change(log_lines: List[str], change: dict):
+    if change.get("key_ignored"):
+        log_lines.append(f"[증분] key로 행을 구분할 수 없음 ({change['key_ignored']}) → 내용 기준 비교")
+    if change["status"] == "not_modified":
+        log_lines.append("[증분] 304 Not Modified → 추출 생략")
+    elif change["status"] == "unchanged":
+        log_lines.append(f"[증분] 내용 변화 없음 ({change['count']}건)")
+    else:
+        log_lines.append(f"[증분] {change['count']}건 중 추가 {len(change['added'])} / "
+                         f"삭제 {len(change['removed'])} / 변경 {len(change['changed'])}")
+
+
+def _run_multi(config: dict, selector: str, wait_for: str, extract_mode: str, log_lines: List[str],
+               states=None, options: PageOptions = PageOptions()) -> dict:
+    urls = _expand_urls(config)
+    if states is not None:
+        states.load(urls)
+    engine = _engine(config)
+    limit = settings.HTTP_SCRAPE_MAX_CONCURRENCY if engine != "browser" else settings.SCRAPE_MAX_CONCURRENCY
+    concurrency = max(1, min(int(config.get("concurrency", 4)), limit))
+    retries = max(0, int(config.get("retries", 2)))
+    backoff = float(config.get("retry_backoff", 1.0))
+    rate = float(config.get("rate_limit_per_host", 0))
+
+    log_lines.append(f"[시작] URL {len(urls)}개 (동시 {concurrency}페이지, 재시도 {retries}회)")
+    log_lines.append(f"[설정] selector={selector}, extract={extract_mode}, engine={engine}")
+
+    results: List[Any] = [None] * len(urls)
+    flushed = 0
+
+    def flush_in_order():
+        # Emit progress strictly in URL order as the finished prefix grows
+        nonlocal flushed
+        while flushed < len(urls) and results[flushed] is not None:
+            r = results[flushed]
+            flushed += 1
+            if "error" in r:
+                log_lines.append(f"[{flushed}/{len(urls)}] {r['url']} 실패: {r['error']}")
+            elif r["data"] is None:
+                log_lines.append(f"[{flushed}/{len(urls)}] {r['url']} → 304 변경 없음")
+            else:
+                log_lines.append(f"[{flushed}/{len(urls)}] {r['url']} → {r['count']}건")
+
+    def scrape_batch(indexes: List[int], scrape, fallback: Dict[int, str]):
+        """Scrape urls[i] for i in `indexes` with scrape(handle, url, fetch); `handle` is a browser context or an HTTP client."""
+        async def scrape_all(handle):
+            semaphore = asyncio.Semaphore(concurrency)
+            limiter = _HostRateLimiter(rate)
+
+            async def scrape_one(index: int):
+                url = urls[index]
+                async with semaphore:
+                    for attempt in range(retries + 1):
+                        await limiter.wait(url)
+                        fetch = states.fetch(url) if states is not None else None
+                        try:
+                            data = await scrape(handle, url, fetch)
+                            results[index] = {"url": url, "count": len(data) if data is not None else 0,
+                                              "data": data, "fetch": fetch}
+                            break
+                        except NeedsBrowser as e:
+                            if engine == "auto":
+                                fallback[index] = str(e)  # left for the browser pass
+                                break
+                            results[index] = {"url": url, "count": 0, "data": [], "error": str(e)}
+                            break
+                        except Exception as e:
+                            if attempt == retries:
+                                error = (str(e).splitlines() or [repr(e)])[0]
+                                results[index] = {"url": url, "count": 0, "data": [], "error": error}
+                            else:
+                                await asyncio.sleep(backoff * (2 ** attempt) * (1 + random.random() * 0.25))
+                flush_in_order()
+
+            await asyncio.gather(*(scrape_one(i) for i in indexes))
+
+        return scrape_all
+
+    pending = list(range(len(urls)))
+    if engine != "browser":
+        fallback: Dict[int, str] = {}
+        get_http_fetcher().run(scrape_batch(pending, lambda client, url, fetch: scrape_http(
+            client, url, selector, wait_for, extract_mode, fetch=fetch, fields=options.fields), fallback))
+        pending = sorted(fallback)
+        if pending:
+            log_lines.append(f"[엔진] {len(pending)}개 URL 브라우저로 전환 (예: {fallback[pending[0]]})")
+    if pending:
+        get_browser_pool().run(scrape_batch(pending, lambda context, url, fetch: _scrape_url(
+            context, url, selector, wait_for, extract_mode, fetch=fetch, options=options), {}), log_lines)
+
+    failed = sum(1 for r in results if "error" in r)
+    if failed == len(results):
+        raise RuntimeError(f"All {failed} URLs failed; first error: {results[0]['error']}")
+
+    if states is not None:
+        return _multi_changes(results, failed, states, log_lines)
+
+    data = [item for r in results for item in r["data"]]
+    pages = [{k: v for k, v in r.items() if k not in ("data", "fetch")} for r in results]
+    log_lines.append(f"[결과] {len(data)}건 수집 완료 (성공 {len(results) - failed} / 실패 {failed})")
+
+    return {"count": len(data), "data": data, "pages": pages, "failed": failed}
+
+
+def _multi_changes(results: List[dict], failed: int, states, log_lines: List[str]) -> dict:
+    """Incremental result of a multi-URL run: changes of every URL, tagged with "_url"."""
+    out = {"incremental": True, "count": 0, "added": [], "removed": [], "changed": [], "pages": [], "failed": failed}
+    for r in results:
+        if "error" in r:
+            out["pages"].append({"url": r["url"], "status": "failed", "error": r["error"]})
+            continue  # keeps its old state: diffed against the same snapshot next time
+        change = states.diff(r["url"], r["data"], r["fetch"])
+        out["count"] += change["count"]
+        for kind in ("added", "removed", "changed"):
+            out[kind].extend({"_url": r["url"], **item} if isinstance(item, dict) else {"_url": r["url"], "value": item}
+                             for item in change[kind])
+        out["pages"].append({"url": r["url"], "status": change["status"], "count": change["count"],
+                             **{kind: len(change[kind]) for kind in ("added", "removed", "changed")}})
+        if change.get("key_ignored"):
+            out["pages"][-1]["key_ignored"] = change["key_ignored"]
+            log_lines.append(f"[증분] {r['url']}: key로 행을 구분할 수 없음 ({change['key_ignored']}) → 내용 기준 비교")
+    states.save()
+    skipped = sum(1 for p in out["pages"] if p["status"] in ("not_modified", "unchanged"))
+    log_lines.append(f"[증분] URL {len(results)}개 중 변화 없음 {skipped} / 추가 {len(out['added'])} / "
+                     f"삭제 {len(out['removed'])} / 변경 {len(out['changed'])}")
+    return out
+
+
+def _expand_urls(config: dict) -> List[str]:
+    urls = config.get("urls") or []
+    template = config.get("url_template", "")
+    if template:
+        page_range = config.get("page_range") or [1, 1]
+        if len(page_range) < 2:
+            raise ValueError("config.page_range must be [start, end] or [start, end, step]")
+        start, end = int(page_range[0]), int(page_range[1])
+        step = int(page_range[2]) if len(page_range) > 2 else 1
+        if step <= 0:
+            raise ValueError("config.page_range step must be positive")
+        urls = [template.format(page=n) for n in range(start, end + 1, step)]
+    if not urls:
+        raise ValueError("config.urls or config.url_template is required")
+    if len(urls) > settings.SCRAPE_MAX_URLS:
+        raise ValueError(f"Too many URLs ({len(urls)} > {settings.SCRAPE_MAX_URLS})")
+    return urls
+
+
+class _HostRateLimiter:
+    """Spaces out requests to the same host; reservations are made on the pool loop."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+
+    async def wait(self, url: str):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def _scrape_url(context, url: str, selector: str, wait_for: str, extract_mode: str,
+                      log_lines: List[str] | None = None, fetch=None, options: PageOptions = PageOptions()):
+    """Extracted items, or None when `fetch` carried validators and the server answered 304."""
+    page = await context.new_page()
+    try:
+        blocker = None
+        if options.blocking:
+            # Registered first, so the conditional route below sees the document before it
+            blocker = _RequestBlocker(url, options)
+            await page.route("**/*", blocker)
+        conditional = fetch is not None and bool(fetch.headers)
+        if conditional:
+            matcher = _same_document(url)
+            await page.route(matcher, _conditional_route(fetch))
+        with timed(BROWSER_PHASE, "browser.goto", phase="goto"):
+            response = await page.goto(url, timeout=30000, wait_until=options.wait_until)
+        if fetch is not None:
+            if conditional:
+                await page.unroute(matcher)  # later requests go straight through again
+            elif response is not None:
+                fetch.record(response.status, await response.all_headers())
+            if fetch.not_modified:
+                return None
+        if log_lines is not None:
+            log_lines.append("[브라우저] 페이지 로딩 완료")
+            if blocker is not None and blocker.blocked:
+                log_lines.append(f"[차단] 요청 {blocker.blocked}개 차단")
+
+        if wait_for:
+            with timed(BROWSER_PHASE, "browser.wait_for_selector", phase="wait_for_selector"):
+                await page.wait_for_selector(wait_for, timeout=15000)
+            if log_lines is not None:
+                log_lines.append(f"[대기] '{wait_for}' 요소 로딩 완료")
+
+        with timed(BROWSER_PHASE, "browser.extract", phase="extract"):
+            # One round trip per page: every match is read inside the page
+            if extract_mode == "html":
+                return await page.eval_on_selector_all(selector, "els => els.map(e => e.innerHTML)")
+            elif extract_mode == "table":
+                # Extract table data as list of dicts
+                return await _extract_table(page, selector)
+            elif extract_mode == "fields":
+                return await page.eval_on_selector_all(selector, _FIELDS_JS, options.fields)
+            else:
+                return await page.eval_on_selector_all(selector, "els => els.map(e => e.innerText)")
+    finally:
+        await page.close()
+
+
+_FIELDS_JS = """(els, fields) => els.map(el => {
+    const row = {};
+    for (const [name, selector, attr] of fields) {
+        const node = selector ? el.querySelector(selector) : el;
+        row[name] = !node ? null
+            : attr === "text" ? node.innerText.trim()
+            : attr === "html" ? node.innerHTML
+            : node.getAttribute(attr);
+    }
+    return row;
+})"""
+
+
+@lru_cache(maxsize=1)
+def _tld_extractor():
+    try:
+        import tldextract
+    except ImportError:
+        return None
+    # The bundled public suffix list snapshot: workers never download it
+    return tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+
+
+@lru_cache(maxsize=4096)
+def _site(host: str) -> str:
+    """Registrable domain of a host (cdn.example.io → example.io, news.naver.co.kr → naver.co.kr)."""
+    host = host.lower().rstrip(".")
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    extractor = _tld_extractor()
+    if extractor is not None:
+        return extractor(host).registered_domain or host
+    labels = host.split(".")
+    if len(labels) >= 3 and ".".join(labels[-2:]) in SECOND_LEVEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+class _RequestBlocker:
+    """Route handler aborting blocked sub-resources; the page's own navigation always passes."""
+
+    def __init__(self, page_url: str, options: PageOptions):
+        self.site = _site(urlsplit(page_url).hostname or "")
+        self.options = options
+        self.blocked = 0
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        host = (urlsplit(url).hostname or "").lower()
+        return (resource_type in self.options.block_resources
+                or (self.options.block_third_party and bool(host) and _site(host) != self.site)
+                or any(host == d or host.endswith("." + d) for d in self.options.block_domains))
+
+    async def __call__(self, route):
+        request = route.request
+        main_document = request.is_navigation_request() and request.frame.parent_frame is None
+        if not main_document and self.blocks(request.resource_type, request.url):
+            self.blocked += 1
+            return await route.abort("blockedbyclient")
+        await route.fallback()
+
+
+def _same_document(url: str):
+    target = url.split("#", 1)[0].rstrip("/")
+    return lambda candidate: candidate.split("#", 1)[0].rstrip("/") == target
+
+
+def _conditional_route(fetch):
+    """Route handler sending the navigation with the stored validators.
+
+    A 304 is answered with an empty page (no rendering, no sub-resources);
+    anything else is passed to the page unchanged.
+    """
+    async def handle(route):
+        if not route.request.is_navigation_request():
+            return await route.continue_()
+        response = await route.fetch(headers={**route.request.headers, **fetch.headers})
+        fetch.record(response.status, response.headers)
+        if response.status == 304:
+            return await route.fulfill(status=200, content_type="text/html", body="")
+        await route.fulfill(response=response)
 
-    return {"count": len(data), "data": data}
+    return handle
 
 
-def _extract_table(page, selector: str) -> List[Dict[str, str]]:
+async def _extract_table(page, selector: str) -> List[Dict[str, str]]:
     """Extract HTML table into list of dicts (header → value)."""
-    headers = page.eval_on_selector_all(
+    headers = await page.eval_on_selector_all(
         f"{selector} thead th",
         "els => els.map(e => e.innerText.trim())",
     )
-    rows = page.eval_on_selector_all(
+    rows = await page.eval_on_selector_all(
         f"{selector} tbody tr",
         """rows => rows.map(row => {
             const cells = row.querySelectorAll('td');
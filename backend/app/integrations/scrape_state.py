@@ -0,0 +1,202 @@
+"""
+Scrape State – 증분 수집: URL별 ETag/Last-Modified + 추출 결과 해시 + 행 단위 변경분
+
+With "incremental": true, web_scrape keeps one scrape_states row per
+(automation, URL, selector, extract mode, key). A row holds:
+
+  etag / last_modified   validators from the last response; the next
+                         navigation is sent with If-None-Match /
+                         If-Modified-Since, and a 304 skips the page load
+                         and the extraction
+  content_hash           sha256 of the extracted output; an equal hash means
+                         unchanged, and nothing is diffed or stored
+  snapshot_ref           the extracted rows, in the blob store, which the
+                         next change is diffed against
+
+The run result then holds only row-level changes against the last
+successful fetch: added and removed rows, and changed rows when
+config.key names the columns that identify a row (e.g. "id" or
+["date", "code"]). Without a key, a row is identified by its content, so an
+edit shows up as one removed row and one added row. The first run reports
+every row as added. A key only works when it is present in every row and
+unique: otherwise rows would be dropped, so the diff falls back to content
+and reports why under "key_ignored".
+
+State is written once the whole scrape has finished, so a failed run diffs
+against the same snapshot again next time. The write is an upsert, so two
+runs finishing together do not collide on the primary key.
+"""
+import hashlib
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from app.integrations.blob_store import get_blob_store, read_blob
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+
+
+def content_hash(data: List[Any]) -> str:
+    return hashlib.sha256(_canonical(data)).hexdigest()
+
+
+class ConditionalFetch:
+    """Validators sent with a navigation (`headers`) and the ones it returned."""
+
+    def __init__(self, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self.headers: Dict[str, str] = {}
+        if etag:
+            self.headers["if-none-match"] = etag
+        if last_modified:
+            self.headers["if-modified-since"] = last_modified
+        self.status: Optional[int] = None
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def record(self, status: int, headers: Dict[str, str]):
+        self.status = status
+        if status != 304:
+            self.etag = headers.get("etag")
+            self.last_modified = headers.get("last-modified")
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+def _key_problem(rows: List[Any], key: List[str]) -> Optional[str]:
+    """Why `key` cannot identify `rows` (missing column, repeated value), or None."""
+    seen = set()
+    for row in rows:
+        if not isinstance(row, dict):
+            return "rows are not objects"
+        missing = [c for c in key if c not in row]
+        if missing:
+            return f"key column {missing[0]!r} missing in a row"
+        k = _canonical([row[c] for c in key])
+        if k in seen:
+            return f"key {[row[c] for c in key]} repeats"
+        seen.add(k)
+    return None
+
+
+def diff_rows(previous: List[Any], current: List[Any], key: Optional[List[str]]) -> Dict[str, Any]:
+    """Added / removed / changed rows of `current` against `previous`."""
+    problem = (_key_problem(previous, key) or _key_problem(current, key)) if key else None
+    if key and problem is None:
+        def row_key(row):
+            return _canonical([row[c] for c in key])
+
+        before = {row_key(r): r for r in previous}
+        after = {row_key(r): r for r in current}
+        changed = []
+        for k, row in after.items():
+            old = before.get(k)
+            if old is not None and old != row:
+                fields = {c: [old.get(c), row.get(c)] for c in set(old) | set(row) if old.get(c) != row.get(c)}
+                changed.append({"row": row, "changed": fields})
+        return {
+            "added": [r for k, r in after.items() if k not in before],
+            "removed": [r for k, r in before.items() if k not in after],
+            "changed": changed,
+        }
+    # No key: rows are compared by content, duplicates counted
+    before_counts = Counter(_canonical(r) for r in previous)
+    after_counts = Counter(_canonical(r) for r in current)
+    added, removed = after_counts - before_counts, before_counts - after_counts
+    out: Dict[str, Any] = {"added": [], "removed": [], "changed": []}
+    if problem is not None:
+        out["key_ignored"] = problem
+    for row in current:
+        k = _canonical(row)
+        if added[k] > 0:
+            added[k] -= 1
+            out["added"].append(row)
+    for row in previous:
+        k = _canonical(row)
+        if removed[k] > 0:
+            removed[k] -= 1
+            out["removed"].append(row)
+    return out
+
+
+class ScrapeStates:
+    """Incremental state of one automation's URLs for one run."""
+
+    def __init__(self, automation_id: str, config: dict, session_factory):
+        self.automation_id = automation_id
+        key = config.get("key")
+        self.key: Optional[List[str]] = [key] if isinstance(key, str) else (list(key) if key else None)
+        fields = config.get("fields")
+        scope = [config.get("selector", "body"), config.get("extract", "fields" if fields else "text"), self.key]
+        self._scope = _canonical(scope + [fields] if fields else scope)
+        self._session = session_factory
+        self._rows: Dict[str, Any] = {}     # url_key → ScrapeState (detached) or None
+        self._pending: Dict[str, dict] = {}  # url_key → new values, written by save()
+
+    def url_key(self, url: str) -> str:
+        return hashlib.sha256(self._scope + b"\0" + url.encode("utf-8")).hexdigest()
+
+    def load(self, urls: List[str]):
+        from app.models import ScrapeState
+        keys = {self.url_key(u) for u in urls}
+        session = self._session()
+        try:
+            rows = session.query(ScrapeState).filter(
+                ScrapeState.automation_id == self.automation_id, ScrapeState.url_key.in_(keys)
+            ).all()
+            session.expunge_all()
+        finally:
+            session.close()
+        self._rows = {r.url_key: r for r in rows}
+
+    def fetch(self, url: str) -> ConditionalFetch:
+        row = self._rows.get(self.url_key(url))
+        return ConditionalFetch(row.etag, row.last_modified) if row else ConditionalFetch()
+
+    def diff(self, url: str, data: Optional[List[Any]], fetch: ConditionalFetch) -> Dict[str, Any]:
+        """Changes of one URL; `data` is None when the server answered 304."""
+        url_key = self.url_key(url)
+        row = self._rows.get(url_key)
+        empty = {"added": [], "removed": [], "changed": []}
+        if data is None:
+            return {"url": url, "status": "not_modified", "count": row.rows if row else 0, **empty}
+
+        digest = content_hash(data)
+        update = {"url": url, "etag": fetch.etag, "last_modified": fetch.last_modified}
+        if row is not None and row.content_hash == digest:
+            self._pending[url_key] = update  # validators may have rotated
+            return {"url": url, "status": "unchanged", "count": len(data), **empty}
+
+        previous: List[Any] = []
+        if row is not None and row.snapshot_ref:
+            previous = json.loads(read_blob(row.snapshot_ref, row.snapshot_size))
+        snapshot = _canonical(data)
+        update.update(content_hash=digest, snapshot_ref=get_blob_store().put(snapshot),
+                      snapshot_size=len(snapshot), rows=len(data))
+        self._pending[url_key] = update
+        return {"url": url, "status": "changed" if row is not None else "new", "count": len(data),
+                **diff_rows(previous, data, self.key)}
+
+    def save(self):
+        if not self._pending:
+            return
+        from app.models import ScrapeState
+        session = self._session()
+        try:
+            # DATABASE_URL is PostgreSQL or SQLite; both take INSERT ... ON CONFLICT DO UPDATE
+            if session.get_bind().dialect.name == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            now = datetime.now(timezone.utc)
+            for url_key, values in self._pending.items():
+                values = {**values, "updated_at": now}
+                stmt = insert(ScrapeState).values(automation_id=self.automation_id, url_key=url_key, **values)
+                session.execute(stmt.on_conflict_do_update(index_elements=["automation_id", "url_key"], set_=values))
+            session.commit()
+        finally:
+            session.close()
+        self._pending.clear()
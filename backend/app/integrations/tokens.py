@@ -0,0 +1,36 @@
+"""
+Tokens – 프롬프트 토큰 수 추정
+
+Uses tiktoken when it is installed and knows the model; otherwise a heuristic
+that is close enough for budgeting: ~4 ASCII characters per token and about
+one token per Hangul/CJK character.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: Optional[str]):
+    if not model:
+        return None
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return None  # not an OpenAI model (e.g. llama3): fall back to the heuristic
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    enc = _encoding(model)
+    if enc is not None:
+        return len(enc.encode(text))
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: Optional[str] = None) -> int:
+    # ~4 tokens of framing per message (role, separators)
+    return sum(count_tokens(m["content"], model) + 4 for m in messages)
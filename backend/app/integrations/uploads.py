@@ -0,0 +1,398 @@
+"""
+Uploads – 스트리밍 업로드, 내용 기반 중복 제거, 엑셀 메타데이터 캐시
+
+Upload bodies are never held in memory whole. Chunks go to disk through a
+worker thread, and sha256 is computed as they arrive. A body is cut off with
+413 as soon as it passes UPLOAD_MAX_BYTES, counted on the raw request stream,
+so a chunked body without Content-Length is stopped too. POST /upload feeds
+the request stream straight into python-multipart's callback parser, so the
+file part is written (and hashed) once, with no spooled temporary copy.
+
+Storage is content-addressed:
+
+  UPLOAD_DIR/.objects/ab/<sha256><ext>   one copy per distinct content
+  UPLOAD_DIR/<uuid><ext>                 File.storage_path, a hard link to the
+                                         object (a copy if links are not
+                                         supported), so excel_process outputs
+                                         next to it stay per upload
+  UPLOAD_DIR/.partial/<upload_id>.*      resumable uploads in progress
+
+Re-uploading content the user already has returns the existing File row.
+
+A resumable upload is written by one request at a time, across all API
+processes: session_lock holds an "upload:<upload_id>" lease in the
+UPLOAD_LOCK_BACKEND store (the scheduler's lease stores), renewed while the
+chunk streams. A second writer gets 409 and resumes from GET's offset.
+
+Sheet names and row / column counts are extracted in the background after an
+upload. They are kept in File.meta and in a "<storage_path>.meta.json"
+sidecar. The sidecar also holds the sha256, which excel_process reads
+instead of hashing the workbook again for the columnar cache.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from fastapi import HTTPException
+from app.core.config import settings
+
+META_SUFFIX = ".meta.json"
+# In-process sha256 state of resumable uploads: upload_id → (offset, hasher)
+_hashers: Dict[str, Tuple[int, Any]] = {}
+_lock_store = None
+
+
+def upload_root() -> str:
+    return os.path.abspath(settings.UPLOAD_DIR)
+
+
+def too_large(size: int):
+    if size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(413, f"File exceeds the {settings.UPLOAD_MAX_BYTES} byte upload limit")
+
+
+async def write_stream(chunks: AsyncIterator[bytes], path: str, hasher, start: int = 0,
+                       limit: Optional[int] = None) -> int:
+    """Append `chunks` to `path` off the event loop; returns the new size.
+
+    Raises 413 once the file would pass `limit` (default UPLOAD_MAX_BYTES); the
+    bytes already written stay, so the caller decides whether to discard them.
+    """
+    limit = settings.UPLOAD_MAX_BYTES if limit is None else limit
+    size = start
+    f = await asyncio.to_thread(open, path, "ab" if start else "wb")
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > limit:
+                raise HTTPException(413, f"Upload exceeds {limit} bytes")
+            if hasher is not None:
+                hasher.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+    return size
+
+
+async def limited_stream(chunks: AsyncIterator[bytes], limit: int) -> AsyncIterator[bytes]:
+    """Pass `chunks` through, raising 413 as soon as more than `limit` bytes arrived."""
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(413, f"Request body exceeds {limit} bytes")
+        yield chunk
+
+
+async def receive_multipart_file(content_type: str, chunks: AsyncIterator[bytes], path: str, hasher,
+                                 field: str = "file") -> Optional[Tuple[str, int]]:
+    """Write the first file part named `field` of a multipart body to `path`.
+
+    Returns (filename, size), or None when the body has no such part. Other
+    parts are skipped. 400 on a malformed body, 413 past UPLOAD_MAX_BYTES.
+    `path` is created in every case, so the caller can always remove it.
+    """
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+    # The parser's callbacks are sync: they queue events, handled after each write
+    events = []
+    header = [bytearray(), bytearray()]  # name, value of the header being parsed
+    part_headers: Dict[bytes, bytes] = {}
+
+    def on_header_end():
+        part_headers[bytes(header[0]).lower()] = bytes(header[1])
+        header[0].clear()
+        header[1].clear()
+
+    def on_headers_finished():
+        events.append(("headers", dict(part_headers)))
+        part_headers.clear()
+
+    filename: Optional[str] = None
+    size, writing = 0, False
+    buffer = bytearray()  # written once it reaches UPLOAD_CHUNK_BYTES
+    f = await asyncio.to_thread(open, path, "wb")
+    try:
+        boundary = parse_options_header(content_type)[1].get(b"boundary")
+        if not boundary:
+            raise HTTPException(400, "Missing boundary in multipart/form-data")
+        parser = MultipartParser(boundary, {
+            "on_header_field": lambda data, start, end: header[0].extend(data[start:end]),
+            "on_header_value": lambda data, start, end: header[1].extend(data[start:end]),
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+            "on_part_end": lambda: events.append(("end", None)),
+        })
+        async for chunk in chunks:
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise HTTPException(400, f"Malformed multipart body: {e}")
+            for kind, value in events:
+                if kind == "headers":
+                    options = parse_options_header(value.get(b"content-disposition", b""))[1]
+                    writing = (filename is None and options.get(b"name") == field.encode()
+                               and b"filename" in options)
+                    if writing:
+                        filename = options[b"filename"].decode("utf-8", "replace")
+                elif kind == "data" and writing:
+                    size += len(value)
+                    too_large(size)
+                    hasher.update(value)
+                    buffer += value
+                elif kind == "end":
+                    writing = False
+            events.clear()
+            if len(buffer) >= settings.UPLOAD_CHUNK_BYTES:
+                await asyncio.to_thread(f.write, bytes(buffer))
+                buffer.clear()
+        parser.finalize()
+        if buffer:
+            await asyncio.to_thread(f.write, bytes(buffer))
+    finally:
+        await asyncio.to_thread(f.close)
+    return None if filename is None else (filename, size)
+
+
+# ---------- content-addressed storage (sync; call through asyncio.to_thread) ----------
+def file_ext(filename: Optional[str]) -> str:
+    return os.path.splitext(filename or "")[1].lower()[:20]
+
+
+def commit_object(tmp_path: str, sha256: str, ext: str) -> str:
+    """Move a finished upload into the object store; returns the object path."""
+    obj = os.path.join(upload_root(), ".objects", sha256[:2], sha256 + ext)
+    if os.path.exists(obj):
+        os.remove(tmp_path)  # same content is already stored
+    else:
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        os.replace(tmp_path, obj)
+    return obj
+
+
+def link_object(obj: str, ext: str) -> str:
+    """A fresh per-upload path for `obj` (hard link, else a copy)."""
+    path = os.path.join(upload_root(), f"{uuid.uuid4()}{ext}")
+    try:
+        os.link(obj, path)
+    except OSError:
+        shutil.copyfile(obj, path)
+    return path
+
+
+def temp_path() -> str:
+    partial = os.path.join(upload_root(), ".partial")
+    os.makedirs(partial, exist_ok=True)
+    return os.path.join(partial, f"{uuid.uuid4().hex}.tmp")
+
+
+# ---------- resumable uploads ----------
+def _partial(upload_id: str, suffix: str) -> str:
+    return os.path.join(upload_root(), ".partial", f"{upload_id}{suffix}")
+
+
+def create_session(user_id: str, filename: str, size: int) -> Dict[str, Any]:
+    too_large(size)
+    _expire_sessions()
+    upload_id = uuid.uuid4().hex
+    session = {"upload_id": upload_id, "user_id": user_id, "filename": filename, "size": size}
+    os.makedirs(os.path.dirname(_partial(upload_id, ".json")), exist_ok=True)
+    with open(_partial(upload_id, ".json"), "w", encoding="utf-8") as f:
+        json.dump(session, f)
+    open(_partial(upload_id, ".part"), "wb").close()
+    return {**session, "offset": 0}
+
+
+def load_session(upload_id: str, user_id: str) -> Dict[str, Any]:
+    if not upload_id.isalnum():
+        raise HTTPException(404, "Upload not found")
+    try:
+        with open(_partial(upload_id, ".json"), encoding="utf-8") as f:
+            session = json.load(f)
+        offset = os.path.getsize(_partial(upload_id, ".part"))
+    except FileNotFoundError:
+        raise HTTPException(404, "Upload not found")
+    if session["user_id"] != user_id:
+        raise HTTPException(404, "Upload not found")
+    return {**session, "offset": offset}
+
+
+def drop_session(upload_id: str):
+    _hashers.pop(upload_id, None)
+    for suffix in (".json", ".part"):
+        try:
+            os.remove(_partial(upload_id, suffix))
+        except FileNotFoundError:
+            pass
+
+
+def _expire_sessions():
+    partial = os.path.join(upload_root(), ".partial")
+    if not os.path.isdir(partial):
+        return
+    cutoff = time.time() - settings.UPLOAD_SESSION_TTL_HOURS * 3600
+    for name in os.listdir(partial):
+        path = os.path.join(partial, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass  # removed by another worker
+
+
+def _upload_lock_store():
+    global _lock_store
+    if _lock_store is None:
+        from app.core.db import sync_sessionmaker
+        from app.workers.sharding import make_lease_store
+        _lock_store = make_lease_store(settings.UPLOAD_LOCK_BACKEND, sync_sessionmaker("api"))
+    return _lock_store
+
+
+@asynccontextmanager
+async def session_lock(upload_id: str):
+    """Exclusive right to write `upload_id`, held across processes; 409 while another request has it."""
+    store = _upload_lock_store()
+    name, owner, ttl = f"upload:{upload_id}", uuid.uuid4().hex, settings.UPLOAD_LOCK_TTL
+    if not await asyncio.to_thread(store.acquire, name, owner, ttl):
+        raise HTTPException(409, "Another request is writing this upload; resume from its current offset")
+
+    async def renew():
+        while True:
+            await asyncio.sleep(ttl / 3)
+            await asyncio.to_thread(store.acquire, name, owner, ttl)
+
+    renewer = asyncio.create_task(renew())
+    try:
+        yield
+    finally:
+        renewer.cancel()
+        await asyncio.to_thread(store.release, name, owner)
+
+
+async def append_chunk(session: Dict[str, Any], offset: int, chunks: AsyncIterator[bytes]) -> int:
+    """Write one PATCH body at `offset`; returns the new offset. 409 if the offset is stale."""
+    upload_id = session["upload_id"]
+    if offset != session["offset"]:
+        raise HTTPException(409, "Offset mismatch", headers={"Upload-Offset": str(session["offset"])})
+    state = _hashers.pop(upload_id, None)
+    # Earlier chunks handled by another worker: no running hash here, finish_session rehashes
+    hasher = state[1] if state and state[0] == offset else (hashlib.sha256() if offset == 0 else None)
+    new_offset = await write_stream(chunks, _partial(upload_id, ".part"), hasher, start=offset,
+                                    limit=session["size"])
+    if hasher is not None:
+        _hashers[upload_id] = (new_offset, hasher)
+    return new_offset
+
+
+def finish_session(upload_id: str) -> Tuple[str, str]:
+    """(tmp path, sha256) of a complete upload; the session files are released."""
+    state = _hashers.pop(upload_id, None)
+    part = _partial(upload_id, ".part")
+    if state and state[0] == os.path.getsize(part):
+        sha256 = state[1].hexdigest()
+    else:
+        hasher = hashlib.sha256()  # chunks came through several workers
+        _hash_file(part, hasher)
+        sha256 = hasher.hexdigest()
+    tmp = temp_path()
+    os.replace(part, tmp)
+    drop_session(upload_id)
+    return tmp, sha256
+
+
+def _hash_file(path: str, hasher):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+
+
+# ---------- metadata ----------
+def extract_metadata(path: str) -> Dict[str, Any]:
+    """Sheet names and row / column counts without loading the workbook into memory."""
+    ext = file_ext(path)
+    if ext == ".csv":
+        import csv
+        with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            rows = sum(1 for _ in reader)
+        return {"sheets": [{"name": "", "rows": rows, "columns": len(header)}]}
+    if ext in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheets = []
+            for ws in wb.worksheets:
+                rows, cols = ws.max_row, ws.max_column
+                if rows is None or cols is None:  # no <dimension> element: count
+                    ws.reset_dimensions()
+                    rows = cols = 0
+                    for row in ws.iter_rows(values_only=True):
+                        rows += 1
+                        cols = max(cols, len(row))
+                sheets.append({"name": ws.title, "rows": max(0, rows - 1), "columns": cols})
+            return {"sheets": sheets}
+        finally:
+            wb.close()
+    return {}
+
+
+def write_sidecar(storage_path: str, meta: Dict[str, Any]):
+    st = os.stat(storage_path)
+    tmp = f"{storage_path}{META_SUFFIX}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({**meta, "size": st.st_size, "mtime_ns": st.st_mtime_ns}, f, ensure_ascii=False)
+    os.replace(tmp, storage_path + META_SUFFIX)
+
+
+def read_sidecar(storage_path: str) -> Optional[Dict[str, Any]]:
+    """Cached metadata of an upload, or None when absent or the file changed since."""
+    try:
+        with open(storage_path + META_SUFFIX, encoding="utf-8") as f:
+            meta = json.load(f)
+        st = os.stat(storage_path)
+    except (OSError, ValueError):
+        return None
+    if meta.get("size") != st.st_size or meta.get("mtime_ns") != st.st_mtime_ns:
+        return None
+    return meta
+
+
+def describe_sheets(storage_path: str) -> Optional[str]:
+    """"Sheet1(1000행 x 5열), ..." from the sidecar, for run logs."""
+    meta = read_sidecar(storage_path)
+    if not meta or not meta.get("sheets"):
+        return None
+    return ", ".join(f"{s['name'] or '-'}({s['rows']}행 x {s['columns']}열)" for s in meta["sheets"])
+
+
+async def extract_file_metadata(file_id: str):
+    """Background task after an upload: fill File.meta and the sidecar."""
+    from app.core.db import async_session
+    from app.models import File
+
+    async with async_session() as session:
+        file = await session.get(File, file_id)
+        if file is None:
+            return
+        try:
+            meta = await asyncio.to_thread(extract_metadata, file.storage_path)
+        except Exception as e:  # corrupt / password-protected workbook: excel_process reports it on run
+            meta = {"error": f"{e.__class__.__name__}: {e}"}
+        meta["sha256"] = file.sha256
+        file.meta = meta
+        await session.commit()
+    try:
+        await asyncio.to_thread(write_sidecar, file.storage_path, meta)
+    except OSError:
+        pass  # File.meta is set; excel_process falls back to hashing the file
@@ -2,13 +2,17 @@
 BAIKAL RPA AI  –  FastAPI Application Entry Point
 """
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from app.core.config import settings
 from app.core.db import engine, Base
+from app.core.metrics import MetricsMiddleware, install_db_hooks
+from app.core.schema import upgrade_schema
+from app.integrations.llm_providers import ProviderSaturated, start_providers, stop_providers
 
 # Import ALL models so they are registered with Base.metadata
-from app.models import User, Document, Automation, AutomationRun, File  # noqa: F401
+from app.models import User, Document, Automation, AutomationRun, File, Conversation, ConversationMessage, RunQueueEntry, SchedulerLease  # noqa: F401
 
 
 @asynccontextmanager
@@ -16,7 +20,23 @@ async def lifespan(app: FastAPI):
     # Create tables on startup (dev convenience; prod should use migrations)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # Columns / indexes added to existing tables since the database was created
+        await conn.run_sync(upgrade_schema)
+    # Keep-alive pools and limiters shared by every AI request
+    await start_providers()
+    # Local run queue: re-queue runs orphaned by a previous process, then dispatch
+    from app.workers.dispatcher import get_dispatcher, shutdown_dispatcher
+    get_dispatcher().start()
     yield
+    shutdown_dispatcher()
+    await stop_providers()
+    # Local runner threads share a warm browser pool and HTTP client; close them with the app
+    from app.integrations.browser_pool import shutdown_browser_pool
+    from app.integrations.http_scraper import shutdown_http_fetcher
+    shutdown_browser_pool()
+    shutdown_http_fetcher()
+    from app.core.passwords import shutdown_password_service
+    shutdown_password_service()
 
 
 app = FastAPI(title=settings.APP_TITLE, version=settings.APP_VERSION, lifespan=lifespan)
@@ -27,7 +47,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset pagination cursor on list endpoints; resumable upload offset
+    expose_headers=["X-Next-Cursor", "Upload-Offset"],
 )
+# Outermost, so latency includes CORS handling; route templates come from scope["route"]
+app.add_middleware(MetricsMiddleware)
+install_db_hooks()
+
+@app.exception_handler(ProviderSaturated)
+async def provider_saturated_handler(request: Request, exc: ProviderSaturated):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after + 0.999))},
+    )
+
 
 # ---- Routers ----
 from app.modules.auth.router import router as auth_router
@@ -44,3 +78,20 @@ app.include_router(rpa_router)
 @app.get("/health")
 async def health():
     return {"status": "ok", "app": settings.APP_TITLE}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (see app/core/metrics.py)."""
+    import asyncio
+    from prometheus_client import CONTENT_TYPE_LATEST
+    from app.core.metrics import render
+    # Queue depth queries the database / broker: keep it off the event loop
+    return Response(await asyncio.to_thread(render), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/health/db")
+async def health_db():
+    """Connection pool usage and checkout waits per engine in this process."""
+    from app.core.db import pool_stats
+    return pool_stats()
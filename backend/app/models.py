@@ -3,7 +3,7 @@ BAIKAL RPA AI – SQLAlchemy Models
 """
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Boolean, Text, ForeignKey, DateTime, JSON
+from sqlalchemy import BigInteger, Column, String, Boolean, Text, ForeignKey, DateTime, JSON, Integer, Index, UniqueConstraint
 from app.core.db import Base
 
 
@@ -21,6 +21,11 @@ class User(Base):
     created_at = Column(DateTime, default=utcnow)
 
 
+# Evict cached users (get_current_user) after any ORM update / delete commits
+from app.core.auth_cache import install_invalidation  # noqa: E402
+install_invalidation(User)
+
+
 class Document(Base):
     __tablename__ = "documents"
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -28,7 +33,34 @@ class Document(Base):
     doc_type = Column(String(50), nullable=False)
     title = Column(String(500), nullable=False)
     input_payload = Column(JSON, nullable=False, default={})
-    output_content = Column(Text, nullable=False, default="")
+    output_content = Column(Text, nullable=False, default="")  # only a preview when output_ref is set
+    output_ref = Column(String(80), nullable=True)   # blob store ref of a large body
+    output_size = Column(Integer, nullable=True)     # bytes (UTF-8) of the out-of-row body
+    created_at = Column(DateTime, default=utcnow)
+
+    # Keyset pagination of GET /docs/ (see app/core/pagination.py)
+    __table_args__ = (Index("idx_documents_user_created", user_id, created_at.desc(), id.desc()),)
+
+
+class Conversation(Base):
+    __tablename__ = "conversations"
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    summary = Column(Text, nullable=False, default="")
+    summarized_seq = Column(Integer, nullable=False, default=0)  # messages up to this seq are in summary
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+
+
+class ConversationMessage(Base):
+    __tablename__ = "conversation_messages"
+    __table_args__ = (UniqueConstraint("conversation_id", "seq"),)
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    conversation_id = Column(String(36), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    role = Column(String(20), nullable=False)
+    content = Column(Text, nullable=False)
+    tokens = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=utcnow)
 
 
@@ -42,6 +74,9 @@ class Automation(Base):
     schedule_enabled = Column(Boolean, nullable=False, default=False)
     schedule_cron = Column(String(100), nullable=True)
     created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow, index=True)  # polled by the beat scheduler
+
+    __table_args__ = (Index("idx_automations_user_created", user_id, created_at.desc(), id.desc()),)
 
 
 class AutomationRun(Base):
@@ -50,9 +85,63 @@ class AutomationRun(Base):
     automation_id = Column(String(36), ForeignKey("automations.id"), nullable=False)
     status = Column(String(20), nullable=False, default="queued")
     log = Column(Text, nullable=False, default="")
-    result_payload = Column(JSON, nullable=True)
+    result_payload = Column(JSON, nullable=True)   # NULL when result_ref is set
+    result_ref = Column(String(80), nullable=True)  # blob store ref of a large result (JSON)
+    result_size = Column(Integer, nullable=True)    # bytes of the out-of-row JSON
     started_at = Column(DateTime, nullable=True)
     finished_at = Column(DateTime, nullable=True)
+    idempotency_key = Column(String(200), unique=True, nullable=True)  # "<automation_id>:<fire time>" for scheduled runs
+
+    __table_args__ = (Index("idx_runs_automation_started", automation_id, started_at.desc(), id.desc()),)
+
+
+class AutomationRunLog(Base):
+    """One flushed batch of a run's log lines; lines [first_line, first_line + len(lines))."""
+    __tablename__ = "automation_run_logs"
+    __table_args__ = (UniqueConstraint("run_id", "seq"),)
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    run_id = Column(String(36), ForeignKey("automation_runs.id", ondelete="CASCADE"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    first_line = Column(Integer, nullable=False)
+    lines = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime, default=utcnow)
+
+
+class RunQueueEntry(Base):
+    """Durable queue of runs waiting for / held by the local dispatcher."""
+    __tablename__ = "run_queue"
+    run_id = Column(String(36), ForeignKey("automation_runs.id", ondelete="CASCADE"), primary_key=True)
+    automation_id = Column(String(36), ForeignKey("automations.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    kind = Column(String(10), nullable=False, default="io")  # io (threads) | cpu (processes)
+    attempts = Column(Integer, nullable=False, default=0)
+    enqueued_at = Column(DateTime, nullable=False, default=utcnow)
+    claimed_by = Column(String(100), nullable=True)  # "host:pid:token" of the dispatcher running it
+    claimed_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+
+class ScrapeState(Base):
+    """Incremental web_scrape state of one URL: validators, content hash, last extracted rows."""
+    __tablename__ = "scrape_states"
+    automation_id = Column(String(36), ForeignKey("automations.id", ondelete="CASCADE"), primary_key=True)
+    url_key = Column(String(64), primary_key=True)   # sha256 of selector / extract / key + URL
+    url = Column(String(2000), nullable=False)
+    etag = Column(String(500), nullable=True)
+    last_modified = Column(String(100), nullable=True)
+    content_hash = Column(String(64), nullable=True)  # sha256 of the extracted rows
+    snapshot_ref = Column(String(80), nullable=True)  # blob store ref of the extracted rows (JSON)
+    snapshot_size = Column(Integer, nullable=True)
+    rows = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=utcnow)
+
+
+class SchedulerLease(Base):
+    """Time-limited leases for sharded beat nodes (membership + leader)."""
+    __tablename__ = "scheduler_leases"
+    name = Column(String(200), primary_key=True)
+    owner = Column(String(200), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
 
 
 class File(Base):
@@ -61,4 +150,10 @@ class File(Base):
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
     file_type = Column(String(50), nullable=False)
     storage_path = Column(String(1000), nullable=False)
+    original_name = Column(String(255), nullable=True)
+    size = Column(BigInteger, nullable=True)
+    sha256 = Column(String(64), nullable=True)      # content hash; equal content shares one stored object
+    meta = Column(JSON, nullable=True)              # sheets / row counts, filled in after upload
     created_at = Column(DateTime, default=utcnow)
+
+    __table_args__ = (Index("idx_files_user_sha256", user_id, sha256),)
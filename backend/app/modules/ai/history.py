@@ -0,0 +1,143 @@
+"""
+Chat History – 대화 기록 토큰 예산 관리 (슬라이딩 윈도우 + 누적 요약)
+
+Conversations are stored server-side, so clients send only the new message
+and a conversation_id. Each request includes:
+
+  - the rolling summary of older turns
+  - the most recent turns that are not yet in the summary
+
+When those turns exceed AI_HISTORY_TOKEN_BUDGET, the oldest ones are folded
+into the summary until AI_HISTORY_KEEP_RATIO of the budget is left. Because
+of that headroom, the summary is rewritten once every few turns rather than
+on every message. If the summary cannot be generated, nothing is folded: the
+turns stay in the window (over budget for that request) and folding is tried
+again on the next message.
+
+Turns are numbered per conversation. Concurrent requests on one conversation
+take the conversation row lock (PostgreSQL) and retry on the unique
+(conversation_id, seq) constraint where FOR UPDATE is not available.
+"""
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models import Conversation, ConversationMessage, User, utcnow
+from app.integrations.tokens import count_tokens
+
+SEQ_RETRIES = 5
+
+
+def chat_model() -> str:
+    """Model whose tokenizer the budget is counted with (primary provider's chat tier)."""
+    from app.integrations.llm_routing import choose_model, primary_provider
+    return choose_model(primary_provider(), "chat", [])
+
+
+async def get_conversation(db: AsyncSession, conversation_id: str, user: User) -> Conversation:
+    result = await db.execute(
+        select(Conversation).where(Conversation.id == conversation_id, Conversation.user_id == user.id)
+    )
+    conv = result.scalar_one_or_none()
+    if not conv:
+        raise HTTPException(404, "Conversation not found")
+    return conv
+
+
+async def create_conversation(db: AsyncSession, user: User) -> Conversation:
+    conv = Conversation(user_id=user.id)
+    db.add(conv)
+    await db.flush()
+    return conv
+
+
+async def _live_messages(db: AsyncSession, conv: Conversation) -> List[ConversationMessage]:
+    result = await db.execute(
+        select(ConversationMessage)
+        .where(ConversationMessage.conversation_id == conv.id, ConversationMessage.seq > conv.summarized_seq)
+        .order_by(ConversationMessage.seq)
+    )
+    return list(result.scalars().all())
+
+
+async def prepare_turn(
+    db: AsyncSession, conv: Conversation, regenerate: bool = False
+) -> Tuple[str, List[ConversationMessage]]:
+    """Return (summary, recent turns) to send with the next message."""
+    live = await _live_messages(db, conv)
+
+    if regenerate:
+        # Drop the last user turn and its answer; the client resends that message
+        last_user = next((m for m in reversed(live) if m.role == "user"), None)
+        if last_user is not None:
+            await db.execute(
+                delete(ConversationMessage).where(
+                    ConversationMessage.conversation_id == conv.id, ConversationMessage.seq >= last_user.seq
+                )
+            )
+            live = [m for m in live if m.seq < last_user.seq]
+
+    budget = settings.AI_HISTORY_TOKEN_BUDGET
+    total = sum(m.tokens for m in live)
+    if total <= budget:
+        return conv.summary, live
+
+    target = budget * settings.AI_HISTORY_KEEP_RATIO
+    fold: List[ConversationMessage] = []
+    while len(live) > settings.AI_HISTORY_MIN_TURNS and (total > target or live[0].role == "assistant"):
+        m = live.pop(0)
+        fold.append(m)
+        total -= m.tokens
+
+    if fold:
+        from app.integrations.ai_adapter import ai_summarize_history
+        try:
+            conv.summary = await ai_summarize_history(conv.summary, fold, settings.AI_HISTORY_SUMMARY_TOKENS)
+            conv.summarized_seq = fold[-1].seq
+        except Exception:
+            # Keep the turns in the window rather than lose them; folding is retried next turn
+            live = fold + live
+    return conv.summary, live
+
+
+async def record_turn(db: AsyncSession, conversation_id: str, message: str, reply: str):
+    model = chat_model()
+    turns = [(role, content, count_tokens(content, model) + 4)
+             for role, content in (("user", message), ("assistant", reply))]
+    conv = (
+        await db.execute(select(Conversation).where(Conversation.id == conversation_id).with_for_update())
+    ).scalar_one_or_none()
+    for attempt in range(SEQ_RETRIES):
+        last = await db.scalar(
+            select(func.max(ConversationMessage.seq)).where(ConversationMessage.conversation_id == conversation_id)
+        )
+        seq = last or 0
+        try:
+            async with db.begin_nested():
+                for role, content, tokens in turns:
+                    seq += 1
+                    db.add(ConversationMessage(
+                        conversation_id=conversation_id, seq=seq, role=role, content=content, tokens=tokens
+                    ))
+            break
+        except IntegrityError:
+            # Another request numbered its turn first; take the next free seq
+            if attempt == SEQ_RETRIES - 1:
+                raise
+    if conv is not None:
+        conv.updated_at = utcnow()
+
+
+def trim_history(history: list, model: Optional[str] = None) -> list:
+    """Sliding window over a client-supplied history (requests without conversation_id)."""
+    budget = settings.AI_HISTORY_TOKEN_BUDGET
+    kept = []
+    total = 0
+    for h in reversed(history):
+        total += count_tokens(h.content, model) + 4
+        if total > budget and len(kept) >= settings.AI_HISTORY_MIN_TURNS:
+            break
+        kept.append(h)
+    return list(reversed(kept))
@@ -1,16 +1,129 @@
 """
-AI Router  –  POST /ai/chat
+AI Router  –  POST /ai/chat, POST /ai/chat/stream, GET/DELETE /ai/conversations/{id},
+              GET /ai/providers, GET /ai/cache
 """
+from typing import Optional, Tuple
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.db import async_session, get_db
 from app.core.security import get_current_user
-from app.models import User
-from app.modules.ai.schemas import ChatRequest, ChatResponse
-from app.integrations.ai_adapter import ai_chat
+from app.core.sse import SSE_HEADERS, sse_event
+from app.models import ConversationMessage, User
+from app.modules.ai.history import (
+    chat_model, create_conversation, get_conversation, prepare_turn, record_turn, trim_history,
+)
+from app.modules.ai.schemas import ChatMessage, ChatRequest, ChatResponse, ConversationOut
+from app.integrations.ai_adapter import ai_chat, ai_chat_stream, check_capacity
+from app.integrations.ai_cache import get_ai_cache
+from app.integrations.llm_providers import get_providers
+from app.integrations.llm_routing import routing_stats
 
 router = APIRouter(prefix="/ai", tags=["AI Assistant"])
 
 
+async def _history(body: ChatRequest, db: AsyncSession, user: User) -> Tuple[Optional[str], str, list]:
+    """Resolve (conversation_id, summary, recent turns) for a chat request.
+
+    A request without conversation_id and without history starts a new
+    server-side conversation. Clients that still send their own history get
+    a plain sliding window over it.
+    """
+    if body.conversation_id:
+        conv = await get_conversation(db, body.conversation_id, user)
+    elif body.history:
+        return None, "", trim_history(body.history, chat_model())
+    else:
+        conv = await create_conversation(db, user)
+    summary, recent = await prepare_turn(db, conv, regenerate=body.regenerate)
+    return conv.id, summary, recent
+
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(body: ChatRequest, current_user: User = Depends(get_current_user)):
-    reply = await ai_chat(body.message, body.history)
-    return ChatResponse(reply=reply)
+async def chat(
+    body: ChatRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    conversation_id, summary, recent = await _history(body, db, current_user)
+    reply = await ai_chat(body.message, recent, summary)
+    if conversation_id:
+        await record_turn(db, conversation_id, body.message, reply)
+    return ChatResponse(reply=reply, conversation_id=conversation_id)
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    body: ChatRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """SSE: `data: {"delta": ...}` per token chunk, then `event: done` with the full reply."""
+    check_capacity()
+    conversation_id, summary, recent = await _history(body, db, current_user)
+
+    async def events():
+        parts = []
+        try:
+            async for delta in ai_chat_stream(body.message, recent, summary):
+                parts.append(delta)
+                yield sse_event({"delta": delta})
+        except Exception as e:
+            yield sse_event({"detail": str(e) or e.__class__.__name__}, event="error")
+            return
+        reply = "".join(parts)
+        if conversation_id:
+            # The request-scoped session is already closed once the body streams
+            async with async_session() as session:
+                await record_turn(session, conversation_id, body.message, reply)
+                await session.commit()
+        yield sse_event({"reply": reply, "conversation_id": conversation_id}, event="done")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/conversations/{conversation_id}", response_model=ConversationOut)
+async def conversation_detail(
+    conversation_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Stored summary plus the turns that are not folded into it yet."""
+    conv = await get_conversation(db, conversation_id, current_user)
+    result = await db.execute(
+        select(ConversationMessage)
+        .where(ConversationMessage.conversation_id == conv.id, ConversationMessage.seq > conv.summarized_seq)
+        .order_by(ConversationMessage.seq)
+    )
+    return ConversationOut(
+        id=conv.id,
+        summary=conv.summary,
+        messages=[ChatMessage(role=m.role, content=m.content) for m in result.scalars()],
+        created_at=conv.created_at,
+        updated_at=conv.updated_at,
+    )
+
+
+@router.delete("/conversations/{conversation_id}", status_code=204)
+async def delete_conversation(
+    conversation_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    conv = await get_conversation(db, conversation_id, current_user)
+    await db.execute(delete(ConversationMessage).where(ConversationMessage.conversation_id == conv.id))
+    await db.delete(conv)
+
+
+@router.get("/providers")
+async def provider_stats(current_user: User = Depends(get_current_user)):
+    """Queue depth, rejections, queue-wait and latency per AI provider, plus routing counters."""
+    return {**get_providers().stats(), "routing": routing_stats()}
+
+
+@router.get("/cache")
+async def cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit rate of the AI response cache."""
+    cache = get_ai_cache()
+    return cache.stats() if cache else {"enabled": False}
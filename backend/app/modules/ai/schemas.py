@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from datetime import datetime
 
 
 class ChatMessage(BaseModel):
@@ -9,8 +10,19 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
-    history: List[ChatMessage] = []
+    history: List[ChatMessage] = []       # only used without conversation_id
+    conversation_id: Optional[str] = None
+    regenerate: bool = False              # replace the last answer in the conversation
 
 
 class ChatResponse(BaseModel):
     reply: str
+    conversation_id: Optional[str] = None
+
+
+class ConversationOut(BaseModel):
+    id: str
+    summary: str
+    messages: List[ChatMessage]
+    created_at: datetime
+    updated_at: Optional[datetime] = None
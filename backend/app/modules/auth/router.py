@@ -1,11 +1,12 @@
 """
-Auth Router  –  POST /auth/login, POST /auth/register, GET /auth/me
+Auth Router  –  POST /auth/login, POST /auth/register, GET /auth/me, GET /auth/cache, GET /auth/passwords
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.db import get_db
-from app.core.security import verify_password, hash_password, create_access_token, get_current_user
+from app.core.passwords import check_login_rate, check_register_rate, get_password_service
+from app.core.security import create_access_token, get_current_user
 from app.models import User
 from app.modules.auth.schemas import LoginRequest, TokenResponse, UserOut, RegisterRequest
 
@@ -13,23 +14,28 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(body: LoginRequest, db: AsyncSession = Depends(get_db)):
+async def login(body: LoginRequest, request: Request, db: AsyncSession = Depends(get_db)):
+    check_login_rate(request, body.email)
     result = await db.execute(select(User).where(User.email == body.email))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(body.password, user.password_hash):
+    ok, new_hash = await get_password_service().verify(body.password, user.password_hash if user else None)
+    if not ok:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        user.password_hash = new_hash  # stored at an old cost: upgrade while we have the plaintext
     token = create_access_token({"sub": str(user.id), "role": user.role})
     return TokenResponse(access_token=token)
 
 
 @router.post("/register", response_model=UserOut, status_code=201)
-async def register(body: RegisterRequest, db: AsyncSession = Depends(get_db)):
+async def register(body: RegisterRequest, request: Request, db: AsyncSession = Depends(get_db)):
+    check_register_rate(request)
     exists = await db.execute(select(User).where(User.email == body.email))
     if exists.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Email already registered")
     user = User(
         email=body.email,
-        password_hash=hash_password(body.password),
+        password_hash=await get_password_service().hash(body.password),
         name=body.name,
         role="user",
     )
@@ -42,3 +48,17 @@ async def register(body: RegisterRequest, db: AsyncSession = Depends(get_db)):
 @router.get("/me", response_model=UserOut)
 async def me(current_user: User = Depends(get_current_user)):
     return current_user
+
+
+@router.get("/cache")
+async def auth_cache_stats(current_user: User = Depends(get_current_user)):
+    """get_current_user cache hit rates and database lookups per request."""
+    from app.core.auth_cache import get_auth_cache
+    cache = get_auth_cache()
+    return cache.stats() if cache else {"enabled": False}
+
+
+@router.get("/passwords")
+async def password_stats(current_user: User = Depends(get_current_user)):
+    """Hashing pool mode, hashes in flight and requests turned away with 503."""
+    return get_password_service().stats()
@@ -1,19 +1,38 @@
 """
-Docs Router  –  POST /docs/generate, GET /docs, GET /docs/{id}, DELETE /docs/{id}
+Docs Router  –  POST /docs/generate, POST /docs/generate/stream, GET /docs, GET /docs/{id}, GET /docs/{id}/content, DELETE /docs/{id}
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.core.db import get_db
+from sqlalchemy import func, select
+from app.core.config import settings
+from app.core.db import get_db, get_read_db, async_session
+from app.core.pagination import keyset_page, page_limit, parse_fields, projected_response, set_cursor
 from app.core.security import get_current_user
+from app.core.sse import SSE_HEADERS, sse_event
 from app.models import User, Document
-from app.modules.docs.schemas import DocGenerateRequest, DocOut
-from app.integrations.ai_adapter import ai_generate_document
+from app.modules.docs.schemas import DocGenerateRequest, DocOut, DocSummary
+from app.integrations.blob_store import assign_document_output, document_output_bytes, ranged_response
+from app.integrations.ai_adapter import ai_generate_document, ai_generate_document_stream, check_capacity
 
 router = APIRouter(prefix="/docs", tags=["Documents"])
 
 
+async def _doc_out(doc: Document, content: Optional[str] = None) -> DocOut:
+    """DocOut with an out-of-row body loaded back, unless it is over BLOB_DETAIL_MAX_BYTES."""
+    out = DocOut.model_validate(doc)
+    if doc.output_ref:
+        if content is None and doc.output_size <= settings.BLOB_DETAIL_MAX_BYTES:
+            content = (await asyncio.to_thread(document_output_bytes, doc)).decode("utf-8")
+        if content is None:
+            out.output_truncated = True
+        else:
+            out.output_content = content
+    return out
+
+
 @router.post("/generate", response_model=DocOut, status_code=201)
 async def generate_document(
     body: DocGenerateRequest,
@@ -28,23 +47,77 @@ async def generate_document(
         doc_type=body.doc_type,
         title=body.title,
         input_payload={"content_prompt": body.content_prompt},
-        output_content=generated,
     )
+    await asyncio.to_thread(assign_document_output, doc, generated)
     db.add(doc)
     await db.flush()
     await db.refresh(doc)
-    return doc
+    return await _doc_out(doc, generated)
+
+
+@router.post("/generate/stream")
+async def generate_document_stream(
+    body: DocGenerateRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """SSE: `data: {"delta": ...}` per token chunk, then `event: done` with the saved document."""
+    check_capacity()
+    user_id = current_user.id
+
+    async def events():
+        parts = []
+        try:
+            async for delta in ai_generate_document_stream(body.doc_type, body.title, body.content_prompt):
+                parts.append(delta)
+                yield sse_event({"delta": delta})
+        except Exception as e:
+            yield sse_event({"detail": str(e) or e.__class__.__name__}, event="error")
+            return
+
+        # The request-scoped session is already closed once streaming starts
+        async with async_session() as db:
+            generated = "".join(parts)
+            doc = Document(
+                user_id=user_id,
+                doc_type=body.doc_type,
+                title=body.title,
+                input_payload={"content_prompt": body.content_prompt},
+            )
+            await asyncio.to_thread(assign_document_output, doc, generated)
+            db.add(doc)
+            await db.commit()
+            await db.refresh(doc)
+            yield sse_event((await _doc_out(doc, generated)).model_dump(mode="json"), event="done")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+DOC_FIELDS = ("id", "user_id", "doc_type", "title", "input_payload", "output_content", "output_size", "created_at")
+DOC_SUMMARY_COLUMNS = (
+    Document.id, Document.user_id, Document.doc_type, Document.title, Document.created_at,
+    func.substr(Document.output_content, 1, 200).label("preview"),
+)
 
 
-@router.get("/", response_model=List[DocOut])
+@router.get("/", response_model=List[DocSummary])
 async def list_documents(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description=f"comma-separated subset of {', '.join(DOC_FIELDS)}"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    result = await db.execute(
-        select(Document).where(Document.user_id == current_user.id).order_by(Document.created_at.desc())
+    """Newest first, one page per call; the next page's cursor is in the X-Next-Cursor header."""
+    columns = parse_fields(fields, Document, DOC_FIELDS, always=("id", "created_at"))
+    rows, next_cursor = await keyset_page(
+        db, columns or DOC_SUMMARY_COLUMNS, [Document.user_id == current_user.id],
+        Document.created_at, Document.id, cursor, page_limit(limit),
     )
-    return result.scalars().all()
+    if columns:
+        return projected_response(rows, next_cursor)
+    set_cursor(response, next_cursor)
+    return rows
 
 
 @router.get("/{doc_id}", response_model=DocOut)
@@ -59,7 +132,30 @@ async def get_document(
     doc = result.scalar_one_or_none()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    return doc
+    return await _doc_out(doc)
+
+
+@router.get("/{doc_id}/content")
+async def download_document(
+    doc_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Full body as markdown; streams out-of-row bodies and honours Range / If-None-Match."""
+    result = await db.execute(
+        select(Document.title, Document.output_content, Document.output_ref, Document.output_size)
+        .where(Document.id == doc_id, Document.user_id == current_user.id)
+    )
+    doc = result.one_or_none()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    media_type = "text/markdown; charset=utf-8"
+    if doc.output_ref:
+        return ranged_response(request, size=doc.output_size, media_type=media_type, ref=doc.output_ref,
+                               filename=f"{doc.title}.md")
+    body = doc.output_content.encode("utf-8")
+    return ranged_response(request, size=len(body), media_type=media_type, body=body, filename=f"{doc.title}.md")
 
 
 @router.delete("/{doc_id}", status_code=204)
@@ -16,7 +16,19 @@ class DocOut(BaseModel):
     title: str
     input_payload: Dict[str, Any]
     output_content: str
+    output_size: Optional[int] = None   # set when the body is stored out of row
+    output_truncated: bool = False      # output_content is only a preview; GET /docs/{id}/content
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class DocSummary(BaseModel):
+    """List item: DocOut without input_payload / output_content, plus a short preview."""
+    id: str
+    user_id: str
+    doc_type: str
+    title: str
+    preview: str
+    created_at: datetime
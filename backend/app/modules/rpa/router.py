@@ -1,20 +1,34 @@
 """
-RPA Router  –  /automations CRUD + execute + runs
+RPA Router  –  /automations CRUD + execute + runs + run logs + file uploads
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File as FastFile
+import asyncio
+import hashlib
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.core.db import get_db
+from app.core.config import settings
+from app.core.db import async_session, get_db, get_read_db
+from app.core.pagination import keyset_page, page_limit, parse_fields, projected_response, set_cursor
 from app.core.security import get_current_user
-from app.models import User, Automation, AutomationRun, File
-from app.modules.rpa.schemas import AutomationCreate, AutomationOut, RunOut
-import os, uuid as _uuid, threading
+from app.core.sse import SSE_HEADERS, sse_event
+from app.models import User, Automation, AutomationRun, File, RunQueueEntry
+from app.modules.rpa.schemas import (
+    AutomationCreate, AutomationOut, AutomationSummary, FileOut, RunLogOut, RunOut, RunSummary, UploadCreate, UploadStatus,
+)
+from app.integrations.blob_store import load_run_result, ranged_response, run_result_bytes
+from app.integrations.uploads import (
+    append_chunk, commit_object, create_session, drop_session, extract_file_metadata, file_ext, finish_session,
+    limited_stream, link_object, load_session, receive_multipart_file, session_lock, temp_path, too_large,
+    write_sidecar,
+)
+from app.workers.run_logs import read_run_log
+import os
 
 router = APIRouter(prefix="/automations", tags=["RPA / Automations"])
 
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "uploads")
-
 
 # ---------- CRUD ----------
 @router.post("/", response_model=AutomationOut, status_code=201)
@@ -23,6 +37,15 @@ async def create_automation(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    from app.workers.registry import find_handler
+    handler = find_handler(body.type)
+    if handler is None:
+        raise HTTPException(422, f"Unknown automation type: {body.type}")
+    if handler.validate is not None:
+        try:
+            handler.validate(body.config)
+        except ValueError as e:
+            raise HTTPException(422, str(e))
     auto = Automation(
         user_id=current_user.id,
         name=body.name,
@@ -37,15 +60,39 @@ async def create_automation(
     return auto
 
 
-@router.get("/", response_model=List[AutomationOut])
+@router.get("/types")
+async def list_automation_types(current_user: User = Depends(get_current_user)):
+    """Registered automation types and the worker queue each one runs on."""
+    from app.workers.registry import handlers
+    return [{"type": h.type, "resource": h.resource, "queue": h.queue} for h in handlers().values()]
+
+
+AUTOMATION_FIELDS = ("id", "user_id", "name", "type", "config", "schedule_enabled", "schedule_cron", "created_at")
+AUTOMATION_SUMMARY_COLUMNS = (
+    Automation.id, Automation.user_id, Automation.name, Automation.type,
+    Automation.schedule_enabled, Automation.schedule_cron, Automation.created_at,
+)
+
+
+@router.get("/", response_model=List[AutomationSummary])
 async def list_automations(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description=f"comma-separated subset of {', '.join(AUTOMATION_FIELDS)}"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    result = await db.execute(
-        select(Automation).where(Automation.user_id == current_user.id).order_by(Automation.created_at.desc())
+    """Newest first, one page per call; the next page's cursor is in the X-Next-Cursor header."""
+    columns = parse_fields(fields, Automation, AUTOMATION_FIELDS, always=("id", "created_at"))
+    rows, next_cursor = await keyset_page(
+        db, columns or AUTOMATION_SUMMARY_COLUMNS, [Automation.user_id == current_user.id],
+        Automation.created_at, Automation.id, cursor, page_limit(limit),
     )
-    return result.scalars().all()
+    if columns:
+        return projected_response(rows, next_cursor)
+    set_cursor(response, next_cursor)
+    return rows
 
 
 @router.get("/{auto_id}", response_model=AutomationOut)
@@ -82,6 +129,7 @@ async def delete_automation(
 @router.post("/{auto_id}/run", response_model=RunOut, status_code=202)
 async def run_automation(
     auto_id: str,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -92,30 +140,65 @@ async def run_automation(
     if not auto:
         raise HTTPException(404, "Automation not found")
 
+    # Local dispatcher (no Celery/Redis needed for local dev): bounded pools fed from run_queue
+    from app.workers.dispatcher import admit, get_dispatcher
+    from app.workers.registry import kind_for
+    await admit(db, current_user.id)
+
     run = AutomationRun(automation_id=auto.id, status="queued")
     db.add(run)
     await db.flush()
+    db.add(RunQueueEntry(run_id=run.id, automation_id=auto.id, user_id=current_user.id, kind=kind_for(auto.type)))
+    await db.flush()
     await db.refresh(run)
 
-    # Dispatch in background thread (no Celery/Redis needed for local dev)
-    from app.workers.local_runner import run_automation_sync
-    t = threading.Thread(target=run_automation_sync, args=(str(run.id), str(auto.id), auto.type, auto.config), daemon=True)
-    t.start()
-
+    # Runs after the session has committed, so the dispatcher sees the row at once
+    background_tasks.add_task(get_dispatcher().notify)
     return run
 
 
+@router.get("/queue/stats")
+async def queue_stats(current_user: User = Depends(get_current_user)):
+    """Local run queue depth, wait time and worker pool usage."""
+    from app.workers.dispatcher import get_dispatcher
+    return get_dispatcher().stats()
+
+
 # ---------- Runs ----------
-@router.get("/{auto_id}/runs", response_model=List[RunOut])
+RUN_FIELDS = ("id", "automation_id", "status", "log", "result_payload", "result_size", "started_at", "finished_at")
+RUN_SUMMARY_COLUMNS = (
+    AutomationRun.id, AutomationRun.automation_id, AutomationRun.status,
+    AutomationRun.started_at, AutomationRun.finished_at,
+)
+
+
+def _owned_runs(auto_id: str, user: User):
+    """Condition limiting runs to automation `auto_id`, and only when it belongs to `user`."""
+    return AutomationRun.automation_id == (
+        select(Automation.id).where(Automation.id == auto_id, Automation.user_id == user.id).scalar_subquery()
+    )
+
+
+@router.get("/{auto_id}/runs", response_model=List[RunSummary])
 async def list_runs(
     auto_id: str,
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description=f"comma-separated subset of {', '.join(RUN_FIELDS)}"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
-    result = await db.execute(
-        select(AutomationRun).where(AutomationRun.automation_id == auto_id).order_by(AutomationRun.started_at.desc())
+    """Not-yet-started runs first, then newest first; next page's cursor in X-Next-Cursor."""
+    columns = parse_fields(fields, AutomationRun, RUN_FIELDS, always=("id", "started_at"))
+    rows, next_cursor = await keyset_page(
+        db, columns or RUN_SUMMARY_COLUMNS, [_owned_runs(auto_id, current_user)],
+        AutomationRun.started_at, AutomationRun.id, cursor, page_limit(limit),
     )
-    return result.scalars().all()
+    if columns:
+        return projected_response(rows, next_cursor)
+    set_cursor(response, next_cursor)
+    return rows
 
 
 @router.get("/{auto_id}/runs/{run_id}", response_model=RunOut)
@@ -126,35 +209,238 @@ async def get_run(
     current_user: User = Depends(get_current_user),
 ):
     result = await db.execute(
-        select(AutomationRun).where(AutomationRun.id == run_id, AutomationRun.automation_id == auto_id)
+        select(AutomationRun).where(AutomationRun.id == run_id, _owned_runs(auto_id, current_user))
     )
     run = result.scalar_one_or_none()
     if not run:
         raise HTTPException(404, "Run not found")
-    return run
+    out = RunOut.model_validate(run)
+    if run.result_ref:
+        # Out-of-row result: inline it unless it is over BLOB_DETAIL_MAX_BYTES
+        out.result_payload = await asyncio.to_thread(load_run_result, run)
+        out.result_truncated = out.result_payload is None
+    return out
 
 
-# ---------- File upload (for excel_process) ----------
-@router.post("/upload", status_code=201)
-async def upload_file(
-    file: UploadFile = FastFile(...),
+@router.get("/{auto_id}/runs/{run_id}/result")
+async def download_run_result(
+    auto_id: str,
+    run_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    ext = os.path.splitext(file.filename)[1]
-    filename = f"{_uuid.uuid4()}{ext}"
-    path = os.path.join(UPLOAD_DIR, filename)
-    content = await file.read()
-    with open(path, "wb") as f:
-        f.write(content)
-
-    db_file = File(
-        user_id=current_user.id,
-        file_type=ext.lstrip("."),
-        storage_path=path,
+    """result_payload as a JSON file; streams out-of-row results and honours Range / If-None-Match."""
+    result = await db.execute(
+        select(AutomationRun.result_payload, AutomationRun.result_ref, AutomationRun.result_size)
+        .where(AutomationRun.id == run_id, _owned_runs(auto_id, current_user))
     )
+    run = result.one_or_none()
+    if not run:
+        raise HTTPException(404, "Run not found")
+    filename = f"result-{run_id}.json"
+    if run.result_ref:
+        return ranged_response(request, size=run.result_size, media_type="application/json",
+                               ref=run.result_ref, filename=filename)
+    body = run_result_bytes(run)
+    return ranged_response(request, size=len(body), media_type="application/json", body=body, filename=filename)
+
+
+FINISHED = ("success", "failed")
+
+
+async def _run_log_page(db: AsyncSession, user: User, auto_id: str, run_id: str, since: int, limit: int) -> dict:
+    status = (await db.execute(
+        select(AutomationRun.status).where(AutomationRun.id == run_id, _owned_runs(auto_id, user))
+    )).scalar_one_or_none()
+    if status is None:
+        raise HTTPException(404, "Run not found")
+    # Runners flush the last batch before committing the final status, so a
+    # finished run with a short page has nothing more to come
+    lines, next_offset = await read_run_log(db, run_id, since, limit)
+    return {
+        "run_id": run_id,
+        "status": status,
+        "lines": lines,
+        "next": next_offset,
+        "done": status in FINISHED and len(lines) < limit,
+    }
+
+
+@router.get("/{auto_id}/runs/{run_id}/logs", response_model=RunLogOut)
+async def get_run_logs(
+    auto_id: str,
+    run_id: str,
+    request: Request,
+    since: int = Query(0, ge=0, description="line offset (the previous response's next)"),
+    limit: int = Query(0, ge=0, description="max lines (default RUN_LOG_PAGE_LINES)"),
+    follow: bool = Query(False, description="SSE: keep streaming new lines until the run finishes"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Log lines from offset `since`. With follow=true: SSE `data: RunLogOut` per new batch, then `event: done`."""
+    limit = min(limit or settings.RUN_LOG_PAGE_LINES, settings.RUN_LOG_PAGE_LINES)
+    page = await _run_log_page(db, current_user, auto_id, run_id, since, limit)
+    if not follow:
+        return page
+
+    async def events():
+        current = page
+        while True:
+            if current["lines"]:
+                yield sse_event(current)
+            if current["done"]:
+                yield sse_event({"status": current["status"], "next": current["next"]}, event="done")
+                return
+            if len(current["lines"]) < limit:
+                await asyncio.sleep(settings.RUN_LOG_POLL_SECONDS)
+            if await request.is_disconnected():
+                return
+            # The request-scoped session is already closed once the body streams
+            async with async_session() as session:
+                try:
+                    current = await _run_log_page(session, current_user, auto_id, run_id, current["next"], limit)
+                except HTTPException as e:
+                    yield sse_event({"detail": e.detail}, event="error")  # run deleted meanwhile
+                    return
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+# ---------- File upload (for excel_process) ----------
+UPLOAD_FORM_OPENAPI = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "properties": {"file": {"type": "string", "format": "binary"}}, "required": ["file"],
+}}}}}
+MULTIPART_SLACK = 64 * 1024  # boundaries and part headers on top of the file itself
+
+
+def _file_out(db_file: File, deduplicated: bool = False) -> FileOut:
+    return FileOut(file_id=str(db_file.id), storage_path=db_file.storage_path, filename=db_file.original_name,
+                   size=db_file.size, sha256=db_file.sha256, deduplicated=deduplicated, meta=db_file.meta)
+
+
+async def _register_upload(db: AsyncSession, background_tasks: BackgroundTasks, user: User,
+                           tmp_path: str, sha256: str, size: int, filename: str) -> FileOut:
+    """File row for a finished upload, reusing the user's earlier upload of the same content."""
+    existing = (await db.execute(
+        select(File).where(File.user_id == user.id, File.sha256 == sha256).order_by(File.created_at).limit(1)
+    )).scalar_one_or_none()
+    if existing is not None and await asyncio.to_thread(os.path.exists, existing.storage_path):
+        await asyncio.to_thread(os.remove, tmp_path)
+        return _file_out(existing, deduplicated=True)
+
+    ext = file_ext(filename)
+    obj = await asyncio.to_thread(commit_object, tmp_path, sha256, ext)
+    path = await asyncio.to_thread(link_object, obj, ext)
+    # Metadata depends only on the content: reuse it from anyone's earlier upload
+    known_meta = (await db.execute(
+        select(File.meta).where(File.sha256 == sha256, File.meta.is_not(None)).limit(1)
+    )).scalar_one_or_none()
+
+    db_file = File(user_id=user.id, file_type=ext.lstrip("."), storage_path=path,
+                   original_name=filename[:255], size=size, sha256=sha256)
+    if known_meta is not None:
+        db_file.meta = known_meta
     db.add(db_file)
     await db.flush()
     await db.refresh(db_file)
-    return {"file_id": str(db_file.id), "storage_path": path, "filename": file.filename}
+    if known_meta is not None:
+        await asyncio.to_thread(write_sidecar, path, known_meta)
+    else:
+        # Runs after the session has committed
+        background_tasks.add_task(extract_file_metadata, db_file.id)
+    return _file_out(db_file)
+
+
+@router.post("/upload", response_model=FileOut, status_code=201, openapi_extra=UPLOAD_FORM_OPENAPI)
+async def upload_file(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Single-request upload (multipart field "file"). Large workbooks: POST /automations/uploads."""
+    # Checked before the body is read; limited_stream enforces it for chunked bodies too
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > settings.UPLOAD_MAX_BYTES + MULTIPART_SLACK:
+        too_large(int(length))
+
+    # Parsed as it streams: the file part goes to disk once, without Starlette's spooled copy
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("multipart/form-data"):
+        raise HTTPException(422, "Multipart field 'file' is required")
+    body = limited_stream(request.stream(), settings.UPLOAD_MAX_BYTES + MULTIPART_SLACK)
+    tmp_path = await asyncio.to_thread(temp_path)
+    hasher = hashlib.sha256()
+    try:
+        received = await receive_multipart_file(content_type, body, tmp_path, hasher)
+        if received is None:
+            raise HTTPException(422, "Multipart field 'file' is required")
+    except BaseException:
+        await asyncio.to_thread(os.remove, tmp_path)
+        raise
+    filename, size = received
+    return await _register_upload(db, background_tasks, current_user, tmp_path, hasher.hexdigest(), size,
+                                  filename or "upload")
+
+
+@router.post("/uploads", response_model=UploadStatus, status_code=201)
+async def create_upload(body: UploadCreate, current_user: User = Depends(get_current_user)):
+    """Start a resumable upload; send the bytes with PATCH /automations/uploads/{upload_id}."""
+    return await asyncio.to_thread(create_session, current_user.id, body.filename, body.size)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadStatus)
+async def upload_status(upload_id: str, current_user: User = Depends(get_current_user)):
+    """Bytes received so far: where to resume after a dropped connection."""
+    return await asyncio.to_thread(load_session, upload_id, current_user.id)
+
+
+@router.patch("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Append the raw request body at Upload-Offset.
+
+    Returns the UploadStatus, or the FileOut (201) once the last byte is in.
+    A stale offset gets 409 with the current one in the Upload-Offset header.
+    """
+    async with session_lock(upload_id):
+        session = await asyncio.to_thread(load_session, upload_id, current_user.id)
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and upload_offset + int(length) > session["size"]:
+            raise HTTPException(413, "Chunk runs past the declared upload size")
+        offset = await append_chunk(session, upload_offset, request.stream())
+        if offset < session["size"]:
+            status = UploadStatus(upload_id=upload_id, filename=session["filename"], size=session["size"], offset=offset)
+            return JSONResponse(jsonable_encoder(status), headers={"Upload-Offset": str(offset)})
+        tmp_path, sha256 = await asyncio.to_thread(finish_session, upload_id)
+    file_out = await _register_upload(db, background_tasks, current_user, tmp_path, sha256, offset,
+                                      session["filename"])
+    return JSONResponse(jsonable_encoder(file_out), status_code=201)
+
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def cancel_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    await asyncio.to_thread(load_session, upload_id, current_user.id)
+    await asyncio.to_thread(drop_session, upload_id)
+
+
+@router.get("/files/{file_id}", response_model=FileOut)
+async def get_file(
+    file_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Uploaded file with its extracted metadata (null until the background extraction finishes)."""
+    db_file = (await db.execute(
+        select(File).where(File.id == file_id, File.user_id == current_user.id)
+    )).scalar_one_or_none()
+    if not db_file:
+        raise HTTPException(404, "File not found")
+    return _file_out(db_file)
@@ -25,14 +25,66 @@ class AutomationOut(BaseModel):
         from_attributes = True
 
 
+class AutomationSummary(BaseModel):
+    """List item: AutomationOut without config (fields=config adds it)."""
+    id: str
+    user_id: str
+    name: str
+    type: str
+    schedule_enabled: bool
+    schedule_cron: Optional[str]
+    created_at: datetime
+
+
 class RunOut(BaseModel):
     id: str
     automation_id: str
     status: str
     log: str
     result_payload: Optional[Dict[str, Any]]
+    result_size: Optional[int] = None   # set when the result is stored out of row
+    result_truncated: bool = False      # too large to inline; GET .../runs/{run_id}/result
     started_at: Optional[datetime]
     finished_at: Optional[datetime]
 
     class Config:
         from_attributes = True
+
+
+class RunSummary(BaseModel):
+    """List item: RunOut without log / result_payload (GET the run or fields= for those)."""
+    id: str
+    automation_id: str
+    status: str
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+
+class RunLogOut(BaseModel):
+    run_id: str
+    status: str
+    lines: List[str]
+    next: int       # pass as ?since= to continue
+    done: bool      # run finished and every line has been returned
+
+
+class UploadCreate(BaseModel):
+    filename: str
+    size: int                           # total bytes; checked against UPLOAD_MAX_BYTES up front
+
+
+class UploadStatus(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    offset: int                         # bytes received; the next PATCH starts here
+
+
+class FileOut(BaseModel):
+    file_id: str
+    storage_path: str
+    filename: Optional[str]
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+    deduplicated: bool = False          # same content was already uploaded; existing file returned
+    meta: Optional[Dict[str, Any]] = None  # sheets / row counts; null until extracted
@@ -1,9 +1,14 @@
 """
 Celery application instance
+
+execute_automation is routed to its type's resource queue (rpa.browser,
+rpa.cpu, rpa.llm; see app/workers/registry.py). Start one worker per queue
+with python -m app.workers.worker <resource>.
 """
 from celery import Celery
 from celery.schedules import crontab
 import os
+from app.core.config import settings
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 
@@ -21,5 +26,9 @@ celery_app.conf.update(
     timezone="Asia/Seoul",
     enable_utc=True,
     task_track_started=True,
-    worker_prefetch_multiplier=1,
+    worker_prefetch_multiplier=1,  # per queue: CELERY_<RESOURCE>_PREFETCH via app.workers.worker
+    task_default_queue=settings.CELERY_DEFAULT_QUEUE,
+    task_routes=("app.workers.registry.route_task",),
+    # Schedules come from the automations table (see app/workers/scheduler.py)
+    beat_scheduler="app.workers.scheduler:DatabaseScheduler",
 )
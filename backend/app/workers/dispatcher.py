@@ -0,0 +1,356 @@
+"""
+Run Dispatcher – 로컬 실행용 작업 큐 + 제한된 워커 풀 (Celery 없이)
+
+POST /automations/{id}/run adds a row to the run_queue table. This
+dispatcher runs in the API process and claims rows in FIFO order:
+
+  - io  → thread pool  (RUNNER_IO_WORKERS): browser and llm types
+  - cpu → process pool (RUNNER_CPU_WORKERS): cpu types, pandas work that
+          would otherwise hold the GIL
+
+The pool of a type comes from its resource class in registry.py.
+
+Admission control (admit) rejects new runs with 429 once the queue holds
+RUNNER_MAX_QUEUE rows, or the user already has RUNNER_MAX_QUEUED_PER_USER
+waiting. At most RUNNER_MAX_RUNNING_PER_USER runs per user execute at once.
+
+Claimed rows carry "host:pid:token" plus a heartbeat; the token is random per
+process start, because a restarted container usually comes back with the same
+hostname and PID 1. When a dispatcher starts, it puts rows back in the queue
+if their owner process is gone (including an earlier process with our
+host:pid), or if the heartbeat is older than RUNNER_STALE_SECONDS, so a
+restart does not leave runs stuck in queued/running. A run that has already been picked up
+RUNNER_MAX_ATTEMPTS times is marked failed instead.
+"""
+import multiprocessing
+import os
+import socket
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.integrations.llm_providers import LatencyWindow
+from app.models import Automation, AutomationRun, RunQueueEntry
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(ts: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything here is stored as UTC
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+async def admit(db: AsyncSession, user_id: str):
+    """Raise 429 when the queue (globally or for this user) is full."""
+    total = await db.scalar(select(func.count()).select_from(RunQueueEntry))
+    if total >= settings.RUNNER_MAX_QUEUE:
+        get_dispatcher().rejected += 1
+        raise HTTPException(429, "Run queue is full, retry later", headers={"Retry-After": "10"})
+    mine = await db.scalar(
+        select(func.count())
+        .select_from(RunQueueEntry)
+        .where(RunQueueEntry.user_id == user_id, RunQueueEntry.claimed_by.is_(None))
+    )
+    if mine >= settings.RUNNER_MAX_QUEUED_PER_USER:
+        get_dispatcher().rejected += 1
+        raise HTTPException(429, "Too many queued runs for this user", headers={"Retry-After": "10"})
+
+
+def _execute(run_id: str, automation_id: str, auto_type: str, config: dict):
+    # Module-level so the process pool can pickle it
+    from app.workers.local_runner import run_automation_sync
+    run_automation_sync(run_id, automation_id, auto_type, config)
+
+
+class RunDispatcher:
+    def __init__(self):
+        self.instance = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        self._pools: Dict[str, Any] = {}
+        self._limits = {"io": max(1, settings.RUNNER_IO_WORKERS), "cpu": max(1, settings.RUNNER_CPU_WORKERS)}
+        self._active = {"io": 0, "cpu": 0}
+        self._active_users: Counter = Counter()
+        self._running: Dict[str, str] = {}  # run_id → user_id
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.queue_wait = LatencyWindow()
+        self.completed = 0
+        self.crashed = 0
+        self.recovered = 0
+        self.rejected = 0
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._pools = {
+            "io": ThreadPoolExecutor(self._limits["io"], thread_name_prefix="rpa-io"),
+            "cpu": self._process_pool(),
+        }
+        self.recover()
+        self._thread = threading.Thread(target=self._loop, name="rpa-dispatcher", daemon=True)
+        self._thread.start()
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        # spawn: the API process is multi-threaded, forking it is unsafe
+        return ProcessPoolExecutor(self._limits["cpu"], mp_context=multiprocessing.get_context("spawn"))
+
+    def _reset_process_pool(self):
+        # A child died (e.g. OOM-killed): the executor refuses all work from then on
+        with self._lock:
+            pool = self._pools.get("cpu")
+            if pool is not None and getattr(pool, "_broken", False):
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pools["cpu"] = self._process_pool()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        # In-flight runs are re-queued by the next start (heartbeat / dead pid)
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools = {}
+
+    def notify(self):
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self._heartbeat()
+                self._requeue_orphans()
+                self._dispatch()
+            except Exception:
+                pass  # DB briefly unavailable: try again next tick
+            self._wake.wait(settings.RUNNER_POLL_SECONDS)
+            self._wake.clear()
+
+    # ---------- claiming ----------
+    def _has_capacity(self) -> bool:
+        return any(self._active[k] < self._limits[k] for k in self._limits)
+
+    def _dispatch(self):
+        from app.workers.local_runner import SyncSession
+        if not self._has_capacity():
+            return
+        session = SyncSession()
+        try:
+            rows = session.execute(
+                select(RunQueueEntry, Automation.type, Automation.config)
+                .join(Automation, Automation.id == RunQueueEntry.automation_id)
+                .where(RunQueueEntry.claimed_by.is_(None))
+                .order_by(RunQueueEntry.enqueued_at)
+                .limit(200)
+            ).all()
+            for entry, auto_type, config in rows:
+                with self._lock:
+                    if self._active[entry.kind] >= self._limits[entry.kind]:
+                        continue
+                    if self._active_users[entry.user_id] >= settings.RUNNER_MAX_RUNNING_PER_USER:
+                        continue
+                now = _utcnow()
+                # Conditional update: another dispatcher may race for the same row
+                claimed = session.execute(
+                    update(RunQueueEntry)
+                    .where(RunQueueEntry.run_id == entry.run_id, RunQueueEntry.claimed_by.is_(None))
+                    .values(
+                        claimed_by=self.instance,
+                        claimed_at=now,
+                        heartbeat_at=now,
+                        attempts=RunQueueEntry.attempts + 1,
+                    )
+                ).rowcount
+                session.commit()
+                if not claimed:
+                    continue
+                self.queue_wait.observe((now - _aware(entry.enqueued_at)).total_seconds())
+                self._submit(entry.run_id, entry.automation_id, entry.user_id, entry.kind, auto_type, config or {})
+                if not self._has_capacity():
+                    break
+        finally:
+            session.close()
+
+    def _submit(self, run_id: str, automation_id: str, user_id: str, kind: str, auto_type: str, config: dict):
+        with self._lock:
+            self._active[kind] += 1
+            self._active_users[user_id] += 1
+            self._running[run_id] = user_id
+        try:
+            future = self._pools[kind].submit(_execute, run_id, automation_id, auto_type, config)
+        except BrokenProcessPool:
+            self._reset_process_pool()
+            future = self._pools[kind].submit(_execute, run_id, automation_id, auto_type, config)
+        future.add_done_callback(lambda f: self._finished(run_id, user_id, kind, f))
+
+    def _finished(self, run_id: str, user_id: str, kind: str, future: Future):
+        from app.workers.local_runner import SyncSession
+        with self._lock:
+            self._active[kind] -= 1
+            self._active_users[user_id] -= 1
+            if self._active_users[user_id] <= 0:
+                del self._active_users[user_id]
+            self._running.pop(run_id, None)
+        if future.cancelled():
+            return  # shutting down: leave the row for recovery
+        session = SyncSession()
+        try:
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                self._reset_process_pool()
+            if error is not None:
+                # run_automation_sync records its own failures; this is a dead
+                # worker process (BrokenProcessPool) or similar
+                self.crashed += 1
+                run = session.get(AutomationRun, run_id)
+                if run is not None and run.status in ("queued", "running"):
+                    run.status = "failed"
+                    run.log = (run.log or "") + f"\n[실행기 오류] {error!r}"
+                    run.finished_at = _utcnow()
+            else:
+                self.completed += 1
+            entry = session.get(RunQueueEntry, run_id)
+            if entry is not None:
+                session.delete(entry)
+            session.commit()
+        finally:
+            session.close()
+        self._wake.set()
+
+    # ---------- liveness / recovery ----------
+    def _heartbeat(self):
+        from app.workers.local_runner import SyncSession
+        with self._lock:
+            run_ids = list(self._running)
+        if not run_ids:
+            return
+        session = SyncSession()
+        try:
+            session.execute(
+                update(RunQueueEntry)
+                .where(RunQueueEntry.run_id.in_(run_ids), RunQueueEntry.claimed_by == self.instance)
+                .values(heartbeat_at=_utcnow())
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    def _owner_dead(self, claimed_by: str) -> bool:
+        if claimed_by == self.instance:
+            return False
+        parts = claimed_by.split(":")
+        host, pid = (":".join(parts[:-2]), parts[-2]) if len(parts) >= 3 else (parts[0], parts[-1])
+        if host != socket.gethostname() or not pid.isdigit():
+            return False  # another host: rely on its heartbeat
+        if int(pid) == os.getpid():
+            return True  # an earlier process with our host and PID (container restart)
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    def _requeue_orphans(self) -> int:
+        from app.workers.local_runner import SyncSession
+        stale_before = _utcnow() - timedelta(seconds=settings.RUNNER_STALE_SECONDS)
+        session = SyncSession()
+        requeued = 0
+        try:
+            claimed = session.execute(
+                select(RunQueueEntry).where(RunQueueEntry.claimed_by.is_not(None))
+            ).scalars().all()
+            for entry in claimed:
+                if entry.claimed_by == self.instance:
+                    continue
+                stale = entry.heartbeat_at is None or _aware(entry.heartbeat_at) < stale_before
+                if not (stale or self._owner_dead(entry.claimed_by)):
+                    continue
+                run = session.get(AutomationRun, entry.run_id)
+                if entry.attempts >= settings.RUNNER_MAX_ATTEMPTS:
+                    if run is not None:
+                        run.status = "failed"
+                        run.log = (run.log or "") + f"\n[복구] {entry.attempts}회 실행 중단으로 실패 처리"
+                        run.finished_at = _utcnow()
+                    session.delete(entry)
+                else:
+                    if run is not None:
+                        run.status = "queued"
+                        run.started_at = None
+                        run.log = (run.log or "") + f"\n[복구] 실행기 재시작으로 다시 대기열에 등록 ({entry.claimed_by})"
+                    entry.claimed_by = None
+                    entry.claimed_at = None
+                    entry.heartbeat_at = None
+                requeued += 1
+            session.commit()
+        finally:
+            session.close()
+        self.recovered += requeued
+        return requeued
+
+    def recover(self):
+        """Startup pass: re-queue runs orphaned by a previous process."""
+        try:
+            self._requeue_orphans()
+        except Exception:
+            pass  # table may not exist yet on a fresh DB; the loop retries
+
+    # ---------- stats ----------
+    def stats(self) -> Dict[str, Any]:
+        from app.workers.local_runner import SyncSession
+        session = SyncSession()
+        try:
+            queued, oldest = session.execute(
+                select(func.count(), func.min(RunQueueEntry.enqueued_at)).where(RunQueueEntry.claimed_by.is_(None))
+            ).one()
+            claimed = session.scalar(
+                select(func.count()).select_from(RunQueueEntry).where(RunQueueEntry.claimed_by.is_not(None))
+            )
+        finally:
+            session.close()
+        with self._lock:
+            workers = {k: {"active": self._active[k], "max": self._limits[k]} for k in self._limits}
+        return {
+            "instance": self.instance,
+            "queued": queued,
+            "running": claimed,
+            "oldest_wait_seconds": round((_utcnow() - _aware(oldest)).total_seconds(), 3) if oldest else 0.0,
+            "workers": workers,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "completed": self.completed,
+            "crashed": self.crashed,
+            "recovered": self.recovered,
+            "rejected": self.rejected,
+        }
+
+
+_dispatcher: Optional[RunDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> RunDispatcher:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = RunDispatcher()
+        return _dispatcher
+
+
+def shutdown_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is not None:
+            _dispatcher.stop()
+        _dispatcher = None
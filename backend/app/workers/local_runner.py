@@ -1,21 +1,23 @@
 """
 Local Runner – Celery/Redis 없이 스레드에서 RPA 작업 실행 (개발용)
 """
-import traceback
 from datetime import datetime, timezone
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db import sync_sessionmaker
+from app.core.metrics import install_db_hooks, observe_run
+from app.integrations.blob_store import assign_run_result
+from app.workers.registry import RunContext, get_handler
+from app.workers.run_logs import RunLogSink, failure_log
 
-# SQLite sync URL
-_sync_url = settings.DATABASE_URL.replace("sqlite+aiosqlite", "sqlite").replace("postgresql+asyncpg", "postgresql+psycopg2")
-sync_engine = create_engine(_sync_url, connect_args={"check_same_thread": False} if "sqlite" in _sync_url else {})
-SyncSession = sessionmaker(bind=sync_engine)
+# Dispatcher / runner threads in the API process and runner processes alike
+SyncSession = sync_sessionmaker("worker")
+install_db_hooks()  # also in spawned runner processes
 
 
 def run_automation_sync(run_id: str, automation_id: str, auto_type: str, config: dict):
     from app.models import AutomationRun
     session = SyncSession()
+    log_lines = None
     try:
         run = session.query(AutomationRun).filter_by(id=run_id).first()
         if not run:
@@ -25,32 +27,24 @@ def run_automation_sync(run_id: str, automation_id: str, auto_type: str, config:
         run.started_at = datetime.now(timezone.utc)
         session.commit()
 
-        result = {}
-        log_lines = []
-
-        if auto_type == "web_scrape":
-            from app.integrations.playwright_runner import run_web_scrape
-            result = run_web_scrape(config, log_lines)
-
-        elif auto_type == "excel_process":
-            from app.integrations.excel_processor import run_excel_process
-            result = run_excel_process(config, log_lines)
-
-        else:
-            raise ValueError(f"Unknown automation type: {auto_type}")
+        log_lines = RunLogSink(run_id, SyncSession)
+        result = get_handler(auto_type).invoke(config, log_lines, RunContext(run_id, automation_id))
 
         run.status = "success"
-        run.result_payload = result
-        run.log = "\n".join(log_lines)
+        assign_run_result(run, result)
+        log_lines.close()
+        run.log = log_lines.tail()
         run.finished_at = datetime.now(timezone.utc)
         session.commit()
+        observe_run(auto_type, "success", "local", run.started_at, run.finished_at)
 
     except Exception:
         run = session.query(AutomationRun).filter_by(id=run_id).first()
         if run:
             run.status = "failed"
-            run.log = traceback.format_exc()
+            run.log = failure_log(log_lines)
             run.finished_at = datetime.now(timezone.utc)
             session.commit()
+            observe_run(auto_type, "failed", "local", run.started_at, run.finished_at)
     finally:
         session.close()
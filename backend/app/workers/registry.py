@@ -0,0 +1,178 @@
+"""
+Automation Registry – 자동화 타입별 실행 함수와 자원 클래스 등록
+
+Every automation type is registered with a handler `run(config, log_lines)
+-> result` and the resource class it is bound by:
+
+  browser   Playwright runs. Celery queue rpa.browser, thread pool in one
+            process, so all runs share that process's warm Chromium
+            (BrowserPool); locally the dispatcher's I/O threads
+  cpu       pandas / openpyxl work. Queue rpa.cpu, prefork (one process
+            per run, no GIL contention); locally the dispatcher's process pool
+  llm       runs that mostly wait on an LLM API. Queue rpa.llm, many threads;
+            locally the dispatcher's I/O threads
+
+Each queue gets its own worker service with its own pool type, concurrency
+and prefetch (CELERY_<RESOURCE>_* settings, see app/workers/worker.py), so
+browser, CPU and LLM capacity scale independently. execute_automation is
+routed by its auto_type argument (route_task); everything else stays on the
+default "celery" queue.
+
+Built-in types are registered below with @automation_handler: web_scrape,
+excel_process and pipeline (a DAG of steps, see pipeline_runner.py).
+Packages can add types through the "baikal_rpa.automations" entry point
+group; each entry point names a module (imported for its
+@automation_handler calls) or an AutomationHandler object.
+"""
+import threading
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from app.core.config import settings
+
+ENTRY_POINT_GROUP = "baikal_rpa.automations"
+
+
+class ResourceClass(NamedTuple):
+    queue: str        # Celery queue
+    local_kind: str   # dispatcher pool for local runs: "io" | "cpu"
+
+
+RESOURCES: Dict[str, ResourceClass] = {
+    "browser": ResourceClass("rpa.browser", "io"),
+    "cpu": ResourceClass("rpa.cpu", "cpu"),
+    "llm": ResourceClass("rpa.llm", "io"),
+}
+
+
+class RunContext(NamedTuple):
+    run_id: str
+    automation_id: str
+
+
+class AutomationHandler(NamedTuple):
+    type: str
+    run: Callable[..., dict]
+    resource: str
+    context: bool = False                       # run(config, log_lines, RunContext)
+    validate: Optional[Callable[[dict], None]] = None  # raises ValueError on a bad config (→ 422)
+
+    def invoke(self, config: dict, log_lines, ctx: RunContext) -> dict:
+        return self.run(config, log_lines, ctx) if self.context else self.run(config, log_lines)
+
+    @property
+    def queue(self) -> str:
+        return RESOURCES[self.resource].queue
+
+    @property
+    def local_kind(self) -> str:
+        return RESOURCES[self.resource].local_kind
+
+
+_handlers: Dict[str, AutomationHandler] = {}
+_plugins_loaded = False
+_lock = threading.Lock()
+
+
+def register(handler: AutomationHandler) -> AutomationHandler:
+    if handler.resource not in RESOURCES:
+        raise ValueError(f"Unknown resource class {handler.resource!r} for {handler.type!r}")
+    _handlers[handler.type] = handler
+    return handler
+
+
+def automation_handler(auto_type: str, resource: str, context: bool = False,
+                       validate: Optional[Callable[[dict], None]] = None):
+    """Register the decorated `run(config, log_lines)` as the handler of `auto_type`.
+
+    With context=True it is called as run(config, log_lines, RunContext).
+    """
+
+    def decorate(fn: Callable[..., dict]):
+        register(AutomationHandler(auto_type, fn, resource, context, validate))
+        return fn
+
+    return decorate
+
+
+def _load_plugins():
+    global _plugins_loaded
+    with _lock:
+        if _plugins_loaded:
+            return
+        _plugins_loaded = True
+        from importlib.metadata import entry_points
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                loaded = ep.load()
+            except Exception:
+                continue  # a broken plugin must not take the built-in types down
+            if isinstance(loaded, AutomationHandler):
+                register(loaded)
+
+
+def handlers() -> Dict[str, AutomationHandler]:
+    _load_plugins()
+    return dict(_handlers)
+
+
+def find_handler(auto_type: str) -> Optional[AutomationHandler]:
+    _load_plugins()
+    return _handlers.get(auto_type)
+
+
+def get_handler(auto_type: str) -> AutomationHandler:
+    handler = find_handler(auto_type)
+    if handler is None:
+        raise ValueError(f"Unknown automation type: {auto_type}")
+    return handler
+
+
+def kind_for(auto_type: str) -> str:
+    """Local dispatcher pool ("io" | "cpu") for `auto_type`."""
+    handler = find_handler(auto_type)
+    return handler.local_kind if handler else "io"
+
+
+def queue_for(auto_type: str) -> str:
+    handler = find_handler(auto_type)
+    return handler.queue if handler else settings.CELERY_DEFAULT_QUEUE
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """Celery task_routes entry: execute_automation goes to its type's queue."""
+    if name != "execute_automation":
+        return None
+    auto_type = kwargs.get("auto_type") if kwargs else None
+    if auto_type is None and args and len(args) > 2:
+        auto_type = args[2]
+    return {"queue": queue_for(auto_type)} if auto_type else None
+
+
+# ---------- built-in types ----------
+def _validate_web_scrape(config: dict):
+    from app.integrations.playwright_runner import validate_web_scrape
+    validate_web_scrape(config)
+
+
+@automation_handler("web_scrape", resource="browser", context=True, validate=_validate_web_scrape)
+def _web_scrape(config: dict, log_lines, ctx: RunContext) -> dict:
+    from app.integrations.playwright_runner import run_web_scrape
+    return run_web_scrape(config, log_lines, ctx)
+
+
+@automation_handler("excel_process", resource="cpu")
+def _excel_process(config: dict, log_lines) -> dict:
+    from app.integrations.excel_processor import run_excel_process
+    return run_excel_process(config, log_lines)
+
+
+def _validate_pipeline(config: dict):
+    from app.integrations.pipeline_runner import parse_pipeline
+    parse_pipeline(config)
+
+
+# Orchestrates its own steps in threads; on rpa.cpu because excel steps are
+# the heaviest, browser steps still share the process's BrowserPool
+@automation_handler("pipeline", resource="cpu", context=True, validate=_validate_pipeline)
+def _pipeline(config: dict, log_lines, ctx: RunContext) -> dict:
+    from app.integrations.pipeline_runner import run_pipeline
+    return run_pipeline(config, log_lines, ctx)
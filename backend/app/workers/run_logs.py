@@ -0,0 +1,160 @@
+"""
+Run Logs – 실행 로그를 automation_run_logs 테이블에 배치 단위로 기록
+
+The runners pass a RunLogSink wherever they used to pass a plain log_lines
+list. It behaves like that list (append / extend / len / iteration), and a
+background flusher writes pending lines as one automation_run_logs row once
+RUN_LOG_FLUSH_LINES are waiting or RUN_LOG_FLUSH_SECONDS have passed. append
+itself never touches the database: multi-URL scrapes call it from coroutines
+on the browser pool and HTTP fetcher loops. This lets a running job be
+followed through GET /automations/{id}/runs/{run_id}/logs, and a crash loses
+at most one batch.
+
+automation_runs.log keeps only the last RUN_LOG_TAIL_LINES lines, so RunOut
+stays small in run lists.
+
+A run that is executed again (requeued by the dispatcher after a crash)
+continues the existing log: the sink starts after the last stored batch
+instead of at seq 0, so earlier attempts stay readable and (run_id, seq)
+stays unique.
+"""
+import threading
+import traceback
+from typing import Callable, Iterable, List, Tuple
+from app.core.config import settings
+
+
+class RunLogSink(list):
+    def __init__(self, run_id: str, session_factory: Callable):
+        super().__init__()
+        self.run_id = run_id
+        self._session = session_factory
+        self._lock = threading.RLock()        # the lines
+        self._flush_lock = threading.Lock()   # one batch insert at a time
+        self._flushed = 0  # lines [0, _flushed) are in the table
+        self._seq, self._base = self._resume_point()  # next batch seq, log lines of earlier attempts
+        self._wake = threading.Event()   # lines are pending
+        self._full = threading.Event()   # RUN_LOG_FLUSH_LINES are pending
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"run-log-{run_id[:8]}", daemon=True)
+        self._flusher.start()
+
+    # ---------- list interface used by the integrations ----------
+    def append(self, line) -> None:
+        with self._lock:
+            super().append(str(line))
+            pending = len(self) - self._flushed
+        self._wake.set()
+        if pending >= settings.RUN_LOG_FLUSH_LINES:
+            self._full.set()
+
+    def extend(self, lines: Iterable) -> None:
+        for line in lines:
+            self.append(line)
+
+    # ---------- persistence ----------
+    def _resume_point(self) -> Tuple[int, int]:
+        from sqlalchemy import select
+        from app.models import AutomationRunLog
+
+        session = self._session()
+        try:
+            last = session.execute(
+                select(AutomationRunLog.seq, AutomationRunLog.first_line, AutomationRunLog.lines)
+                .where(AutomationRunLog.run_id == self.run_id)
+                .order_by(AutomationRunLog.seq.desc())
+                .limit(1)
+            ).first()
+        finally:
+            session.close()
+        if last is None:
+            return 0, 0
+        return last.seq + 1, last.first_line + len(last.lines or [])
+
+    def flush(self) -> None:
+        from app.models import AutomationRunLog
+
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self[self._flushed:])
+            if not batch:
+                return
+            # Outside self._lock, so append never waits for the insert
+            session = self._session()
+            try:
+                session.add(AutomationRunLog(run_id=self.run_id, seq=self._seq,
+                                             first_line=self._base + self._flushed, lines=batch))
+                session.commit()
+            finally:
+                session.close()
+            self._seq += 1
+            with self._lock:
+                self._flushed += len(batch)
+
+    def _flush_loop(self):
+        while not self._closed.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            self._full.wait(settings.RUN_LOG_FLUSH_SECONDS)  # size or time threshold
+            self._full.clear()
+            if self._closed.is_set():
+                return  # close() writes the rest
+            try:
+                self.flush()
+            except Exception:
+                pass  # keep the run going; the lines are retried with the next flush
+
+    def close(self) -> None:
+        """Flush what is left and stop the background flusher."""
+        self._closed.set()
+        self._wake.set()
+        self._full.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+
+    def tail(self, limit: int = 0) -> str:
+        limit = limit or settings.RUN_LOG_TAIL_LINES
+        with self._lock:
+            return "\n".join(self[-limit:])
+
+
+def failure_log(sink) -> str:
+    """Add the current traceback to the run's log and return the text for run.log."""
+    trace = traceback.format_exc()
+    if sink is None:
+        return trace
+    trace_lines = trace.rstrip("\n").split("\n")
+    sink.extend(trace_lines)
+    try:
+        sink.close()
+    except Exception:
+        pass  # log table unreachable: run.log below still has the traceback
+    return sink.tail(max(settings.RUN_LOG_TAIL_LINES, len(trace_lines)))
+
+
+async def read_run_log(db, run_id: str, since: int, limit: int) -> Tuple[List[str], int]:
+    """Lines [since, since + limit) of a run's log and the offset to ask for next."""
+    from sqlalchemy import select
+    from app.models import AutomationRunLog
+
+    # Batches are contiguous, so the one holding `since` is the last to start at or before it
+    start_seq = (await db.execute(
+        select(AutomationRunLog.seq)
+        .where(AutomationRunLog.run_id == run_id, AutomationRunLog.first_line <= since)
+        .order_by(AutomationRunLog.seq.desc())
+        .limit(1)
+    )).scalar_one_or_none() or 0
+
+    lines: List[str] = []
+    result = await db.stream(
+        select(AutomationRunLog.first_line, AutomationRunLog.lines)
+        .where(AutomationRunLog.run_id == run_id, AutomationRunLog.seq >= start_seq)
+        .order_by(AutomationRunLog.seq)
+    )
+    async for first_line, batch in result:
+        skip = max(0, since - first_line)
+        lines.extend(batch[skip:skip + limit - len(lines)])
+        if len(lines) >= limit:
+            break
+    await result.close()
+    return lines, since + len(lines)
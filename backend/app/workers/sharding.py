@@ -0,0 +1,233 @@
+"""
+Scheduler Sharding – 일관된 해싱 + 임대(lease) 기반 노드 멤버십 / 리더 선출
+
+With SCHEDULER_MODE=sharded, every beat node runs DatabaseScheduler. Each
+node holds a lease "node:<id>" that it renews every TTL/3. The live leases
+make up a consistent-hash ring, and a node fires only the automations whose
+automation_id hashes to it. When a node stops renewing, its lease expires and
+its share moves to the others; adding a node moves only ~1/N of the
+automations.
+
+One node also holds the "leader" lease and runs the static beat_schedule
+entries (e.g. celery.backend_cleanup) that must run only once.
+
+Lease stores: SCHEDULER_LEASE_BACKEND = db (scheduler_leases table) | redis |
+memory (single process, for tests and benchmarks).
+
+Firings are made idempotent by run_scheduled_automation. During a handover a
+fire time may be sent by both the old and the new owner, so each run row
+carries a unique idempotency_key (automation_id + fire time) and the second
+insert is dropped.
+"""
+import bisect
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from app.core.config import settings
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, nodes: List[str], vnodes: int = 64):
+        self.nodes = sorted(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._keys = [p for p, _ in points]
+        self._owners = [n for _, n in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._owners[i]
+
+
+# ---------- lease stores ----------
+class MemoryLeaseStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._leases: Dict[str, tuple] = {}  # name → (owner, expires_at)
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            current = self._leases.get(name)
+            if current is None or current[0] == owner or current[1] < now:
+                self._leases[name] = (owner, now + ttl)
+                return True
+            return False
+
+    def release(self, name: str, owner: str):
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == owner:
+                del self._leases[name]
+
+    def holders(self, prefix: str) -> Dict[str, str]:
+        now = time.time()
+        with self._lock:
+            return {n: o for n, (o, exp) in self._leases.items() if n.startswith(prefix) and exp >= now}
+
+
+class RedisLeaseStore:
+    PREFIX = "lease:"
+    _RENEW = """
+    local current = redis.call('GET', KEYS[1])
+    if current == ARGV[1] then
+        redis.call('PEXPIRE', KEYS[1], ARGV[2])
+        return 1
+    end
+    if not current then
+        redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+        return 1
+    end
+    return 0
+    """
+    _RELEASE = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+    return 0
+    """
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._renew = self._redis.register_script(self._RENEW)
+        self._release = self._redis.register_script(self._RELEASE)
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        return bool(self._renew(keys=[self.PREFIX + name], args=[owner, int(ttl * 1000)]))
+
+    def release(self, name: str, owner: str):
+        self._release(keys=[self.PREFIX + name], args=[owner])
+
+    def holders(self, prefix: str) -> Dict[str, str]:
+        keys = list(self._redis.scan_iter(match=f"{self.PREFIX}{prefix}*"))
+        values = self._redis.mget(keys) if keys else []
+        return {k[len(self.PREFIX):]: v for k, v in zip(keys, values) if v}
+
+
+class DatabaseLeaseStore:
+    """Leases in the scheduler_leases table (conditional UPDATE, INSERT on first use)."""
+
+    def __init__(self, session_factory):
+        self._session = session_factory
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        from sqlalchemy import or_, update
+        from sqlalchemy.exc import IntegrityError
+        from app.models import SchedulerLease
+
+        now = datetime.now(timezone.utc)
+        expires = now + timedelta(seconds=ttl)
+        session = self._session()
+        try:
+            updated = session.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == name,
+                    or_(SchedulerLease.owner == owner, SchedulerLease.expires_at < now),
+                )
+                .values(owner=owner, expires_at=expires)
+            ).rowcount
+            if updated:
+                session.commit()
+                return True
+            session.add(SchedulerLease(name=name, owner=owner, expires_at=expires))
+            try:
+                session.commit()
+                return True
+            except IntegrityError:
+                session.rollback()  # someone else holds it
+                return False
+        finally:
+            session.close()
+
+    def release(self, name: str, owner: str):
+        from sqlalchemy import delete
+        from app.models import SchedulerLease
+
+        session = self._session()
+        try:
+            session.execute(delete(SchedulerLease).where(SchedulerLease.name == name, SchedulerLease.owner == owner))
+            session.commit()
+        finally:
+            session.close()
+
+    def holders(self, prefix: str) -> Dict[str, str]:
+        from sqlalchemy import select
+        from app.models import SchedulerLease
+
+        session = self._session()
+        try:
+            rows = session.execute(
+                select(SchedulerLease.name, SchedulerLease.owner).where(
+                    SchedulerLease.name.startswith(prefix),
+                    SchedulerLease.expires_at >= datetime.now(timezone.utc),
+                )
+            ).all()
+        finally:
+            session.close()
+        return {name: owner for name, owner in rows}
+
+
+def make_lease_store(backend: str, session_factory=None):
+    backend = backend.lower()
+    if backend == "redis":
+        return RedisLeaseStore(settings.REDIS_URL)
+    if backend == "memory":
+        return MemoryLeaseStore()
+    return DatabaseLeaseStore(session_factory)
+
+
+# ---------- membership ----------
+class ShardMembership(threading.Thread):
+    """Keeps this node's lease alive and tracks the ring of live nodes."""
+
+    def __init__(self, store, node_id: str, ttl: float):
+        super().__init__(name="shard-membership", daemon=True)
+        self.store = store
+        self.node_id = node_id
+        self.ttl = ttl
+        self.ring = HashRing([])
+        self.version = 0
+        self.is_leader = False
+        self._valid_until = 0.0
+        self._stopping = threading.Event()
+
+    def refresh(self):
+        renewed_at = time.time()
+        if not self.store.acquire(f"node:{self.node_id}", self.node_id, self.ttl):
+            return
+        self.is_leader = self.store.acquire("leader", self.node_id, self.ttl)
+        members = sorted(self.store.holders("node:").values())
+        if members != self.ring.nodes:
+            self.ring = HashRing(members)
+            self.version += 1
+        self._valid_until = renewed_at + self.ttl
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                pass  # store unreachable: our lease lapses and owns() turns False
+            self._stopping.wait(self.ttl / 3)
+
+    def stop(self):
+        self._stopping.set()
+        try:
+            self.store.release("leader", self.node_id)
+            self.store.release(f"node:{self.node_id}", self.node_id)
+        except Exception:
+            pass
+
+    @property
+    def active(self) -> bool:
+        # Without a current lease other nodes may already own our share
+        return time.time() < self._valid_until
+
+    def owns(self, automation_id: str) -> bool:
+        return self.active and self.ring.owner(automation_id) == self.node_id
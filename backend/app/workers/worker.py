@@ -0,0 +1,57 @@
+"""
+Celery Worker Launcher – 자원 클래스별 워커 실행
+
+    python -m app.workers.worker browser
+    python -m app.workers.worker cpu
+    python -m app.workers.worker llm --default-queue
+
+Starts a Celery worker that consumes one resource queue (see registry.py)
+with that class's pool type, concurrency and prefetch from settings:
+
+  CELERY_BROWSER_*  threads: runs share the process's warm Chromium
+  CELERY_CPU_*      prefork: one process per pandas run
+  CELERY_LLM_*      threads: many runs waiting on the network at once
+
+--default-queue also consumes CELERY_DEFAULT_QUEUE (run_scheduled_automation,
+which only inserts the run row and forwards it to the type's queue).
+Arguments after "--" go to `celery worker` unchanged.
+"""
+import argparse
+import sys
+from app.core.config import settings
+from app.workers.registry import RESOURCES
+
+
+def worker_argv(resource: str, default_queue: bool = False) -> list:
+    prefix = f"CELERY_{resource.upper()}_"
+    queues = [RESOURCES[resource].queue]
+    if default_queue:
+        queues.append(settings.CELERY_DEFAULT_QUEUE)
+    return [
+        "worker",
+        "--loglevel=info",
+        f"--hostname={resource}@%h",
+        f"--queues={','.join(queues)}",
+        f"--pool={getattr(settings, prefix + 'POOL')}",
+        f"--concurrency={getattr(settings, prefix + 'CONCURRENCY')}",
+        f"--prefetch-multiplier={getattr(settings, prefix + 'PREFETCH')}",
+    ]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    extra = []
+    if "--" in argv:
+        argv, extra = argv[:argv.index("--")], argv[argv.index("--") + 1:]
+    parser = argparse.ArgumentParser(prog="python -m app.workers.worker")
+    parser.add_argument("resource", choices=sorted(RESOURCES))
+    parser.add_argument("--default-queue", action="store_true",
+                        help=f"also consume {settings.CELERY_DEFAULT_QUEUE!r}")
+    args = parser.parse_args(argv)
+
+    from app.workers.celery_app import celery_app
+    celery_app.worker_main(worker_argv(args.resource, args.default_queue) + extra)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Login Storm Benchmark – 로그인 폭주 중 다른 엔드포인트의 지연 측정
+
+    cd backend && python -m benchmarks.login_storm [--logins 64] [--concurrency 32]
+
+Runs the FastAPI app in-process (httpx ASGITransport, temporary SQLite
+database) and fires --logins concurrent POST /auth/login while a second
+task sends GET /health every 10 ms. For each PASSWORD_HASH_POOL mode this
+reports the /health latency during the storm, which is what every other
+request on the worker sees, and the logins per second. Throttling is
+switched off (LOGIN_RATE_PER_MINUTE=LOGIN_IP_RATE_PER_MINUTE=0) so every login reaches bcrypt.
+
+  inline    bcrypt on the event loop, as before the password service
+  thread    bounded thread pool (bcrypt releases the GIL)
+  process   bounded process pool
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+MODES = ("inline", "thread", "process")
+PROBE_INTERVAL = 0.01
+
+
+async def storm(app, logins: int, concurrency: int):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app, client=("10.0.0.1", 1234))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = {"email": "storm@example.com", "password": "storm-password"}
+        await client.post("/auth/register", json={**body, "name": "storm"})
+        await client.get("/health")
+
+        health_lat = []
+        done = asyncio.Event()
+
+        async def poll():
+            # Fixed schedule, latency counted from when each probe was due: a
+            # blocked loop shows up as late probes instead of fewer probes
+            due = time.perf_counter()
+            while not done.is_set():
+                due += PROBE_INTERVAL
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get("/health")
+                health_lat.append(time.perf_counter() - due)
+                due = max(due, time.perf_counter() - PROBE_INTERVAL)
+
+        gate = asyncio.Semaphore(concurrency)
+        statuses = []
+
+        async def login():
+            async with gate:
+                statuses.append((await client.post("/auth/login", json=body)).status_code)
+
+        poller = asyncio.create_task(poll())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await poller
+
+    health_lat.sort()
+    return {
+        "ok": statuses.count(200),
+        "rejected": len(statuses) - statuses.count(200),
+        "logins_per_s": logins / elapsed,
+        "health_n": len(health_lat),
+        "p50_ms": statistics.median(health_lat) * 1000,
+        "p99_ms": health_lat[int(len(health_lat) * 0.99)] * 1000,
+        "max_ms": health_lat[-1] * 1000,
+    }
+
+
+async def run(mode: str, logins: int, concurrency: int):
+    from app.core import passwords
+    from app.core.config import settings
+    from app.core.db import Base, engine
+    from app.main import app
+    from app import models  # noqa: F401  (register tables)
+
+    settings.PASSWORD_HASH_POOL = mode
+    passwords.shutdown_password_service()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        return await storm(app, logins, concurrency)
+    finally:
+        passwords.shutdown_password_service()
+        await engine.dispose()  # pooled connections belong to this event loop
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--modes", nargs="*", default=list(MODES), choices=MODES)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="login-storm-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ["LOGIN_RATE_PER_MINUTE"] = "0"
+    os.environ["LOGIN_IP_RATE_PER_MINUTE"] = "0"
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    os.environ["PASSWORD_HASH_MAX_PENDING"] = str(args.logins)
+    os.environ["AUTH_CACHE_BACKEND"] = "memory"
+
+    print(f"logins={args.logins} concurrency={args.concurrency} workers={args.workers}")
+    print(f"{'mode':>8} {'ok':>5} {'503':>5} {'login/s':>8} {'health n':>9} "
+          f"{'p50(ms)':>8} {'p99(ms)':>8} {'max(ms)':>8}")
+    for mode in args.modes:
+        r = asyncio.run(run(mode, args.logins, args.concurrency))
+        print(f"{mode:>8} {r['ok']:>5} {r['rejected']:>5} {r['logins_per_s']:>8.1f} {r['health_n']:>9} "
+              f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
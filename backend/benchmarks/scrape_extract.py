@@ -0,0 +1,207 @@
+"""
+Scrape Extract Benchmark – 요소별 추출 vs 일괄 추출, 리소스 차단 효과 측정
+
+    cd backend && python -m benchmarks.scrape_extract [--elements 100 1000 5000] [--repeat 3] [--markdown]
+
+Serves generated pages from a local HTTP server and scrapes them on the
+shared BrowserPool (Chromium must be installed: playwright install chromium).
+
+extract: for each page size, the time to read every ".item" once the page
+has loaded, per mode:
+
+  per-element   query_selector_all + inner_text() / inner_html() per handle,
+                as before: one driver round trip per element
+  batched       playwright_runner._scrape_url's eval_on_selector_all, one
+                round trip per page (text, html and a 3-field mapping)
+
+load: goto + extraction of a 200-item page that also pulls 40 images
+(each served with --asset-delay), 4 web fonts and a "third-party" script
+from another host, with each wait_until / block_* combination.
+
+The per-element rows and the "load / -" row are the behaviour before batched
+extraction and request blocking; --markdown prints both tables ready to paste
+into the README next to the machine they were measured on.
+"""
+import argparse
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SIZES = (100, 1000, 5000)
+LOAD_ITEMS = 200
+IMAGES = 40
+FONTS = 4
+PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+FIELDS = {"name": "h3", "link": "a@href", "id": "@data-id"}
+LOAD_CASES = (
+    ("load", {}),
+    ("domcontentloaded", {}),
+    ("load", {"block_resources": ["image", "media", "font"]}),
+    ("load", {"block_resources": ["image", "media", "font"], "block_third_party": True}),
+    ("domcontentloaded", {"block_resources": ["image", "media", "font"], "block_third_party": True}),
+)
+
+
+def page_html(items: int, port: int, assets: bool) -> bytes:
+    rows = "".join(
+        f'<div class="item" data-id="{i}"><h3>Item {i}</h3><p>Price <b>{i * 10}</b> KRW</p>'
+        f'<a href="/item/{i}">detail</a></div>'
+        for i in range(items)
+    )
+    head = body_assets = ""
+    if assets:
+        head = "".join(
+            f"<style>@font-face{{font-family:f{n};src:url(/font/{n}.woff2)}} .f{n}{{font-family:f{n}}}</style>"
+            for n in range(FONTS)
+        )
+        head += f'<script src="http://127.0.0.1:{port}/tracker.js"></script>'
+        body_assets = "".join(f'<img src="/img/{n}.png">' for n in range(IMAGES))
+        body_assets += "".join(f'<span class="f{n}">.</span>' for n in range(FONTS))
+    return f"<html><head>{head}</head><body>{body_assets}{rows}</body></html>".encode()
+
+
+def serve(asset_delay: float):
+    cache = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path.startswith("/page/"):
+                items, assets = path[len("/page/"):].split("/")
+                key = (int(items), assets == "assets")
+                if key not in cache:
+                    cache[key] = page_html(key[0], self.server.server_port, key[1])
+                body, ctype = cache[key], "text/html; charset=utf-8"
+            else:
+                time.sleep(asset_delay)
+                body, ctype = (PNG, "image/png") if path.startswith("/img/") else (b"", "application/octet-stream")
+                if path.endswith(".js"):
+                    ctype = "application/javascript"
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("localhost", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def print_table(headers, rows, markdown: bool):
+    if markdown:
+        print("| " + " | ".join(headers) + " |")
+        print("|" + "|".join("---:" for _ in headers) + "|")
+        for row in rows:
+            print("| " + " | ".join(str(c) for c in row) + " |")
+    else:
+        widths = [max(len(str(c)) for c in [h] + [r[i] for r in rows]) for i, h in enumerate(headers)]
+        for row in [headers] + rows:
+            print(" ".join(f"{str(c):>{w}}" for c, w in zip(row, widths)))
+
+
+async def per_element(page, mode: str):
+    elements = await page.query_selector_all(".item")
+    if mode == "html":
+        return [await el.inner_html() for el in elements]
+    return [await el.inner_text() for el in elements]
+
+
+def bench_extract(pool, base: str, sizes, repeat: int, markdown: bool):
+    from app.integrations.playwright_runner import _FIELDS_JS, _parse_fields
+
+    fields = _parse_fields(FIELDS)
+    batched = {
+        "text": lambda page: page.eval_on_selector_all(".item", "els => els.map(e => e.innerText)"),
+        "html": lambda page: page.eval_on_selector_all(".item", "els => els.map(e => e.innerHTML)"),
+        "fields": lambda page: page.eval_on_selector_all(".item", _FIELDS_JS, fields),
+    }
+
+    async def measure(context, size: int):
+        page = await context.new_page()
+        try:
+            await page.goto(f"{base}/page/{size}/plain")
+            out = {}
+            for label, fn in [("per-element text", lambda p: per_element(p, "text")),
+                              ("per-element html", lambda p: per_element(p, "html"))] + \
+                             [(f"batched {m}", fn) for m, fn in batched.items()]:
+                times = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    items = await fn(page)
+                    times.append(time.perf_counter() - started)
+                assert len(items) == size, (label, len(items))
+                out[label] = statistics.median(times)
+            return out
+        finally:
+            await page.close()
+
+    rows = []
+    for size in sizes:
+        r = pool.run(lambda context: measure(context, size))
+        base_text, base_html = r["per-element text"], r["per-element html"]
+        for label, seconds in r.items():
+            ref = base_html if label.endswith("html") else base_text
+            rows.append([size, label, f"{seconds * 1000:.1f}", f"{seconds / size * 1e6:.1f}", f"{ref / seconds:.1f}x"])
+    print_table(["items", "mode", "median(ms)", "per item(us)", "speedup"], rows, markdown)
+
+
+def bench_load(pool, base: str, repeat: int, markdown: bool):
+    from app.integrations.playwright_runner import _page_options, _scrape_url
+
+    url = f"{base}/page/{LOAD_ITEMS}/assets"
+    print(f"\n{LOAD_ITEMS} items, {IMAGES} images, {FONTS} fonts, 1 third-party script")
+    rows = []
+    for wait_until, block in LOAD_CASES:
+        options = _page_options({"wait_until": wait_until, **block}, "text")
+        logs = []
+        times = []
+        for _ in range(repeat):
+            logs.clear()
+            started = time.perf_counter()
+            data = pool.run(lambda context: _scrape_url(context, url, ".item", ".item", "text", logs,
+                                                        options=options))
+            times.append(time.perf_counter() - started)
+            assert len(data) == LOAD_ITEMS
+        blocked = next((line.split()[2].rstrip("개") for line in logs if line.startswith("[차단]")), "0")
+        label = "+".join(block.get("block_resources", [])) + (" +3rd-party" if block.get("block_third_party") else "")
+        rows.append([wait_until, label or "-", f"{statistics.median(times) * 1000:.1f}", blocked])
+    print_table(["wait_until", "blocking", "median(ms)", "blocked"], rows, markdown)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--elements", type=int, nargs="*", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--asset-delay", type=float, default=0.05, help="seconds per image / font / script")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--markdown", action="store_true", help="print Markdown tables")
+    args = parser.parse_args()
+
+    from app.integrations.browser_pool import get_browser_pool, shutdown_browser_pool
+
+    server = serve(args.asset_delay)
+    base = f"http://localhost:{server.server_port}"
+    pool = get_browser_pool()
+    try:
+        bench_extract(pool, base, args.elements, args.repeat, args.markdown)
+        if not args.skip_load:
+            bench_load(pool, base, args.repeat, args.markdown)
+    finally:
+        shutdown_browser_pool()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+#!/bin/sh
+# BAIKAL RPA AI – container entrypoint
+# Prometheus multiprocess files of a previous container start hold dead pids;
+# merged into /metrics they would replay old counts, so start from an empty dir.
+set -e
+
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+exec "$@"
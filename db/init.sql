@@ -21,7 +21,9 @@ CREATE TABLE documents (
     doc_type        VARCHAR(50) NOT NULL,               -- 'report' | 'official' | 'email'
     title           VARCHAR(500) NOT NULL,
     input_payload   JSONB NOT NULL DEFAULT '{}',
-    output_content  TEXT NOT NULL DEFAULT '',
+    output_content  TEXT NOT NULL DEFAULT '',           -- preview only when output_ref is set
+    output_ref      VARCHAR(80),                        -- blob store ref (sha256[.zst]) of a large body
+    output_size     INTEGER,
     created_at      TIMESTAMPTZ NOT NULL DEFAULT now()
 );
 
@@ -34,7 +36,8 @@ CREATE TABLE automations (
     config           JSONB NOT NULL DEFAULT '{}',
     schedule_enabled BOOLEAN NOT NULL DEFAULT false,
     schedule_cron    VARCHAR(100),
-    created_at       TIMESTAMPTZ NOT NULL DEFAULT now()
+    created_at       TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at       TIMESTAMPTZ NOT NULL DEFAULT now()   -- polled by the beat scheduler
 );
 
 -- 4. automation_runs
@@ -42,26 +45,118 @@ CREATE TABLE automation_runs (
     id              UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     automation_id   UUID NOT NULL REFERENCES automations(id) ON DELETE CASCADE,
     status          VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued | running | success | failed
-    log             TEXT NOT NULL DEFAULT '',
-    result_payload  JSONB,
+    log             TEXT NOT NULL DEFAULT '',               -- last lines only; full log in automation_run_logs
+    result_payload  JSONB,                                  -- NULL when result_ref is set
+    result_ref      VARCHAR(80),                            -- blob store ref of a large result
+    result_size     INTEGER,
     started_at      TIMESTAMPTZ,
-    finished_at     TIMESTAMPTZ
+    finished_at     TIMESTAMPTZ,
+    idempotency_key VARCHAR(200) UNIQUE                     -- scheduled runs: automation_id:fire time
 );
 
 -- 5. files
 CREATE TABLE files (
-    id           UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    user_id      UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-    file_type    VARCHAR(50) NOT NULL,
-    storage_path VARCHAR(1000) NOT NULL,
-    created_at   TIMESTAMPTZ NOT NULL DEFAULT now()
+    id            UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id       UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    file_type     VARCHAR(50) NOT NULL,
+    storage_path  VARCHAR(1000) NOT NULL,
+    original_name VARCHAR(255),
+    size          BIGINT,
+    sha256        VARCHAR(64),                              -- content hash; equal content is stored once
+    meta          JSONB,                                    -- sheets / row counts, filled in after upload
+    created_at    TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- 6. conversations (AI chat history, older turns folded into summary)
+CREATE TABLE conversations (
+    id              UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id         UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    summary         TEXT NOT NULL DEFAULT '',
+    summarized_seq  INTEGER NOT NULL DEFAULT 0,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- 7. conversation_messages
+CREATE TABLE conversation_messages (
+    id               UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    conversation_id  UUID NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    seq              INTEGER NOT NULL,
+    role             VARCHAR(20) NOT NULL,                  -- user | assistant
+    content          TEXT NOT NULL,
+    tokens           INTEGER NOT NULL DEFAULT 0,
+    created_at       TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (conversation_id, seq)
+);
+
+-- 8. run_queue (local dispatcher queue; a row lives until its run finishes)
+CREATE TABLE run_queue (
+    run_id        UUID PRIMARY KEY REFERENCES automation_runs(id) ON DELETE CASCADE,
+    automation_id UUID NOT NULL REFERENCES automations(id) ON DELETE CASCADE,
+    user_id       UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    kind          VARCHAR(10) NOT NULL DEFAULT 'io',        -- io | cpu
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    enqueued_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+    claimed_by    VARCHAR(100),                             -- host:pid:token, NULL while waiting
+    claimed_at    TIMESTAMPTZ,
+    heartbeat_at  TIMESTAMPTZ
+);
+
+-- 9. scheduler_leases (sharded beat: node membership + leader)
+CREATE TABLE scheduler_leases (
+    name        VARCHAR(200) PRIMARY KEY,                   -- node:<id> | leader
+    owner       VARCHAR(200) NOT NULL,
+    expires_at  TIMESTAMPTZ NOT NULL
+);
+
+-- 10. automation_run_logs (run log lines, appended in batches while the run is going)
+CREATE TABLE automation_run_logs (
+    id          UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    run_id      UUID NOT NULL REFERENCES automation_runs(id) ON DELETE CASCADE,
+    seq         INTEGER NOT NULL,                           -- batch number within the run
+    first_line  INTEGER NOT NULL,                           -- line offset of lines[0]
+    lines       JSONB NOT NULL DEFAULT '[]',
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (run_id, seq)
+);
+
+-- 11. scrape_states (incremental web_scrape: per-URL validators + last extracted rows)
+CREATE TABLE scrape_states (
+    automation_id  UUID NOT NULL REFERENCES automations(id) ON DELETE CASCADE,
+    url_key        VARCHAR(64) NOT NULL,                    -- sha256 of selector / extract / key + URL
+    url            VARCHAR(2000) NOT NULL,
+    etag           VARCHAR(500),
+    last_modified  VARCHAR(100),
+    content_hash   VARCHAR(64),                             -- sha256 of the extracted rows
+    snapshot_ref   VARCHAR(80),                             -- blob store ref of the extracted rows
+    snapshot_size  INTEGER,
+    rows           INTEGER NOT NULL DEFAULT 0,
+    updated_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (automation_id, url_key)
 );
 
 -- Indexes
-CREATE INDEX idx_documents_user   ON documents(user_id);
-CREATE INDEX idx_automations_user ON automations(user_id);
-CREATE INDEX idx_runs_automation  ON automation_runs(automation_id);
-CREATE INDEX idx_files_user       ON files(user_id);
+-- (owner, sort key DESC, id DESC): keyset pagination of the list endpoints
+CREATE INDEX idx_documents_user_created   ON documents(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_automations_user_created ON automations(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_automations_updated ON automations(updated_at);
+CREATE INDEX idx_runs_automation_started  ON automation_runs(automation_id, started_at DESC, id DESC);
+CREATE INDEX idx_files_user_sha256 ON files(user_id, sha256);
+CREATE INDEX idx_conversations_user ON conversations(user_id);
+CREATE INDEX idx_run_queue_waiting  ON run_queue(enqueued_at) WHERE claimed_by IS NULL;
+CREATE INDEX idx_run_queue_user     ON run_queue(user_id);
+
+-- Keep automations.updated_at current for writes outside the ORM too
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_automations_updated
+    BEFORE UPDATE ON automations
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
 
 -- Seed: admin user  (password = admin1234)
 -- bcrypt hash for 'admin1234'
@@ -27,3 +27,79 @@ api.interceptors.response.use(
 )
 
 export default api
+
+// Save a (possibly large, out-of-row) body from the API as a file.
+export async function downloadFile(url, filename) {
+  const r = await api.get(url, { responseType: 'blob' })
+  const href = URL.createObjectURL(r.data)
+  const a = document.createElement('a')
+  a.href = href
+  a.download = filename
+  a.click()
+  URL.revokeObjectURL(href)
+}
+
+// One page of a keyset-paginated list. `next` is the cursor for the
+// following page (from the X-Next-Cursor header), null on the last page.
+export async function getPage(url, { cursor, limit, fields } = {}) {
+  const r = await api.get(url, { params: { cursor, limit, fields } })
+  return { items: r.data, next: r.headers['x-next-cursor'] || null }
+}
+
+function authHeaders() {
+  const token = localStorage.getItem('token')
+  return token ? { Authorization: `Bearer ${token}` } : {}
+}
+
+// Read a Server-Sent Events body, calling onMessage for each plain event.
+// Resolves with the payload of the final `done` event.
+async function readEvents(res, onMessage) {
+  if (res.status === 401 && window.location.pathname !== '/login') {
+    localStorage.removeItem('token')
+    window.location.href = '/login'
+  }
+  if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`)
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  let result = null
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let idx
+    while ((idx = buffer.indexOf('\n\n')) >= 0) {
+      const raw = buffer.slice(0, idx)
+      buffer = buffer.slice(idx + 2)
+      let event = 'message'
+      let data = ''
+      for (const line of raw.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7)
+        else if (line.startsWith('data: ')) data += line.slice(6)
+      }
+      const payload = data ? JSON.parse(data) : {}
+      if (event === 'error') throw new Error(payload.detail || 'stream error')
+      if (event === 'done') result = payload
+      else onMessage(payload)
+    }
+  }
+  return result
+}
+
+// POST to a Server-Sent Events endpoint and feed `delta` chunks to onDelta.
+// axios cannot read a streaming body in the browser, so this uses fetch.
+export async function streamPost(url, body, { onDelta } = {}) {
+  const res = await fetch(url, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', ...authHeaders() },
+    body: JSON.stringify(body),
+  })
+  return readEvents(res, (payload) => { if (payload.delta) onDelta?.(payload.delta) })
+}
+
+// GET a Server-Sent Events endpoint (e.g. run logs with follow=true).
+export async function streamGet(url, { onData, signal } = {}) {
+  const res = await fetch(url, { headers: authHeaders(), signal })
+  return readEvents(res, (payload) => onData?.(payload))
+}
@@ -1,5 +1,5 @@
 import { useState, useRef, useEffect } from 'react'
-import api from '../api'
+import { streamPost } from '../api'
 import ReactMarkdown from 'react-markdown'
 import { FiSend, FiTrash2, FiCopy, FiCheck, FiZap, FiFileText, FiMail, FiClipboard, FiMessageCircle, FiRefreshCw, FiChevronDown, FiSparkles } from 'react-icons/fi'
 import toast from 'react-hot-toast'
@@ -17,6 +17,7 @@ export default function AiAssistantPage() {
   const [loading, setLoading] = useState(false)
   const [copiedIdx, setCopiedIdx] = useState(null)
   const [showScroll, setShowScroll] = useState(false)
+  const [conversationId, setConversationId] = useState(null)
   const bottomRef = useRef(null)
   const inputRef = useRef(null)
   const chatRef = useRef(null)
@@ -34,6 +35,25 @@ export default function AiAssistantPage() {
     return () => el.removeEventListener('scroll', onScroll)
   }, [])
 
+  // Stream the reply into a new assistant bubble as tokens arrive
+  const streamChat = async (body) => {
+    let started = false
+    const result = await streamPost('/ai/chat/stream', body, {
+      onDelta: (delta) => {
+        if (!started) {
+          started = true
+          setMessages((prev) => [...prev, { role: 'assistant', content: delta, time: new Date() }])
+        } else {
+          setMessages((prev) => {
+            const last = prev[prev.length - 1]
+            return [...prev.slice(0, -1), { ...last, content: last.content + delta }]
+          })
+        }
+      },
+    })
+    if (result?.conversation_id) setConversationId(result.conversation_id)
+  }
+
   const sendMessage = async (text) => {
     const msg = text || input.trim()
     if (!msg || loading) return
@@ -43,9 +63,8 @@ export default function AiAssistantPage() {
     setLoading(true)
 
     try {
-      const history = messages.map((m) => ({ role: m.role, content: m.content }))
-      const { data } = await api.post('/ai/chat', { message: msg, history })
-      setMessages((prev) => [...prev, { role: 'assistant', content: data.reply, time: new Date() }])
+      // History lives on the server; only the new message is sent
+      await streamChat({ message: msg, conversation_id: conversationId })
     } catch {
       setMessages((prev) => [...prev, { role: 'assistant', content: '⚠️ AI 응답 오류가 발생했습니다. 잠시 후 다시 시도해주세요.', time: new Date() }])
     } finally {
@@ -63,9 +82,7 @@ export default function AiAssistantPage() {
     setMessages(newMessages)
     setLoading(true)
     try {
-      const history = newMessages.map((m) => ({ role: m.role, content: m.content }))
-      const { data } = await api.post('/ai/chat', { message: lastUserMsg.content, history })
-      setMessages(prev => [...prev, { role: 'assistant', content: data.reply, time: new Date() }])
+      await streamChat({ message: lastUserMsg.content, conversation_id: conversationId, regenerate: true })
     } catch {
       setMessages(prev => [...prev, { role: 'assistant', content: '⚠️ 재생성 중 오류가 발생했습니다.', time: new Date() }])
     } finally {
@@ -90,6 +107,7 @@ export default function AiAssistantPage() {
   const clearChat = () => {
     if (messages.length === 0) return
     setMessages([])
+    setConversationId(null)
     toast.success('대화 초기화 완료')
   }
 
@@ -203,7 +221,7 @@ export default function AiAssistantPage() {
                 )}
               </div>
             ))}
-            {loading && (
+            {loading && messages[messages.length - 1]?.role !== 'assistant' && (
               <div className="flex gap-3 justify-start animate-fade-in">
                 <div className="w-8 h-8 rounded-xl bg-gradient-to-br from-baikal-500 to-baikal-700 flex items-center justify-center text-white text-[10px] font-bold shrink-0 shadow-md shadow-baikal-500/15">
                   AI
@@ -1,8 +1,8 @@
 import { useEffect, useState } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import api from '../api'
+import api, { downloadFile, getPage, streamGet } from '../api'
 import toast from 'react-hot-toast'
-import { FiPlay, FiRefreshCw, FiArrowLeft, FiCpu, FiGlobe, FiGrid, FiClock, FiSettings, FiList, FiChevronDown, FiChevronUp, FiTerminal, FiCheckCircle, FiXCircle, FiLoader, FiPause, FiTrendingUp, FiActivity } from 'react-icons/fi'
+import { FiPlay, FiRefreshCw, FiArrowLeft, FiCpu, FiGlobe, FiGrid, FiClock, FiSettings, FiList, FiChevronDown, FiChevronUp, FiTerminal, FiCheckCircle, FiXCircle, FiLoader, FiPause, FiTrendingUp, FiActivity, FiDownload } from 'react-icons/fi'
 
 const STATUS_STYLES = {
   queued: { bg: 'bg-amber-50', text: 'text-amber-700', border: 'border-amber-200', icon: FiPause, label: '대기 중', dot: 'bg-amber-400' },
@@ -11,6 +11,37 @@ const STATUS_STYLES = {
   failed: { bg: 'bg-red-50', text: 'text-red-700', border: 'border-red-200', icon: FiXCircle, label: '실패', dot: 'bg-red-400' },
 }
 
+// Full run log from /logs (follows live while the run is going); runs
+// recorded before the log table existed only have the run.log tail.
+function RunLog({ autoId, run, onFinished }) {
+  const [lines, setLines] = useState([])
+
+  useEffect(() => {
+    const controller = new AbortController()
+    setLines([])
+    streamGet(`/automations/${autoId}/runs/${run.id}/logs?follow=true`, {
+      signal: controller.signal,
+      onData: (page) => setLines((prev) => prev.concat(page.lines)),
+    })
+      .then((done) => { if (done && done.status !== run.status) onFinished() })
+      .catch(() => {})
+    return () => controller.abort()
+  }, [autoId, run.id])
+
+  const text = lines.length > 0 ? lines.join('\n') : run.log
+  if (!text) return null
+  return (
+    <div>
+      <div className="text-[10px] uppercase tracking-wider text-gray-400 font-semibold mb-1.5 flex items-center gap-1">
+        <FiTerminal size={10} /> 실행 로그
+      </div>
+      <div className="bg-gray-950 rounded-xl p-4 overflow-auto max-h-96">
+        <pre className="text-xs text-gray-300 font-mono whitespace-pre-wrap leading-relaxed">{text}</pre>
+      </div>
+    </div>
+  )
+}
+
 export default function AutomationDetailPage() {
   const { id } = useParams()
   const navigate = useNavigate()
@@ -20,7 +51,26 @@ export default function AutomationDetailPage() {
   const [runLoading, setRunLoading] = useState(false)
 
   const loadAuto = () => api.get(`/automations/${id}`).then((r) => setAuto(r.data)).catch(() => navigate('/automations'))
-  const loadRuns = () => api.get(`/automations/${id}/runs`).then((r) => setRuns(r.data)).catch(() => {})
+  const [nextCursor, setNextCursor] = useState(null)
+  const [details, setDetails] = useState({})
+
+  const loadRuns = () =>
+    getPage(`/automations/${id}/runs`)
+      .then(({ items, next }) => { setRuns(items); setNextCursor(next); setDetails({}) })
+      .catch(() => {})
+  const loadMoreRuns = () =>
+    getPage(`/automations/${id}/runs`, { cursor: nextCursor })
+      .then(({ items, next }) => { setRuns((prev) => prev.concat(items)); setNextCursor(next) })
+      .catch(() => {})
+
+  // The run list has no log / result_payload; load them when a run is opened
+  const toggleRun = (runId) => {
+    if (expandedRun === runId) return setExpandedRun(null)
+    setExpandedRun(runId)
+    api.get(`/automations/${id}/runs/${runId}`)
+      .then((r) => setDetails((prev) => ({ ...prev, [runId]: r.data })))
+      .catch(() => {})
+  }
 
   useEffect(() => { loadAuto(); loadRuns() }, [id])
 
@@ -110,7 +160,7 @@ export default function AutomationDetailPage() {
               <FiActivity size={14} className="text-gray-400" />
             </div>
           </div>
-          <div className="text-2xl sm:text-3xl font-bold text-gray-900">{runs.length}</div>
+          <div className="text-2xl sm:text-3xl font-bold text-gray-900">{runs.length}{nextCursor ? '+' : ''}</div>
           <div className="text-[10px] sm:text-xs text-gray-500 mt-0.5">전체 실행</div>
         </div>
         <div className="bg-white rounded-2xl border border-gray-100 p-4 sm:p-5 card-hover">
@@ -170,7 +220,7 @@ export default function AutomationDetailPage() {
           <div className="flex items-center gap-2">
             <FiList size={14} className="text-gray-400" />
             <span className="text-sm font-semibold text-gray-600">실행 기록</span>
-            <span className="text-[10px] px-2 py-0.5 rounded-full bg-gray-100 text-gray-500">{runs.length}건</span>
+            <span className="text-[10px] px-2 py-0.5 rounded-full bg-gray-100 text-gray-500">{runs.length}{nextCursor ? '+' : ''}건</span>
           </div>
         </div>
         
@@ -194,6 +244,7 @@ export default function AutomationDetailPage() {
                   const style = STATUS_STYLES[r.status] || STATUS_STYLES.queued
                   const StatusIcon = style.icon
                   const isExpanded = expandedRun === r.id
+                  const detail = details[r.id] || r
                   const duration = r.finished_at && r.started_at ? ((new Date(r.finished_at) - new Date(r.started_at)) / 1000).toFixed(1) : null
 
                   return (
@@ -203,7 +254,7 @@ export default function AutomationDetailPage() {
                       
                       <div className="ml-10">
                         <button
-                          onClick={() => setExpandedRun(isExpanded ? null : r.id)}
+                          onClick={() => toggleRun(r.id)}
                           className="w-full text-left p-4 rounded-xl hover:bg-gray-50/70 transition group -ml-1"
                         >
                           <div className="flex items-center gap-3">
@@ -228,25 +279,24 @@ export default function AutomationDetailPage() {
 
                         {isExpanded && (
                           <div className="pb-4 pl-3 space-y-3 animate-slide-up">
-                            {r.log && (
-                              <div>
-                                <div className="text-[10px] uppercase tracking-wider text-gray-400 font-semibold mb-1.5 flex items-center gap-1">
-                                  <FiTerminal size={10} /> 실행 로그
-                                </div>
-                                <div className="bg-gray-950 rounded-xl p-4">
-                                  <pre className="text-xs text-gray-300 font-mono whitespace-pre-wrap leading-relaxed">{r.log}</pre>
-                                </div>
-                              </div>
-                            )}
-                            {r.result_payload && (
+                            <RunLog autoId={id} run={detail} onFinished={loadRuns} />
+                            {detail.result_payload && (
                               <div>
                                 <div className="text-[10px] uppercase tracking-wider text-gray-400 font-semibold mb-1.5">결과 데이터</div>
                                 <div className="bg-gray-950 rounded-xl p-4 overflow-auto max-h-60">
-                                  <pre className="text-xs text-gray-300 font-mono leading-relaxed">{JSON.stringify(r.result_payload, null, 2)}</pre>
+                                  <pre className="text-xs text-gray-300 font-mono leading-relaxed">{JSON.stringify(detail.result_payload, null, 2)}</pre>
                                 </div>
                               </div>
                             )}
-                            {!r.log && !r.result_payload && (
+                            {detail.result_truncated && (
+                              <button
+                                onClick={() => downloadFile(`/automations/${id}/runs/${r.id}/result`, `result-${r.id}.json`).catch(() => toast.error('다운로드에 실패했습니다'))}
+                                className="flex items-center gap-1.5 text-xs text-gray-600 px-3 py-2 rounded-xl border border-gray-200 hover:bg-gray-50 transition"
+                              >
+                                <FiDownload size={12} /> 결과 데이터 다운로드 ({Math.round(detail.result_size / 1024)} KB)
+                              </button>
+                            )}
+                            {details[r.id] && !detail.log && !detail.result_payload && !detail.result_truncated && r.status !== 'running' && (
                               <p className="text-xs text-gray-400 pl-1">상세 데이터 없음</p>
                             )}
                           </div>
@@ -257,6 +307,13 @@ export default function AutomationDetailPage() {
                 })}
               </div>
             </div>
+            {nextCursor && (
+              <div className="flex justify-center pt-3">
+                <button onClick={loadMoreRuns} className="text-xs text-gray-500 hover:text-gray-700 px-4 py-2 rounded-xl border border-gray-200 hover:bg-gray-50 transition">
+                  이전 실행 더 보기
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
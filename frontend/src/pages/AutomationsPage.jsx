@@ -1,18 +1,20 @@
 import { useEffect, useState } from 'react'
 import { Link } from 'react-router-dom'
-import api from '../api'
+import api, { getPage } from '../api'
 import toast from 'react-hot-toast'
-import { FiPlus, FiTrash2, FiPlay, FiCpu, FiGlobe, FiGrid, FiSearch, FiX, FiClock, FiArrowRight, FiRefreshCw, FiSettings, FiActivity } from 'react-icons/fi'
+import { FiPlus, FiTrash2, FiPlay, FiCpu, FiGlobe, FiGrid, FiSearch, FiX, FiClock, FiArrowRight, FiRefreshCw, FiSettings, FiActivity, FiGitBranch } from 'react-icons/fi'
 
-const TYPE_LABELS = { web_scrape: '웹 수집', excel_process: '엑셀 처리' }
-const TYPE_ICONS = { web_scrape: FiGlobe, excel_process: FiGrid }
+const TYPE_LABELS = { web_scrape: '웹 수집', excel_process: '엑셀 처리', pipeline: '파이프라인' }
+const TYPE_ICONS = { web_scrape: FiGlobe, excel_process: FiGrid, pipeline: FiGitBranch }
 const TYPE_COLORS = {
   web_scrape: 'bg-blue-50 text-blue-600 border-blue-100',
   excel_process: 'bg-emerald-50 text-emerald-600 border-emerald-100',
+  pipeline: 'bg-violet-50 text-violet-600 border-violet-100',
 }
 const TYPE_GRADIENTS = {
   web_scrape: 'from-blue-500 to-indigo-600',
   excel_process: 'from-emerald-500 to-teal-600',
+  pipeline: 'from-violet-500 to-purple-600',
 }
 
 export default function AutomationsPage() {
@@ -22,10 +24,19 @@ export default function AutomationsPage() {
   const [loading, setLoading] = useState(true)
   const [runningId, setRunningId] = useState(null)
 
+  const [nextCursor, setNextCursor] = useState(null)
+
   const load = () => {
     setLoading(true)
-    api.get('/automations/').then((r) => setList(r.data)).catch(() => {}).finally(() => setLoading(false))
+    getPage('/automations/')
+      .then(({ items, next }) => { setList(items); setNextCursor(next) })
+      .catch(() => {})
+      .finally(() => setLoading(false))
   }
+  const loadMore = () =>
+    getPage('/automations/', { cursor: nextCursor })
+      .then(({ items, next }) => { setList((prev) => prev.concat(items)); setNextCursor(next) })
+      .catch(() => {})
   useEffect(() => { load() }, [])
 
   const remove = async (id, e) => {
@@ -68,7 +79,7 @@ export default function AutomationsPage() {
             </div>
             업무 자동화
           </h1>
-          <p className="text-[10px] sm:text-xs text-gray-400 mt-1 ml-9 sm:ml-10">RPA 작업을 등록하고 관리합니다 · 총 {list.length}건</p>
+          <p className="text-[10px] sm:text-xs text-gray-400 mt-1 ml-9 sm:ml-10">RPA 작업을 등록하고 관리합니다 · 총 {list.length}{nextCursor ? '+' : ''}건</p>
         </div>
         <div className="flex items-center gap-2">
           <button onClick={load} className="p-2.5 border border-gray-200 rounded-xl text-gray-400 hover:text-gray-600 hover:bg-gray-50 transition active:scale-95" title="새로고침">
@@ -207,6 +218,14 @@ export default function AutomationsPage() {
           })}
         </div>
       )}
+
+      {!loading && nextCursor && (
+        <div className="flex justify-center">
+          <button onClick={loadMore} className="text-xs text-gray-500 hover:text-gray-700 px-4 py-2 rounded-xl border border-gray-200 hover:bg-gray-50 transition">
+            더 보기
+          </button>
+        </div>
+      )}
     </div>
   )
 }
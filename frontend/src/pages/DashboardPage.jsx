@@ -1,6 +1,6 @@
 import { useEffect, useState, useRef } from 'react'
 import { Link, useNavigate } from 'react-router-dom'
-import api from '../api'
+import api, { getPage } from '../api'
 import {
   FiMessageSquare, FiFileText, FiCpu, FiTrendingUp,
   FiCheckCircle, FiClock, FiArrowRight, FiZap, FiActivity,
@@ -27,18 +27,23 @@ function useAnimatedCount(target, duration = 600) {
   return count
 }
 
+// Lists are paginated and uncounted; the stat cards show "100+" past this
+const DASHBOARD_LIMIT = 100
+
 export default function DashboardPage() {
   const navigate = useNavigate()
   const [user, setUser] = useState(null)
   const [docs, setDocs] = useState([])
   const [autos, setAutos] = useState([])
+  const [moreDocs, setMoreDocs] = useState(false)
+  const [moreAutos, setMoreAutos] = useState(false)
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
     Promise.all([
       api.get('/auth/me').then((r) => setUser(r.data)).catch(() => {}),
-      api.get('/docs/').then((r) => setDocs(r.data)).catch(() => {}),
-      api.get('/automations/').then((r) => setAutos(r.data)).catch(() => {}),
+      getPage('/docs/', { limit: DASHBOARD_LIMIT }).then(({ items, next }) => { setDocs(items); setMoreDocs(!!next) }).catch(() => {}),
+      getPage('/automations/', { limit: DASHBOARD_LIMIT }).then(({ items, next }) => { setAutos(items); setMoreAutos(!!next) }).catch(() => {}),
     ]).finally(() => setLoading(false))
   }, [])
 
@@ -61,8 +66,8 @@ export default function DashboardPage() {
     { label: '자동화 실행', desc: 'RPA 작업 실행', icon: FiZap, path: '/automations', gradient: 'from-purple-500 to-pink-600', hover: 'hover:shadow-purple-500/15' },
   ]
 
-  const recentDocs = docs.slice(-3).reverse()
-  const recentAutos = autos.slice(-3).reverse()
+  const recentDocs = docs.slice(0, 3)
+  const recentAutos = autos.slice(0, 3)
 
   return (
     <div className="space-y-6 stagger">
@@ -106,7 +111,7 @@ export default function DashboardPage() {
               {loading ? (
                 <div className="skeleton h-8 w-16 rounded-lg" />
               ) : s.value === '-' ? '-' : s.title === '성공률' ? '100%' : (
-                s.title === '문서 생성' ? docCount : s.title === '자동화 등록' ? autoCount : s.value
+                s.title === '문서 생성' ? `${docCount}${moreDocs ? '+' : ''}` : s.title === '자동화 등록' ? `${autoCount}${moreAutos ? '+' : ''}` : s.value
               )}
             </div>
             <div className="text-[10px] sm:text-xs text-gray-500 mt-1">{s.title}</div>
@@ -237,7 +242,7 @@ export default function DashboardPage() {
                     <div className="text-sm font-medium truncate group-hover:text-baikal-700 transition">{a.name}</div>
                     <div className="text-[10px] text-gray-400 flex items-center gap-1.5 mt-0.5">
                       <span className="px-1.5 py-0.5 rounded bg-gray-100 text-gray-500">
-                        {a.type === 'web_scrape' ? '웹 수집' : '엑셀 처리'}
+                        {{ web_scrape: '웹 수집', excel_process: '엑셀 처리', pipeline: '파이프라인' }[a.type] || a.type}
                       </span>
                       <span>{a.schedule_enabled ? `스케줄: ${a.schedule_cron}` : '수동 실행'}</span>
                     </div>
@@ -1,6 +1,6 @@
 import { useState } from 'react'
 import { useNavigate } from 'react-router-dom'
-import api from '../api'
+import { streamPost } from '../api'
 import toast from 'react-hot-toast'
 import ReactMarkdown from 'react-markdown'
 import { FiFileText, FiSend, FiCopy, FiDownload, FiArrowLeft, FiCheck, FiZap, FiFile, FiSparkles } from 'react-icons/fi'
@@ -43,12 +43,18 @@ export default function DocumentNewPage() {
     setLoading(true)
     setResult(null)
     try {
-      const { data } = await api.post('/docs/generate', {
+      let partial = ''
+      const data = await streamPost('/docs/generate/stream', {
         doc_type: docType,
         title,
         content_prompt: prompt,
+      }, {
+        onDelta: (delta) => {
+          partial += delta
+          setResult({ output_content: partial })
+        },
       })
-      setResult(data)
+      if (data) setResult(data)
       toast.success('문서가 AI에 의해 성공적으로 생성되었습니다!')
     } catch {
       toast.error('문서 생성에 실패했습니다. 다시 시도해주세요.')
@@ -208,7 +214,7 @@ export default function DocumentNewPage() {
               <div className="flex items-center gap-2">
                 <FiFile size={14} className="text-gray-400" />
                 <span className="text-sm font-semibold text-gray-600">문서 미리보기</span>
-                {result && <span className="text-[10px] px-2 py-0.5 rounded-full bg-emerald-50 text-emerald-600 border border-emerald-100">생성 완료</span>}
+                {result?.id && <span className="text-[10px] px-2 py-0.5 rounded-full bg-emerald-50 text-emerald-600 border border-emerald-100">생성 완료</span>}
               </div>
               {result && (
                 <div className="flex items-center gap-1">
@@ -224,7 +230,7 @@ export default function DocumentNewPage() {
               )}
             </div>
             <div className="p-6 overflow-auto max-h-[calc(100vh-16rem)]">
-              {loading ? (
+              {loading && !result?.output_content ? (
                 <div className="flex flex-col items-center justify-center py-16 gap-4">
                   <div className="relative">
                     <div className="w-14 h-14 rounded-2xl bg-gradient-to-br from-baikal-100 to-baikal-50 flex items-center justify-center">
@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react'
 import { Link } from 'react-router-dom'
-import api from '../api'
+import api, { downloadFile, getPage } from '../api'
 import toast from 'react-hot-toast'
 import { FiPlus, FiTrash2, FiSearch, FiFileText, FiFilter, FiDownload, FiEye, FiX, FiClock, FiFile, FiGrid, FiList } from 'react-icons/fi'
 import ReactMarkdown from 'react-markdown'
@@ -25,9 +25,25 @@ export default function DocumentsPage() {
   const [loading, setLoading] = useState(true)
   const [viewMode, setViewMode] = useState('grid') // 'grid' or 'list'
 
+  const [nextCursor, setNextCursor] = useState(null)
+
   const load = () => {
     setLoading(true)
-    api.get('/docs/').then((r) => setDocs(r.data)).catch(() => {}).finally(() => setLoading(false))
+    getPage('/docs/')
+      .then(({ items, next }) => { setDocs(items); setNextCursor(next) })
+      .catch(() => {})
+      .finally(() => setLoading(false))
+  }
+  const loadMore = () =>
+    getPage('/docs/', { cursor: nextCursor })
+      .then(({ items, next }) => { setDocs((prev) => prev.concat(items)); setNextCursor(next) })
+      .catch(() => {})
+
+  // List items carry only a preview; fetch the full document when it is opened
+  const fetchDoc = (doc) => api.get(`/docs/${doc.id}`).then((r) => r.data)
+  const openPreview = (doc) => {
+    setPreviewDoc(doc)
+    fetchDoc(doc).then(setPreviewDoc).catch(() => {})
   }
   useEffect(() => { load() }, [])
 
@@ -48,16 +64,12 @@ export default function DocumentsPage() {
 
   const downloadDoc = (doc, e) => {
     e.stopPropagation()
-    const blob = new Blob([doc.output_content || ''], { type: 'text/markdown' })
-    const url = URL.createObjectURL(blob)
-    const a = document.createElement('a')
-    a.href = url
-    a.download = `${doc.title}.md`
-    a.click()
-    URL.revokeObjectURL(url)
-    toast.success('다운로드 완료')
+    downloadFile(`/docs/${doc.id}/content`, `${doc.title}.md`)
+      .then(() => toast.success('다운로드 완료'))
+      .catch(() => toast.error('다운로드에 실패했습니다'))
   }
 
+
   return (
     <div className="space-y-5">
       {/* Header */}
@@ -69,7 +81,7 @@ export default function DocumentsPage() {
             </div>
             문서 관리
           </h1>
-          <p className="text-[10px] sm:text-xs text-gray-400 mt-1 ml-9 sm:ml-10">AI가 자동 생성한 문서를 관리합니다 · 총 {docs.length}건</p>
+          <p className="text-[10px] sm:text-xs text-gray-400 mt-1 ml-9 sm:ml-10">AI가 자동 생성한 문서를 관리합니다 · 총 {docs.length}{nextCursor ? '+' : ''}건</p>
         </div>
         <Link
           to="/documents/new"
@@ -150,7 +162,7 @@ export default function DocumentsPage() {
           {filtered.map((d) => (
             <div
               key={d.id}
-              onClick={() => setPreviewDoc(d)}
+              onClick={() => openPreview(d)}
               className="group bg-white rounded-2xl border border-gray-100 p-5 card-hover cursor-pointer"
             >
               <div className="flex items-start justify-between mb-3">
@@ -158,7 +170,7 @@ export default function DocumentsPage() {
                   <FiFile size={18} />
                 </div>
                 <div className="flex items-center gap-1 opacity-0 group-hover:opacity-100 transition-opacity">
-                  <button onClick={(e) => { e.stopPropagation(); setPreviewDoc(d) }} className="p-1.5 hover:bg-blue-50 rounded-lg text-gray-400 hover:text-blue-600 transition" title="미리보기">
+                  <button onClick={(e) => { e.stopPropagation(); openPreview(d) }} className="p-1.5 hover:bg-blue-50 rounded-lg text-gray-400 hover:text-blue-600 transition" title="미리보기">
                     <FiEye size={13} />
                   </button>
                   <button onClick={(e) => downloadDoc(d, e)} className="p-1.5 hover:bg-emerald-50 rounded-lg text-gray-400 hover:text-emerald-600 transition" title="다운로드">
@@ -171,7 +183,7 @@ export default function DocumentsPage() {
               </div>
               <h3 className="font-semibold text-gray-900 text-sm group-hover:text-baikal-700 transition truncate">{d.title}</h3>
               <p className="text-xs text-gray-400 mt-1 line-clamp-2 leading-relaxed">
-                {d.output_content?.slice(0, 80) || d.content_prompt?.slice(0, 80) || '내용 없음'}...
+                {d.preview?.slice(0, 80) || '내용 없음'}...
               </p>
               <div className="flex items-center justify-between mt-4 pt-3 border-t border-gray-50">
                 <span className={`text-[10px] px-2 py-0.5 rounded-full font-medium border ${DOC_COLORS[d.doc_type] || 'bg-gray-50 text-gray-500'}`}>
@@ -199,7 +211,7 @@ export default function DocumentsPage() {
             </thead>
             <tbody className="divide-y divide-gray-50">
               {filtered.map((d) => (
-                <tr key={d.id} className="hover:bg-gray-50/50 transition group cursor-pointer" onClick={() => setPreviewDoc(d)}>
+                <tr key={d.id} className="hover:bg-gray-50/50 transition group cursor-pointer" onClick={() => openPreview(d)}>
                   <td className="px-5 py-4">
                     <div className="flex items-center gap-3">
                       <div className={`w-9 h-9 rounded-xl flex items-center justify-center shrink-0 ${DOC_COLORS[d.doc_type] || 'bg-gray-50 text-gray-400'} group-hover:scale-105 transition-transform`}>
@@ -208,7 +220,7 @@ export default function DocumentsPage() {
                       <div>
                         <div className="font-medium text-gray-900 group-hover:text-baikal-700 transition">{d.title}</div>
                         <div className="text-xs text-gray-400 mt-0.5 truncate max-w-sm">
-                          {d.output_content?.slice(0, 60) || d.content_prompt?.slice(0, 60) || ''}...
+                          {d.preview?.slice(0, 60) || ''}...
                         </div>
                       </div>
                     </div>
@@ -226,7 +238,7 @@ export default function DocumentsPage() {
                   </td>
                   <td className="px-5 py-4">
                     <div className="flex items-center gap-1 opacity-0 group-hover:opacity-100 transition justify-end">
-                      <button onClick={(e) => { e.stopPropagation(); setPreviewDoc(d) }} className="p-2 hover:bg-blue-50 rounded-lg text-gray-400 hover:text-blue-600 transition" title="미리보기">
+                      <button onClick={(e) => { e.stopPropagation(); openPreview(d) }} className="p-2 hover:bg-blue-50 rounded-lg text-gray-400 hover:text-blue-600 transition" title="미리보기">
                         <FiEye size={14} />
                       </button>
                       <button onClick={(e) => downloadDoc(d, e)} className="p-2 hover:bg-emerald-50 rounded-lg text-gray-400 hover:text-emerald-600 transition" title="다운로드">
@@ -244,6 +256,14 @@ export default function DocumentsPage() {
         </div>
       )}
 
+      {!loading && nextCursor && (
+        <div className="flex justify-center">
+          <button onClick={loadMore} className="text-xs text-gray-500 hover:text-gray-700 px-4 py-2 rounded-xl border border-gray-200 hover:bg-gray-50 transition">
+            더 보기
+          </button>
+        </div>
+      )}
+
       {/* Preview Modal */}
       {previewDoc && (
         <div className="fixed inset-0 bg-black/40 backdrop-blur-sm z-50 flex items-end sm:items-center justify-center p-0 sm:p-6" onClick={() => setPreviewDoc(null)}>
@@ -271,7 +291,8 @@ export default function DocumentsPage() {
             </div>
             <div className="flex-1 overflow-auto px-6 py-5">
               <div className="prose prose-sm max-w-none">
-                <ReactMarkdown>{previewDoc.output_content || '내용 없음'}</ReactMarkdown>
+                <ReactMarkdown>{previewDoc.output_content || previewDoc.preview || '내용 없음'}</ReactMarkdown>
+                {previewDoc.output_truncated && <p className="text-xs text-gray-400 mt-4">문서가 커서 앞부분만 표시합니다. 전체 내용은 다운로드하세요.</p>}
               </div>
             </div>
           </div>
@@ -6,12 +6,13 @@ export default defineConfig({
   server: {
     host: '0.0.0.0',
     port: 5173,
+    // xfwd: send X-Forwarded-For so the API throttles per browser, not per proxy
     proxy: {
-      '/auth': 'http://localhost:8000',
-      '/ai': 'http://localhost:8000',
-      '/docs': 'http://localhost:8000',
-      '/automations': 'http://localhost:8000',
-      '/health': 'http://localhost:8000',
+      '/auth': { target: 'http://localhost:8000', xfwd: true },
+      '/ai': { target: 'http://localhost:8000', xfwd: true },
+      '/docs': { target: 'http://localhost:8000', xfwd: true },
+      '/automations': { target: 'http://localhost:8000', xfwd: true },
+      '/health': { target: 'http://localhost:8000', xfwd: true },
     },
   },
 })